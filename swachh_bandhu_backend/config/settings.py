@@ -1,7 +1,9 @@
 import os
+import sys
 from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
+from corsheaders.defaults import default_headers
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -95,6 +98,23 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Media lives in S3-compatible object storage (AWS S3, MinIO, ...) when a bucket is
+# configured, and clients upload to it directly with presigned URLs. Without one,
+# media stays on the local filesystem and a signed local PUT endpoint stands in.
+AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='')
+if AWS_STORAGE_BUCKET_NAME:
+    AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)
+    AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default=None)
+    AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default=None)
+    AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default=None)
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
+    AWS_S3_FILE_OVERWRITE = False
+    AWS_DEFAULT_ACL = None
+    STORAGES = {
+        'default': {'BACKEND': 'storages.backends.s3.S3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
@@ -120,6 +140,9 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', cast=Csv())
+# Resumable uploads exchange their offset in headers.
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
+CORS_EXPOSE_HEADERS = ['Upload-Offset', 'Upload-Length']
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Swachh Bandhu API',
@@ -135,6 +158,7 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@swachhbandhu.
 
 MAX_VERIFICATION_DISTANCE_METERS = config('MAX_VERIFICATION_DISTANCE_METERS', default=50, cast=int)
 MIN_DISTANCE_BETWEEN_REPORTS_METERS = config('MIN_DISTANCE_BETWEEN_REPORTS_METERS', default=10, cast=int)
+DUPLICATE_REPORT_WINDOW_HOURS = config('DUPLICATE_REPORT_WINDOW_HOURS', default=168, cast=int)
 
 MAP_WIDGETS = {
     "GoogleMap": {
@@ -150,6 +174,48 @@ POINTS_FOR_INITIAL_REPORT = config('POINTS_FOR_INITIAL_REPORT', default=10, cast
 POINTS_FOR_PEER_VERIFICATION = config('POINTS_FOR_PEER_VERIFICATION', default=5, cast=int)
 PENALTY_FOR_FAKE_REPORT = config('PENALTY_FOR_FAKE_REPORT', default=-50, cast=int)
 
+GAMIFICATION_BATCH_SIZE = config('GAMIFICATION_BATCH_SIZE', default=200, cast=int)
+GAMIFICATION_MAX_BATCHES_PER_RUN = config('GAMIFICATION_MAX_BATCHES_PER_RUN', default=50, cast=int)
+GAMIFICATION_FLUSH_DELAY_SECONDS = config('GAMIFICATION_FLUSH_DELAY_SECONDS', default=2, cast=int)
+# How far back open_due_lotteries looks for lotteries that have just opened; must exceed its beat interval.
+LOTTERY_OPEN_LOOKBACK = timedelta(hours=config('LOTTERY_OPEN_LOOKBACK_HOURS', default=2, cast=int))
+
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=500, cast=int)
+NOTIFICATION_MAX_BATCHES_PER_RUN = config('NOTIFICATION_MAX_BATCHES_PER_RUN', default=20, cast=int)
+NOTIFICATION_DISPATCH_DELAY_SECONDS = config('NOTIFICATION_DISPATCH_DELAY_SECONDS', default=60, cast=int)
+NOTIFICATION_DIGEST_THRESHOLD = config('NOTIFICATION_DIGEST_THRESHOLD', default=3, cast=int)
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_SEND_LEASE_SECONDS = config('NOTIFICATION_SEND_LEASE_SECONDS', default=600, cast=int)
+
+QR_CODE_BATCH_SIZE = config('QR_CODE_BATCH_SIZE', default=500, cast=int)
+MEDIA_PROCESSING_BATCH_SIZE = config('MEDIA_PROCESSING_BATCH_SIZE', default=20, cast=int)
+MEDIA_UPLOAD_URL_EXPIRY_SECONDS = config('MEDIA_UPLOAD_URL_EXPIRY_SECONDS', default=900, cast=int)
+MEDIA_UPLOAD_MAX_IMAGE_BYTES = config('MEDIA_UPLOAD_MAX_IMAGE_BYTES', default=15 * 1024 * 1024, cast=int)
+MEDIA_UPLOAD_MAX_VIDEO_BYTES = config('MEDIA_UPLOAD_MAX_VIDEO_BYTES', default=200 * 1024 * 1024, cast=int)
+# Resumable uploads are assembled here; it must be shared by every web server.
+MEDIA_UPLOAD_PARTIAL_ROOT = config('MEDIA_UPLOAD_PARTIAL_ROOT', default=str(BASE_DIR / 'upload_parts'))
+MEDIA_UPLOAD_STALE_AFTER_HOURS = config('MEDIA_UPLOAD_STALE_AFTER_HOURS', default=24, cast=int)
+
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/1')
+
+# Shared by every web and worker process. The test runner, and setups without
+# Redis (CACHE_BACKEND=locmem), get a per-process cache instead.
+if config('CACHE_BACKEND', default='redis') == 'locmem' or sys.argv[1:2] == ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'swachh-bandhu',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_REDIS_URL', default='redis://localhost:6379/2'),
+            'KEY_PREFIX': 'swachh',
+        }
+    }
+
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
@@ -161,8 +227,40 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'gamification.tasks.run_daily_lottery_draw',
         'schedule': timedelta(days=1),
     },
+    'open-due-lotteries': {
+        'task': 'gamification.tasks.open_due_lotteries',
+        'schedule': timedelta(hours=1),
+    },
     'check-subscription-status': {
         'task': 'subscriptions.tasks.check_municipal_subscriptions',
         'schedule': timedelta(hours=24),
     },
+    'flush-gamification-events': {
+        'task': 'gamification.tasks.process_gamification_events',
+        'schedule': timedelta(seconds=30),
+    },
+    'rebuild-leaderboard-index': {
+        'task': 'gamification.tasks.rebuild_leaderboard',
+        'schedule': timedelta(hours=6),
+    },
+    'backfill-badges': {
+        'task': 'gamification.tasks.backfill_badges',
+        'schedule': timedelta(days=1),
+    },
+    'dispatch-notifications': {
+        'task': 'notifications.tasks.dispatch_notifications',
+        'schedule': timedelta(minutes=5),
+    },
+    'reconcile-dashboard-rollups': {
+        'task': 'dashboard.tasks.reconcile_dashboard_rollups',
+        'schedule': timedelta(hours=24),
+    },
+    'purge-stale-uploads': {
+        'task': 'reports.tasks.purge_stale_uploads',
+        'schedule': timedelta(hours=1),
+    },
+    'recount-user-report-stats': {
+        'task': 'reports.tasks.recount_user_report_stats',
+        'schedule': timedelta(hours=24),
+    },
 }
\ No newline at end of file
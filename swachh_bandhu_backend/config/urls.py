@@ -17,6 +17,7 @@ urlpatterns = [
         path('', include('reports.urls')),
         path('gamification/', include('gamification.urls')),
         path('dashboard/', include('dashboard.urls')),
+        path('core/', include('core.urls')),
     ])),
 
     path('api/v1/schema/', SpectacularAPIView.as_view(), name='schema'),
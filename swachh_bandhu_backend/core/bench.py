@@ -0,0 +1,68 @@
+"""
+Shared scaffolding for the `bench_*` management commands.
+
+The database benchmarks build a synthetic city around Nagpur inside a
+transaction that is always rolled back, so they can run against a staging
+database without leaving rows behind. Latency benchmarks report p50/p99 and
+fail when p99 is over the command's target.
+"""
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from django.contrib.gis.geos import Point
+from django.core.management.base import CommandError
+from django.db import transaction
+from subscriptions.models import Municipality
+from users.models import User
+from locations.models import Location
+
+NAGPUR_CENTER = (79.0882, 21.1458)
+
+@contextmanager
+def rolled_back():
+    """A transaction that is rolled back however the block exits."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+def timed(func):
+    """Calls `func` and returns its result with the elapsed wall time in seconds."""
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+def synthetic_municipality():
+    return Municipality.objects.create(name=f'Benchmark {uuid.uuid4().hex[:8]}', city='Benchmark', state='Benchmark')
+
+def synthetic_users(count, **fields):
+    return User.objects.bulk_create([
+        User(email=f'bench-{uuid.uuid4().hex}@example.invalid', full_name=f'Benchmark Citizen {i}', **fields)
+        for i in range(count)
+    ], batch_size=10000)
+
+def random_point(rng, spread):
+    """A point within `spread` degrees of the city centre in each direction."""
+    center_lng, center_lat = NAGPUR_CENTER
+    return Point(center_lng + rng.uniform(-spread, spread), center_lat + rng.uniform(-spread, spread), srid=4326)
+
+def synthetic_locations(municipality, count, rng, spread):
+    return Location.objects.bulk_create([
+        Location(
+            name=f'Bin {i}', municipality=municipality, location_type=Location.LocationType.PUBLIC_BIN,
+            point=random_point(rng, spread)
+        ) for i in range(count)
+    ], batch_size=5000)
+
+def latency_percentiles(timings_ms):
+    """Returns (p50, p99) of the timings."""
+    timings = sorted(timings_ms)
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+def check_p99(stdout, results, target_ms):
+    """Writes p50/p99 for each named result and raises CommandError if any p99 is over the target."""
+    for name, (p50, p99) in results.items():
+        stdout.write(f'{name:>10}: p50 = {p50:.2f} ms, p99 = {p99:.2f} ms (target p99 <= {target_ms} ms)')
+    slow = [name for name, (_, p99) in results.items() if p99 > target_ms]
+    if slow:
+        raise CommandError(f'p99 latency exceeds the {target_ms} ms target for: {", ".join(slow)}.')
@@ -0,0 +1,58 @@
+"""
+Distance checks for geofencing.
+
+The haversine distance on a sphere differs from the WGS-84 geodesic by less than
+0.6%, so a point is only ambiguous when its haversine distance lies within that
+margin of the radius. Only those boundary cases pay for the exact (iterative)
+geodesic from geopy; everything else is decided by the closed-form fast path.
+"""
+import math
+from geopy.distance import geodesic
+
+EARTH_RADIUS_METERS = 6371008.8
+SPHERICAL_ERROR_RATIO = 0.006
+# Absolute slack for rounding on very small radii.
+MIN_MARGIN_METERS = 0.5
+
+def haversine_distance(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between two points given in degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+def _margin(radius_meters):
+    return max(radius_meters * SPHERICAL_ERROR_RATIO, MIN_MARGIN_METERS)
+
+def is_within_radius(lat1, lng1, lat2, lng2, radius_meters):
+    """True when the two points are no more than `radius_meters` apart on the WGS-84 ellipsoid."""
+    lat1, lng1, lat2, lng2 = float(lat1), float(lng1), float(lat2), float(lng2)
+    distance = haversine_distance(lat1, lng1, lat2, lng2)
+    margin = _margin(radius_meters)
+    if distance <= radius_meters - margin:
+        return True
+    if distance > radius_meters + margin:
+        return False
+    return geodesic((lat1, lng1), (lat2, lng2)).meters <= radius_meters
+
+def within_radius_batch(lats1, lngs1, lats2, lngs2, radii_meters):
+    """
+    Vectorized `is_within_radius` over arrays of point pairs, for bulk import and
+    offline audits. Returns a NumPy boolean array; `radii_meters` may be a scalar.
+    """
+    import numpy as np
+
+    lats1, lngs1, lats2, lngs2 = (np.asarray(values, dtype=np.float64) for values in (lats1, lngs1, lats2, lngs2))
+    radii = np.broadcast_to(np.asarray(radii_meters, dtype=np.float64), lats1.shape)
+
+    phi1, phi2 = np.radians(lats1), np.radians(lats2)
+    d_lambda = np.radians(lngs2 - lngs1)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    distances = 2 * EARTH_RADIUS_METERS * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+    margins = np.maximum(radii * SPHERICAL_ERROR_RATIO, MIN_MARGIN_METERS)
+    result = distances <= radii - margins
+    for i in np.flatnonzero(np.abs(distances - radii) <= margins):
+        result[i] = geodesic((lats1[i], lngs1[i]), (lats2[i], lngs2[i])).meters <= radii[i]
+    return result
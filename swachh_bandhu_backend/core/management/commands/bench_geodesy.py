@@ -0,0 +1,52 @@
+import math
+import random
+from django.core.management.base import BaseCommand, CommandError
+from geopy.distance import geodesic
+from core.bench import timed
+from core.geodesy import is_within_radius, within_radius_batch
+
+class Command(BaseCommand):
+    help = 'Compares geofence checks: geopy geodesic vs the haversine fast path vs the NumPy batch API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=100000)
+        parser.add_argument('--radius', type=float, default=50.0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _timed(self, label, count, func):
+        result, elapsed = timed(func)
+        self.stdout.write(f'{label:>18}: {elapsed:.3f}s ({count / elapsed:,.0f} checks/sec)')
+        return result
+
+    def handle(self, *args, **options):
+        import numpy as np
+
+        rng = random.Random(options['seed'])
+        radius = options['radius']
+        user_lats, user_lngs, loc_lats, loc_lngs = [], [], [], []
+        # Users scattered around each location out to twice the radius, so many sit near the boundary.
+        for _ in range(options['pairs']):
+            lat, lng = rng.uniform(8, 35), rng.uniform(68, 97)
+            bearing = rng.uniform(0, 2 * math.pi)
+            offset = rng.uniform(0, 2 * radius) / 111320
+            loc_lats.append(lat)
+            loc_lngs.append(lng)
+            user_lats.append(lat + offset * math.cos(bearing))
+            user_lngs.append(lng + offset * math.sin(bearing) / math.cos(math.radians(lat)))
+        pairs = list(zip(user_lats, user_lngs, loc_lats, loc_lngs))
+        count = len(pairs)
+
+        exact = self._timed('geopy geodesic', count, lambda: [
+            geodesic((a, b), (c, d)).meters <= radius for a, b, c, d in pairs
+        ])
+        fast = self._timed('fast path', count, lambda: [
+            is_within_radius(a, b, c, d, radius) for a, b, c, d in pairs
+        ])
+        batch = self._timed('numpy batch', count, lambda: within_radius_batch(
+            np.array(user_lats), np.array(user_lngs), np.array(loc_lats), np.array(loc_lngs), radius
+        ))
+
+        mismatches = sum(e != f for e, f in zip(exact, fast)) + int((np.array(exact) != batch).sum())
+        if mismatches:
+            raise CommandError(f'{mismatches} results disagree with geopy.')
+        self.stdout.write(self.style.SUCCESS('All fast-path and batch results match geopy.'))
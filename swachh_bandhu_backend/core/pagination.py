@@ -0,0 +1,141 @@
+"""
+Keyset (seek) pagination for the high-volume feeds.
+
+Pages are addressed by an opaque cursor holding the ordering values of the row at
+the page edge, so fetching any page is an index range scan of `page_size + 1`
+rows with no COUNT(*) and no OFFSET. Clients that need totals (admin tables) can
+opt into classic page-number pagination by passing `?page=`. Relevance-ranked
+search results have no stable keyset and are always paged by number.
+"""
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates on the view's `keyset_ordering`, a tuple of fields sorted in the same
+    direction whose last field is unique (e.g. ('-created_at', '-id')).
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    page_number_query_param = 'page'
+    search_query_param = 'search'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_paginator = None
+        params = request.query_params
+        if self.page_number_query_param in params or params.get(self.search_query_param, '').strip():
+            self.page_number_paginator = PageNumberPagination()
+            self.page_number_paginator.page_size_query_param = self.page_size_query_param
+            self.page_number_paginator.max_page_size = self.max_page_size
+            return self.page_number_paginator.paginate_queryset(queryset, request, view)
+
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering if not reverse else [self._flip(field) for field in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forwards=not reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        first, last = (rows[0], rows[-1]) if rows else (None, None)
+        if reverse:
+            self.next_values = self._values(last) if last is not None else values
+            self.previous_values = self._values(first) if has_more else None
+        else:
+            self.next_values = self._values(last) if has_more else None
+            self.previous_values = self._values(first) if values is not None and first is not None else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def _flip(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _values(self, obj):
+        return [str(getattr(obj, field)) for field in self.fields]
+
+    def _seek_filter(self, values, forwards):
+        # Rows strictly after `values` in the requested direction. The leading
+        # non-strict bound on the first field lets the planner seek on the index
+        # instead of filtering every row ahead of the cursor.
+        lookup = 'lt' if forwards == self.descending else 'gt'
+        seek = Q()
+        for i, field in enumerate(self.fields):
+            equal = dict(zip(self.fields[:i], values))
+            seek |= Q(**equal, **{f'{field}__{lookup}': values[i]})
+        return Q(**{f'{self.fields[0]}__{lookup}e': values[0]}) & seek
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values, reverse = payload['v'], bool(payload.get('r', False))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError('Cursor does not match the ordering.')
+            if not all(isinstance(value, str) for value in values):
+                raise ValueError('Cursor values must be strings.')
+            # Cursors come from the client: coerce them here, so a tampered value is a 404 rather than a 500.
+            values = [model._meta.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_number_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self.encode_cursor(self.next_values) if self.next_values is not None else None
+
+    def get_previous_link(self):
+        return self.encode_cursor(self.previous_values, reverse=True) if self.previous_values is not None else None
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
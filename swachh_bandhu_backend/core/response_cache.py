@@ -0,0 +1,149 @@
+"""
+Shared response cache for read-heavy endpoints.
+
+Entries are keyed by namespace (one per endpoint), municipality scope and the
+request URL, and every (namespace, scope) pair has a generation number in the
+key. Writers call `invalidate()` with the municipalities they touched, which
+bumps those generations (and the unscoped one) so that older entries are never
+read again and simply age out.
+
+Stampede protection: an entry is stored for longer than it is fresh. Once it
+goes stale, the first request to take the refresh lock recomputes it while the
+others keep serving the stale copy; on a cold miss the others wait briefly for
+that request instead of all hitting the database at once.
+
+Hits, stale hits and misses are counted per namespace in the cache itself, so the
+counters are shared by every process (see `get_metrics`).
+"""
+import hashlib
+import time
+import uuid
+from django.core.cache import cache
+from rest_framework.response import Response
+
+LOTTERIES = 'lotteries'
+ISSUE_CATEGORIES = 'issue-categories'
+LEADERBOARD = 'leaderboard'
+NAMESPACES = (LOTTERIES, ISSUE_CATEGORIES, LEADERBOARD)
+
+ALL_SCOPE = 'all'
+ENTRY_KEY = 'response:{}:{}:{}:{}'
+GENERATION_KEY = 'response:generation:{}:{}'
+LOCK_KEY = 'response:lock:{}'
+METRIC_KEY = 'response:metrics:{}:{}'
+METRICS = ('hit', 'stale', 'miss')
+
+STALE_GRACE_SECONDS = 300
+LOCK_TIMEOUT_SECONDS = 10
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+
+def _scope(municipality_id):
+    return str(municipality_id) if municipality_id else ALL_SCOPE
+
+def _generation(namespace, scope):
+    key = GENERATION_KEY.format(namespace, scope)
+    generation = cache.get(key)
+    if generation is None:
+        # Clock-seeded so that a generation lost to eviction never repeats an older one.
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key, 0)
+    return generation
+
+def _record(namespace, metric):
+    key = METRIC_KEY.format(namespace, metric)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+def cached_response_data(namespace, request, compute, timeout, municipality_id=None):
+    """
+    Returns `compute()` for this request, served from the cache while fresh.
+    `compute` must return picklable data, e.g. serializer `.data`.
+    """
+    scope = _scope(municipality_id)
+    url_hash = hashlib.sha1(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    key = ENTRY_KEY.format(namespace, scope, _generation(namespace, scope), url_hash)
+    lock_key = LOCK_KEY.format(key)
+
+    entry = cache.get(key)
+    if entry is not None:
+        data, fresh_until = entry
+        if time.time() < fresh_until:
+            _record(namespace, 'hit')
+            return data
+        if not cache.add(lock_key, True, LOCK_TIMEOUT_SECONDS):
+            # Another request is already refreshing this entry.
+            _record(namespace, 'stale')
+            return data
+    elif not cache.add(lock_key, True, LOCK_TIMEOUT_SECONDS):
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            entry = cache.get(key)
+            if entry is not None:
+                _record(namespace, 'hit')
+                return entry[0]
+        # The refreshing request is too slow; compute without the lock rather than fail.
+        _record(namespace, 'miss')
+        return compute()
+
+    _record(namespace, 'miss')
+    try:
+        data = compute()
+        cache.set(key, (data, time.time() + timeout), timeout + STALE_GRACE_SECONDS)
+    finally:
+        cache.delete(lock_key)
+    return data
+
+def invalidate(namespace, *municipality_ids):
+    """Expires the namespace's entries for the given municipalities and for the unscoped lists."""
+    scopes = {ALL_SCOPE} | {_scope(municipality_id) for municipality_id in municipality_ids if municipality_id}
+    for scope in scopes:
+        key = GENERATION_KEY.format(namespace, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+def get_metrics():
+    """Hit, stale-hit and miss counts plus the hit ratio per namespace."""
+    metrics = {}
+    for namespace in NAMESPACES:
+        counts = cache.get_many([METRIC_KEY.format(namespace, metric) for metric in METRICS])
+        row = {metric: counts.get(METRIC_KEY.format(namespace, metric), 0) for metric in METRICS}
+        served = row['hit'] + row['stale']
+        total = served + row['miss']
+        row['hit_ratio'] = round(served / total, 4) if total else None
+        metrics[namespace] = row
+    return metrics
+
+def reset_metrics():
+    cache.delete_many([METRIC_KEY.format(namespace, metric) for namespace in NAMESPACES for metric in METRICS])
+
+
+class CachedListMixin:
+    """
+    Serves a viewset's `list` from the response cache. Views set `cache_namespace`
+    and `cache_timeout`; `?municipality=` selects the invalidation scope.
+    """
+    cache_namespace = None
+    cache_timeout = 60
+
+    def get_cache_municipality_id(self):
+        try:
+            return uuid.UUID(self.request.query_params.get('municipality', ''))
+        except ValueError:
+            return None
+
+    def list_data(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs).data
+
+    def list(self, request, *args, **kwargs):
+        data = cached_response_data(
+            self.cache_namespace, request, lambda: self.list_data(request, *args, **kwargs),
+            self.cache_timeout, municipality_id=self.get_cache_municipality_id()
+        )
+        return Response(data)
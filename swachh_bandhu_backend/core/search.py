@@ -0,0 +1,46 @@
+"""
+Ranked full-text search over a model's stored `SearchVectorField`.
+
+`?search=` is parsed with websearch syntax ("quoted phrases", -exclusions, or)
+and matched against the precomputed, GIN-indexed search vector. Fields listed in
+the view's `search_trigram_fields` additionally match on trigram similarity, so a
+misspelt name ("publik bin") still finds its row. List results are ordered by
+relevance unless the client asks for an explicit `?ordering=`.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Views set `search_vector_field` (default 'search_vector') and optionally
+    `search_trigram_fields`, each of which should have a `gin_trgm_ops` index.
+    """
+    search_param = 'search'
+    search_config = 'english'
+    ordering_param = 'ordering'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+
+        vector_field = getattr(view, 'search_vector_field', 'search_vector')
+        trigram_fields = getattr(view, 'search_trigram_fields', ())
+        query = SearchQuery(term, search_type='websearch', config=self.search_config)
+
+        condition = Q(**{vector_field: query})
+        for field in trigram_fields:
+            condition |= Q(**{f'{field}__trigram_similar': term})
+        queryset = queryset.filter(condition)
+
+        # Only list responses are ranked; aggregates (clusters) and exports keep their own ordering.
+        if getattr(view, 'action', 'list') != 'list' or request.query_params.get(self.ordering_param):
+            return queryset
+        rank = SearchRank(F(vector_field), query)
+        for field in trigram_fields:
+            rank = rank + TrigramSimilarity(field, term)
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', 'pk')
@@ -0,0 +1,81 @@
+"""
+Direct-to-storage uploads.
+
+With object storage configured (AWS_STORAGE_BUCKET_NAME), clients PUT files
+straight to the bucket with a presigned URL. The signature covers the object key
+and the Content-Type, so the client cannot upload to another key or under
+another type, and its Content-Length, so S3 rejects a body of any other size.
+Without a bucket, the same protocol is served by a local stand-in: a PUT
+endpoint whose URL carries a signed, expiring token for the key, the content
+type and the size. Either way, callers only deal with object keys in the
+default storage.
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+LOCAL_UPLOAD_SALT = 'core.storage.local-upload'
+
+def uses_object_storage():
+    return bool(getattr(settings, 'AWS_STORAGE_BUCKET_NAME', ''))
+
+def _s3_client():
+    # The boto3 client of django-storages' S3Storage, already configured for the bucket and endpoint.
+    return default_storage.connection.meta.client
+
+def presigned_put_url(request, key, content_type, size_bytes, expires_in):
+    """A URL the client can PUT `size_bytes` bytes to, with `Content-Type: content_type`, within `expires_in` seconds."""
+    if uses_object_storage():
+        return _s3_client().generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key,
+                'ContentType': content_type, 'ContentLength': size_bytes,
+            },
+            ExpiresIn=expires_in,
+        )
+    token = signing.dumps({'key': key, 'content_type': content_type, 'size_bytes': size_bytes}, salt=LOCAL_UPLOAD_SALT)
+    return request.build_absolute_uri(reverse('local-upload', args=[token]))
+
+def load_local_upload_token(token, max_age):
+    """The signed payload of a stand-in upload URL; raises signing.BadSignature if invalid or expired."""
+    return signing.loads(token, salt=LOCAL_UPLOAD_SALT, max_age=max_age)
+
+def stat_object(key):
+    """Returns (size in bytes, content type or None) of a stored object, or None if it does not exist."""
+    if uses_object_storage():
+        client = _s3_client()
+        try:
+            head = client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+        except client.exceptions.ClientError:
+            return None
+        return head['ContentLength'], head.get('ContentType', '')
+    if not default_storage.exists(key):
+        return None
+    # The stand-in enforces the signed Content-Type on upload but does not store it.
+    return default_storage.size(key), None
+
+def read_object_prefix(key, length):
+    """The first `length` bytes of a stored object, without downloading the rest."""
+    if uses_object_storage():
+        response = _s3_client().get_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Range=f'bytes=0-{length - 1}'
+        )
+        return response['Body'].read()
+    with default_storage.open(key, 'rb') as handle:
+        return handle.read(length)
+
+def copy_object(source_key, target_key):
+    """Copies a stored object to another key, server-side when object storage is configured."""
+    if uses_object_storage():
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        _s3_client().copy_object(Bucket=bucket, Key=target_key, CopySource={'Bucket': bucket, 'Key': source_key})
+        return
+    default_storage.delete(target_key)
+    with default_storage.open(source_key, 'rb') as handle:
+        saved_name = default_storage.save(target_key, File(handle))
+    if saved_name != target_key:
+        default_storage.delete(saved_name)
+        raise FileExistsError(f"Could not store the copy under {target_key}.")
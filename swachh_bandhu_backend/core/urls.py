@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import CacheMetricsView
+
+urlpatterns = [
+    path('cache/metrics/', CacheMetricsView.as_view(), name='cache-metrics'),
+]
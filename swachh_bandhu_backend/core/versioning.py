@@ -0,0 +1,32 @@
+"""
+Per-municipality data versions.
+
+A monotonically increasing number stored in the shared cache and bumped whenever
+a municipality's reports or locations change. Caches and ETags that include it
+become stale the moment the data does, without having to enumerate their keys.
+"""
+import time
+from django.core.cache import cache
+
+DATA_VERSION_KEY = 'municipality:data-version:{}'
+
+def _initial_version():
+    # Seeded from the clock so that a version lost to eviction never repeats an older one.
+    return int(time.time() * 1000)
+
+def get_municipality_data_version(municipality_id):
+    key = DATA_VERSION_KEY.format(municipality_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key, _initial_version())
+    return version
+
+def bump_municipality_data_version(municipality_id):
+    key = DATA_VERSION_KEY.format(municipality_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
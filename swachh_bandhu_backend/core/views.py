@@ -1,3 +1,16 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .permissions import IsSuperAdmin
+from . import response_cache
 
-# Create your views here.
+class CacheMetricsView(APIView):
+    """Hit/miss counters of the response cache per endpoint; DELETE resets them."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response(response_cache.get_metrics())
+
+    def delete(self, request, *args, **kwargs):
+        response_cache.reset_metrics()
+        return Response(status=status.HTTP_204_NO_CONTENT)
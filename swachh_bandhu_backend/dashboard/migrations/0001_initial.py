@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('reports', '0004_alter_report_points_awarded_alter_report_status_and_more'),
+        ('subscriptions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MunicipalCitizenActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_reported_at', models.DateTimeField()),
+                ('municipality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citizen_activity', to='subscriptions.municipality')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='municipal_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Municipal Citizen Activity',
+                'indexes': [models.Index(fields=['municipality', 'last_reported_at'], name='dashboard_m_municip_4e1a6f_idx')],
+                'unique_together': {('municipality', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='The day the reports were created.')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending Verification'), ('VERIFIED', 'Verified & Awaiting Action'), ('REJECTED', 'Rejected'), ('IN_PROGRESS', 'Action In Progress'), ('ACTIONED', 'Action Taken')], max_length=20)),
+                ('severity', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')], max_length=10)),
+                ('report_count', models.IntegerField(default=0)),
+                ('issue_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reports.issuecategory')),
+                ('municipality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_daily_stats', to='subscriptions.municipality')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['municipality', 'date'], name='dashboard_r_municip_3eb341_idx')],
+                'unique_together': {('municipality', 'date', 'issue_category', 'status', 'severity')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportResolutionDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='The day the reports were actioned.')),
+                ('actioned_count', models.IntegerField(default=0)),
+                ('total_resolution_seconds', models.FloatField(default=0)),
+                ('municipality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resolution_daily_stats', to='subscriptions.municipality')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('municipality', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('reports', '0006_search_vector'),
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportHourlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour the reports were created in.')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending Verification'), ('VERIFIED', 'Verified & Awaiting Action'), ('REJECTED', 'Rejected'), ('IN_PROGRESS', 'Action In Progress'), ('ACTIONED', 'Action Taken')], max_length=20)),
+                ('report_count', models.IntegerField(default=0)),
+                ('issue_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='reports.issuecategory')),
+                ('municipality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_hourly_stats', to='subscriptions.municipality')),
+            ],
+            options={
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['municipality', 'hour'], name='dashboard_r_municip_2855e0_idx')],
+                'unique_together': {('municipality', 'hour', 'issue_category', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from subscriptions.models import Municipality
+from reports.models import Report, IssueCategory
+
+class ReportDailyStat(models.Model):
+    """
+    Rollup of report counts per municipality and creation day, split by the
+    report's current status, category and severity. Maintained incrementally
+    by dashboard.services and rebuilt nightly by the reconciliation task.
+    """
+    municipality = models.ForeignKey(Municipality, on_delete=models.CASCADE, related_name='report_daily_stats')
+    date = models.DateField(help_text=_("The day the reports were created."))
+    issue_category = models.ForeignKey(IssueCategory, on_delete=models.CASCADE, related_name='daily_stats')
+    status = models.CharField(max_length=20, choices=Report.ReportStatus.choices)
+    severity = models.CharField(max_length=10, choices=Report.SeverityLevel.choices)
+    report_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('municipality', 'date', 'issue_category', 'status', 'severity')
+        indexes = [models.Index(fields=['municipality', 'date'])]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.municipality_id} {self.date} {self.status}: {self.report_count}"
+
+class ReportHourlyStat(models.Model):
+    """
+    Report counts per municipality and creation hour, split by the report's
+    current status and category. Backs hourly trend series, which the daily
+    rollup is too coarse for; maintained alongside ReportDailyStat.
+    """
+    municipality = models.ForeignKey(Municipality, on_delete=models.CASCADE, related_name='report_hourly_stats')
+    hour = models.DateTimeField(help_text=_("Start of the hour the reports were created in."))
+    issue_category = models.ForeignKey(IssueCategory, on_delete=models.CASCADE, related_name='hourly_stats')
+    status = models.CharField(max_length=20, choices=Report.ReportStatus.choices)
+    report_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('municipality', 'hour', 'issue_category', 'status')
+        indexes = [models.Index(fields=['municipality', 'hour'])]
+        ordering = ['-hour']
+
+    def __str__(self):
+        return f"{self.municipality_id} {self.hour:%Y-%m-%d %H:00} {self.status}: {self.report_count}"
+
+class ReportResolutionDailyStat(models.Model):
+    """Number of reports actioned per municipality and day, with their summed resolution time."""
+    municipality = models.ForeignKey(Municipality, on_delete=models.CASCADE, related_name='resolution_daily_stats')
+    date = models.DateField(help_text=_("The day the reports were actioned."))
+    actioned_count = models.IntegerField(default=0)
+    total_resolution_seconds = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('municipality', 'date')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.municipality_id} {self.date}: {self.actioned_count} actioned"
+
+class MunicipalCitizenActivity(models.Model):
+    """The last time each citizen filed a report in a municipality, used for the active-citizens KPI."""
+    municipality = models.ForeignKey(Municipality, on_delete=models.CASCADE, related_name='citizen_activity')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='municipal_activity')
+    last_reported_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('municipality', 'user')
+        indexes = [models.Index(fields=['municipality', 'last_reported_at'])]
+        verbose_name_plural = "Municipal Citizen Activity"
+
+    def __str__(self):
+        return f"{self.user_id} in {self.municipality_id} at {self.last_reported_at}"
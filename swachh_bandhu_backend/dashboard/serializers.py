@@ -32,6 +32,14 @@ class TimeSeriesDataPointSerializer(serializers.Serializer):
     date = serializers.DateField()
     count = serializers.IntegerField()
 
+class ReportTrendPointSerializer(serializers.Serializer):
+    # A date for day/week/month buckets, a datetime for hourly ones.
+    bucket = serializers.SerializerMethodField()
+    count = serializers.IntegerField()
+
+    def get_bucket(self, obj):
+        return obj['bucket'].isoformat()
+
 class IssueCategoryBreakdownSerializer(serializers.Serializer):
     # Renamed from IssueType for clarity and consistency
     category_name = serializers.CharField(source='issue_category__name')
@@ -0,0 +1,145 @@
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Max, F, ExpressionWrapper, fields
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+from reports.models import Report
+from users.models import UserRole
+from core.versioning import bump_municipality_data_version
+from .models import ReportDailyStat, ReportHourlyStat, ReportResolutionDailyStat, MunicipalCitizenActivity
+
+def _upsert_stat(model, keys, deltas):
+    """
+    Adds `deltas` to the rollup row identified by `keys` in a single statement. A
+    get_or_create followed by an update would lose the increment if a concurrent
+    rebuild deleted the row in between; ON CONFLICT waits for the rebuild and adds
+    to the row it wrote. Negative deltas only take back a count that was added
+    before, so they update the existing row and never insert one.
+    """
+    if any(delta < 0 for delta in deltas.values()):
+        model.objects.filter(**keys).update(**{field: F(field) + delta for field, delta in deltas.items()})
+        return
+    quote = connection.ops.quote_name
+    key_columns = [quote(model._meta.get_field(field).column) for field in keys]
+    delta_columns = [quote(model._meta.get_field(field).column) for field in deltas]
+    table = quote(model._meta.db_table)
+    updates = ', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in delta_columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(key_columns + delta_columns)}) "
+            f"VALUES ({', '.join(['%s'] * (len(keys) + len(deltas)))}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}",
+            [*keys.values(), *deltas.values()]
+        )
+
+def _bump_report_stat(municipality_id, date, issue_category_id, status, severity, delta):
+    _upsert_stat(ReportDailyStat, {
+        'municipality_id': municipality_id, 'date': date, 'issue_category_id': issue_category_id,
+        'status': status, 'severity': severity,
+    }, {'report_count': delta})
+
+def _bump_hourly_stat(municipality_id, created_at, issue_category_id, status, delta):
+    hour = timezone.localtime(created_at).replace(minute=0, second=0, microsecond=0)
+    _upsert_stat(ReportHourlyStat, {
+        'municipality_id': municipality_id, 'hour': hour, 'issue_category_id': issue_category_id, 'status': status,
+    }, {'report_count': delta})
+
+def _bump_resolution_stat(municipality_id, date, count_delta, seconds_delta):
+    _upsert_stat(ReportResolutionDailyStat, {'municipality_id': municipality_id, 'date': date}, {
+        'actioned_count': count_delta, 'total_resolution_seconds': seconds_delta,
+    })
+
+def record_report_created(report):
+    """Adds a newly created report to its municipality's rollups."""
+    municipality_id = report.location.municipality_id
+    _bump_report_stat(
+        municipality_id, timezone.localdate(report.created_at), report.issue_category_id,
+        report.status, report.severity, 1
+    )
+    _bump_hourly_stat(municipality_id, report.created_at, report.issue_category_id, report.status, 1)
+    transaction.on_commit(lambda: bump_municipality_data_version(municipality_id))
+    if report.user and report.user.role == UserRole.CITIZEN:
+        MunicipalCitizenActivity.objects.update_or_create(
+            municipality_id=municipality_id, user=report.user,
+            defaults={'last_reported_at': report.created_at}
+        )
+
+def record_report_deleted(report):
+    """Takes a deleted report back out of every rollup it was counted in."""
+    municipality_id = report.location.municipality_id
+    _bump_report_stat(
+        municipality_id, timezone.localdate(report.created_at), report.issue_category_id,
+        report.status, report.severity, -1
+    )
+    _bump_hourly_stat(municipality_id, report.created_at, report.issue_category_id, report.status, -1)
+    if report.status == Report.ReportStatus.ACTIONED:
+        duration = (report.updated_at - report.created_at).total_seconds()
+        _bump_resolution_stat(municipality_id, timezone.localdate(report.updated_at), -1, -duration)
+    transaction.on_commit(lambda: bump_municipality_data_version(municipality_id))
+
+def record_report_status_change(report, old_status, previous_updated_at=None):
+    """
+    Moves a report between status buckets after moderation. `previous_updated_at`
+    is the report's `updated_at` before the change; it is needed to take a
+    report back out of the resolution bucket it was counted in.
+    """
+    new_status = report.status
+    if old_status == new_status:
+        return
+    municipality_id = report.location.municipality_id
+    created_date = timezone.localdate(report.created_at)
+    with transaction.atomic():
+        _bump_report_stat(municipality_id, created_date, report.issue_category_id, old_status, report.severity, -1)
+        _bump_report_stat(municipality_id, created_date, report.issue_category_id, new_status, report.severity, 1)
+        _bump_hourly_stat(municipality_id, report.created_at, report.issue_category_id, old_status, -1)
+        _bump_hourly_stat(municipality_id, report.created_at, report.issue_category_id, new_status, 1)
+
+        if new_status == Report.ReportStatus.ACTIONED:
+            duration = (report.updated_at - report.created_at).total_seconds()
+            _bump_resolution_stat(municipality_id, timezone.localdate(report.updated_at), 1, duration)
+        elif old_status == Report.ReportStatus.ACTIONED and previous_updated_at:
+            duration = (previous_updated_at - report.created_at).total_seconds()
+            _bump_resolution_stat(municipality_id, timezone.localdate(previous_updated_at), -1, -duration)
+        transaction.on_commit(lambda: bump_municipality_data_version(municipality_id))
+
+@transaction.atomic
+def rebuild_municipal_rollups(municipality):
+    """Recomputes every rollup for a municipality from the Report table, repairing any drift."""
+    reports_qs = Report.objects.filter(location__municipality=municipality)
+
+    ReportDailyStat.objects.filter(municipality=municipality).delete()
+    daily_counts = reports_qs.annotate(date=TruncDate('created_at')).values(
+        'date', 'issue_category_id', 'status', 'severity'
+    ).annotate(report_count=Count('id')).order_by()
+    ReportDailyStat.objects.bulk_create([
+        ReportDailyStat(municipality=municipality, **row) for row in daily_counts
+    ], batch_size=1000)
+
+    ReportHourlyStat.objects.filter(municipality=municipality).delete()
+    hourly_counts = reports_qs.annotate(hour=TruncHour('created_at')).values(
+        'hour', 'issue_category_id', 'status'
+    ).annotate(report_count=Count('id')).order_by()
+    ReportHourlyStat.objects.bulk_create([
+        ReportHourlyStat(municipality=municipality, **row) for row in hourly_counts
+    ], batch_size=1000)
+
+    ReportResolutionDailyStat.objects.filter(municipality=municipality).delete()
+    resolutions = reports_qs.filter(status=Report.ReportStatus.ACTIONED).annotate(
+        date=TruncDate('updated_at'),
+        resolution_duration=ExpressionWrapper(F('updated_at') - F('created_at'), output_field=fields.DurationField())
+    ).values('date').annotate(
+        actioned_count=Count('id'), total_resolution=Sum('resolution_duration')
+    ).order_by()
+    ReportResolutionDailyStat.objects.bulk_create([
+        ReportResolutionDailyStat(
+            municipality=municipality, date=row['date'], actioned_count=row['actioned_count'],
+            total_resolution_seconds=row['total_resolution'].total_seconds() if row['total_resolution'] else 0
+        ) for row in resolutions
+    ], batch_size=1000)
+
+    MunicipalCitizenActivity.objects.filter(municipality=municipality).delete()
+    activity = reports_qs.filter(user__role=UserRole.CITIZEN).values('user_id').annotate(
+        last_reported_at=Max('created_at')
+    ).order_by()
+    MunicipalCitizenActivity.objects.bulk_create([
+        MunicipalCitizenActivity(municipality=municipality, **row) for row in activity
+    ], batch_size=1000)
@@ -0,0 +1,12 @@
+from celery import shared_task
+from subscriptions.models import Municipality
+from .services import rebuild_municipal_rollups
+
+@shared_task
+def reconcile_dashboard_rollups():
+    municipalities = Municipality.objects.filter(is_active=True)
+    count = 0
+    for municipality in municipalities:
+        rebuild_municipal_rollups(municipality)
+        count += 1
+    return f"Reconciled dashboard rollups for {count} municipalities."
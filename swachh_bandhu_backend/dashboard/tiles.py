@@ -0,0 +1,73 @@
+"""
+Mapbox Vector Tiles for the municipal report heatmap.
+
+Each tile is built in a single PostGIS query with ST_AsMVT. From CLUSTER_MAX_ZOOM
+up there is one feature per location with its report count; below that,
+locations are snapped to a grid of GRID_CELLS x GRID_CELLS cells per tile and
+aggregated, so a tile's size is bounded by the grid rather than by the data.
+"""
+from django.db import connection
+
+LAYER_NAME = 'reports'
+CLUSTER_MAX_ZOOM = 14
+MAX_ZOOM = 22
+GRID_CELLS = 64
+# Width of the Web Mercator world in meters.
+WORLD_WIDTH_METERS = 40075016.68557849
+
+_TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom_3857,
+           ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), 4326) AS geom_4326
+),
+located AS (
+    SELECT location.id AS location_id,
+           ST_Transform(location.point, 3857) AS geom,
+           COUNT(report.id) AS report_count
+    FROM locations_location AS location
+    JOIN reports_report AS report ON report.location_id = location.id
+    CROSS JOIN bounds
+    WHERE location.municipality_id = %(municipality_id)s
+      AND location.point && bounds.geom_4326
+    GROUP BY location.id
+),
+features AS (
+    {features}
+)
+SELECT ST_AsMVT(features.*, %(layer)s, 4096, 'geom') FROM features
+"""
+
+_POINT_FEATURES = """
+    SELECT ST_AsMVTGeom(located.geom, bounds.geom_3857) AS geom,
+           located.location_id::text AS location_id,
+           located.report_count AS intensity,
+           1 AS location_count
+    FROM located CROSS JOIN bounds
+"""
+
+_CLUSTER_FEATURES = """
+    SELECT ST_AsMVTGeom(ST_Centroid(ST_Collect(located.geom)), bounds.geom_3857) AS geom,
+           NULL::text AS location_id,
+           SUM(located.report_count)::integer AS intensity,
+           COUNT(*)::integer AS location_count
+    FROM located CROSS JOIN bounds
+    GROUP BY ST_SnapToGrid(located.geom, %(cell_size)s), bounds.geom_3857
+"""
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+def render_report_tile(municipality_id, z, x, y):
+    """Returns the MVT bytes for one tile of the municipality's report heatmap."""
+    clustered = z < CLUSTER_MAX_ZOOM
+    params = {
+        'z': z, 'x': x, 'y': y,
+        'municipality_id': str(municipality_id),
+        'layer': LAYER_NAME,
+        'cell_size': WORLD_WIDTH_METERS / (2 ** z) / GRID_CELLS,
+    }
+    sql = _TILE_SQL.format(features=_CLUSTER_FEATURES if clustered else _POINT_FEATURES)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b''
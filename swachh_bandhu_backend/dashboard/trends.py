@@ -0,0 +1,119 @@
+"""
+Report-count time series from the rollup tables.
+
+Hourly series are read from ReportHourlyStat, and daily, weekly and monthly ones
+from ReportDailyStat, grouped into buckets by the database. Either way the query
+returns at most one row per bucket, and the series is then zero-filled in Python.
+The cost depends on the number of buckets, not on the number of reports.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from django.db.models import DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from .models import ReportDailyStat, ReportHourlyStat
+
+GRANULARITY_HOUR = 'hour'
+GRANULARITY_DAY = 'day'
+GRANULARITY_WEEK = 'week'
+GRANULARITY_MONTH = 'month'
+GRANULARITIES = (GRANULARITY_HOUR, GRANULARITY_DAY, GRANULARITY_WEEK, GRANULARITY_MONTH)
+MAX_BUCKETS = 1000
+DEFAULT_BUCKETS = 30
+
+def bucket_start(value, granularity):
+    """The bucket containing `value`: an aware UTC datetime for hours, a date otherwise."""
+    if granularity == GRANULARITY_HOUR:
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        hour = timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+        return hour.astimezone(dt_timezone.utc)
+    if isinstance(value, datetime):
+        value = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    if granularity == GRANULARITY_WEEK:
+        return value - timedelta(days=value.weekday())
+    if granularity == GRANULARITY_MONTH:
+        return value.replace(day=1)
+    return value
+
+def _next_bucket(bucket, granularity):
+    if granularity == GRANULARITY_HOUR:
+        return bucket + timedelta(hours=1)
+    if granularity == GRANULARITY_DAY:
+        return bucket + timedelta(days=1)
+    if granularity == GRANULARITY_WEEK:
+        return bucket + timedelta(days=7)
+    return date(bucket.year + bucket.month // 12, bucket.month % 12 + 1, 1)
+
+def _previous_bucket(bucket, granularity):
+    if granularity == GRANULARITY_HOUR:
+        return bucket - timedelta(hours=1)
+    if granularity == GRANULARITY_DAY:
+        return bucket - timedelta(days=1)
+    if granularity == GRANULARITY_WEEK:
+        return bucket - timedelta(days=7)
+    return date(bucket.year - (bucket.month == 1), (bucket.month - 2) % 12 + 1, 1)
+
+def default_start(end, granularity, buckets=DEFAULT_BUCKETS):
+    """The start of a range of `buckets` buckets ending with the one containing `end`."""
+    start = bucket_start(end, granularity)
+    for _ in range(buckets - 1):
+        start = _previous_bucket(start, granularity)
+    return start
+
+def iter_buckets(start, end, granularity):
+    """Yields every bucket from the one containing `start` to the one containing `end`."""
+    bucket, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    while bucket <= last:
+        yield bucket
+        bucket = _next_bucket(bucket, granularity)
+
+def count_buckets(start, end, granularity):
+    """Number of buckets in the range, computed without walking it."""
+    first, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    if last < first:
+        return 0
+    if granularity == GRANULARITY_HOUR:
+        return int((last - first).total_seconds() // 3600) + 1
+    if granularity == GRANULARITY_DAY:
+        return (last - first).days + 1
+    if granularity == GRANULARITY_WEEK:
+        return (last - first).days // 7 + 1
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+def _bucket_counts(municipality_id, first, last, granularity, filters):
+    if granularity == GRANULARITY_HOUR:
+        rows = ReportHourlyStat.objects.filter(
+            municipality_id=municipality_id, hour__gte=first, hour__lt=last + timedelta(hours=1), **filters
+        ).values(bucket=F('hour'))
+    else:
+        rows = ReportDailyStat.objects.filter(
+            municipality_id=municipality_id, date__gte=first, date__lt=_next_bucket(last, granularity), **filters
+        )
+        if granularity == GRANULARITY_DAY:
+            rows = rows.values(bucket=F('date'))
+        else:
+            rows = rows.annotate(bucket=Trunc('date', granularity, output_field=DateField())).values('bucket')
+    rows = rows.annotate(count=Sum('report_count')).order_by()
+    return {bucket_start(row['bucket'], granularity): row['count'] for row in rows}
+
+def report_count_series(municipality_id, start, end, granularity=GRANULARITY_DAY, issue_category_id=None, status=None):
+    """
+    Dense series of {'bucket', 'count'} for reports created between `start` and
+    `end` (both inclusive), optionally narrowed to one category and/or current
+    status. Buckets with no reports have a count of 0.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if count_buckets(start, end, granularity) == 0:
+        return []
+
+    filters = {}
+    if issue_category_id:
+        filters['issue_category_id'] = issue_category_id
+    if status:
+        filters['status'] = status
+    first, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    counts = _bucket_counts(municipality_id, first, last, granularity, filters)
+    return [{'bucket': bucket, 'count': counts.get(bucket, 0)} for bucket in iter_buckets(start, end, granularity)]
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import MunicipalDashboardAPIView, CitizenDashboardAPIView
+from .views import MunicipalDashboardAPIView, CitizenDashboardAPIView, MunicipalHeatmapTileView, ReportTrendsAPIView
 
 urlpatterns = [
     # URL for Municipal Admins
     path('summary/municipal/', MunicipalDashboardAPIView.as_view(), name='municipal-dashboard-summary'),
+    path('trends/reports/', ReportTrendsAPIView.as_view(), name='municipal-report-trends'),
+    path('heatmap/tiles/<int:z>/<int:x>/<int:y>.mvt', MunicipalHeatmapTileView.as_view(), name='municipal-heatmap-tile'),
     
     # NEW URL for Citizens
     path('summary/citizen/', CitizenDashboardAPIView.as_view(), name='citizen-dashboard-summary'),
@@ -1,19 +1,33 @@
+import hashlib
+import uuid
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.db import models
-from django.db.models import Count, Avg, F, Q, Window, ExpressionWrapper, fields
-from django.db.models.functions import TruncDate, Rank
+from django.db.models import Count, Sum, F, Q, Case, When, ExpressionWrapper, fields
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from datetime import timedelta
 from reports.models import Report, IssueCategory
 from users.models import User
 from locations.models import Location
+from locations.geo import PointX, PointY
 from gamification.models import PointLog, UserBadge, Badge
+from gamification import leaderboard
+from core.versioning import get_municipality_data_version
+from . import tiles, trends
 from core.permissions import IsMunicipalAdmin, IsCitizen
+from .models import ReportDailyStat, ReportResolutionDailyStat, MunicipalCitizenActivity
 from .serializers import (
     MunicipalDashboardKPISerializer, ReportHeatmapSerializer, TimeSeriesDataPointSerializer,
     IssueCategoryBreakdownSerializer, SeverityBreakdownSerializer, TopContributorSerializer,
-    CitizenDashboardStatsSerializer, RecentActivitySerializer, NextBadgeProgressSerializer
+    ReportTrendPointSerializer, CitizenDashboardStatsSerializer, RecentActivitySerializer, NextBadgeProgressSerializer
 )
 
 def get_percentage_change(current, previous):
@@ -41,60 +55,59 @@ class MunicipalDashboardAPIView(APIView):
         thirty_days_ago = timezone.now() - timedelta(days=30)
 
         # --- Data Fetching via Helper Methods ---
-        kpi_data = self._get_kpi_stats(reports_qs, municipality, thirty_days_ago)
-        heatmap_data = self._get_heatmap_data(reports_qs)
-        report_trends_data = self._get_report_trends(reports_qs, thirty_days_ago)
-        issue_breakdown_data = self._get_issue_category_breakdown(reports_qs, kpi_data['total_reports'])
-        severity_breakdown_data = self._get_severity_breakdown(reports_qs, kpi_data['total_reports'])
+        kpi_data = self._get_kpi_stats(municipality, thirty_days_ago)
+        report_trends_data = self._get_report_trends(municipality, thirty_days_ago)
+        issue_breakdown_data = self._get_issue_category_breakdown(municipality, kpi_data['total_reports'])
+        severity_breakdown_data = self._get_severity_breakdown(municipality, kpi_data['total_reports'])
         top_contributors_data = self._get_top_contributors(municipality)
 
         # --- Serialization ---
         kpi_serializer = MunicipalDashboardKPISerializer(instance=kpi_data)
-        heatmap_serializer = ReportHeatmapSerializer(instance=heatmap_data, many=True)
         trends_serializer = TimeSeriesDataPointSerializer(instance=report_trends_data, many=True)
         issue_breakdown_serializer = IssueCategoryBreakdownSerializer(instance=issue_breakdown_data, many=True)
         severity_serializer = SeverityBreakdownSerializer(instance=severity_breakdown_data, many=True)
         contributors_serializer = TopContributorSerializer(instance=top_contributors_data, many=True)
         
-        return Response({
+        data = {
             "kpis": kpi_serializer.data,
-            "heatmap": heatmap_serializer.data,
             "report_trends_30_days": trends_serializer.data,
             "issue_category_breakdown": issue_breakdown_serializer.data,
             "severity_breakdown": severity_serializer.data, # NEW WIDGET
             "top_contributors": contributors_serializer.data
-        })
-
-    def _get_kpi_stats(self, reports_qs, municipality, thirty_days_ago):
-        """Calculates all key performance indicators in a single efficient query."""
-        sixty_days_ago = timezone.now() - timedelta(days=60)
-        
-        # Annotate once for resolution time calculation
-        reports_with_duration = reports_qs.annotate(
-            resolution_duration=ExpressionWrapper(
-                F('updated_at') - F('created_at'), output_field=fields.DurationField()
-            )
-        )
+        }
+        # The per-location list grows with the municipality; the map reads the vector
+        # tiles instead, so the list is only built for clients that still ask for it.
+        if request.query_params.get('include_heatmap', 'false').lower() == 'true':
+            data["heatmap"] = ReportHeatmapSerializer(instance=self._get_heatmap_data(reports_qs), many=True).data
+        return Response(data)
+
+    def _get_kpi_stats(self, municipality, thirty_days_ago):
+        """Calculates the key performance indicators from the per-day rollup tables."""
+        thirty_days_ago_date = thirty_days_ago.date()
+        sixty_days_ago_date = (timezone.now() - timedelta(days=60)).date()
+
+        # Single aggregation over the daily rollups, O(days) rather than O(reports)
+        kpis = ReportDailyStat.objects.filter(municipality=municipality).aggregate(
+            total_reports=Coalesce(Sum('report_count'), 0),
+            pending_reports=Coalesce(Sum('report_count', filter=Q(status=Report.ReportStatus.PENDING)), 0),
+            verified_reports=Coalesce(Sum('report_count', filter=Q(status=Report.ReportStatus.VERIFIED)), 0),
+            actioned_reports=Coalesce(Sum('report_count', filter=Q(status=Report.ReportStatus.ACTIONED)), 0),
+            rejected_reports=Coalesce(Sum('report_count', filter=Q(status=Report.ReportStatus.REJECTED)), 0),
 
-        # Single aggregation call for most stats
-        kpis = reports_with_duration.aggregate(
-            total_reports=Count('id'),
-            pending_reports=Count('id', filter=Q(status=Report.ReportStatus.PENDING)),
-            verified_reports=Count('id', filter=Q(status=Report.ReportStatus.VERIFIED)),
-            actioned_reports=Count('id', filter=Q(status=Report.ReportStatus.ACTIONED)),
-            rejected_reports=Count('id', filter=Q(status=Report.ReportStatus.REJECTED)),
-            
             # For trend calculation
-            reports_last_30_days=Count('id', filter=Q(created_at__gte=thirty_days_ago)),
-            reports_prev_30_days=Count('id', filter=Q(created_at__lt=thirty_days_ago, created_at__gte=sixty_days_ago)),
+            reports_last_30_days=Coalesce(Sum('report_count', filter=Q(date__gte=thirty_days_ago_date)), 0),
+            reports_prev_30_days=Coalesce(Sum('report_count', filter=Q(date__lt=thirty_days_ago_date, date__gte=sixty_days_ago_date)), 0),
+        )
 
-            # Average resolution time for reports actioned in the last 30 days
-            avg_resolution=Avg('resolution_duration', filter=Q(status=Report.ReportStatus.ACTIONED, updated_at__gte=thirty_days_ago))
+        # Average resolution time for reports actioned in the last 30 days
+        resolution = ReportResolutionDailyStat.objects.filter(
+            municipality=municipality, date__gte=thirty_days_ago_date
+        ).aggregate(
+            actioned=Sum('actioned_count'),
+            total_seconds=Sum('total_resolution_seconds')
         )
-        
-        # Calculate resolution time in hours
-        avg_res_time = kpis['avg_resolution']
-        kpis['average_resolution_time_hours'] = round(avg_res_time.total_seconds() / 3600, 2) if avg_res_time else None
+        actioned = resolution['actioned']
+        kpis['average_resolution_time_hours'] = round(resolution['total_seconds'] / actioned / 3600, 2) if actioned else None
 
         # Add trend data for reports
         kpis['reports_in_last_30_days'] = {
@@ -103,50 +116,46 @@ class MunicipalDashboardAPIView(APIView):
             "change_percentage": get_percentage_change(kpis['reports_last_30_days'], kpis['reports_prev_30_days'])
         }
 
-        # Fetch stats from other models (these require separate queries)
-        kpis['total_active_citizens'] = User.objects.filter(
-            role='CITIZEN', reports__location__municipality=municipality, reports__created_at__gte=thirty_days_ago
-        ).distinct().count()
+        kpis['total_active_citizens'] = MunicipalCitizenActivity.objects.filter(
+            municipality=municipality, last_reported_at__gte=thirty_days_ago
+        ).count()
         kpis['total_locations'] = Location.objects.filter(municipality=municipality, is_active=True).count()
         
         return kpis
 
     def _get_heatmap_data(self, reports_qs):
         """Generates data for the report intensity heatmap."""
-        heatmap_qs = reports_qs.values('location__point').annotate(intensity=Count('id')).order_by()
-        return [
-            {'latitude': p['location__point'].y, 'longitude': p['location__point'].x, 'intensity': p['intensity']}
-            for p in heatmap_qs if p['location__point']
-        ]
-
-    def _get_report_trends(self, reports_qs, thirty_days_ago):
-        """Generates time-series data for report counts."""
-        return reports_qs.filter(created_at__gte=thirty_days_ago).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(count=Count('id')).order_by('date')
+        # Coordinates come straight from PostGIS instead of building a GEOS point per row.
+        return reports_qs.values('location_id').annotate(
+            latitude=PointY('location__point'), longitude=PointX('location__point'), intensity=Count('id')
+        ).values('latitude', 'longitude', 'intensity').order_by()
+
+    def _get_report_trends(self, municipality, thirty_days_ago):
+        """Daily report counts from the rollups, with a zero for every day without reports."""
+        series = trends.report_count_series(municipality.id, thirty_days_ago, timezone.now(), trends.GRANULARITY_DAY)
+        return [{'date': point['bucket'], 'count': point['count']} for point in series]
     
-    def _get_issue_category_breakdown(self, reports_qs, total_reports):
+    def _get_issue_category_breakdown(self, municipality, total_reports):
         """Generates a breakdown of reports by issue category."""
         if total_reports == 0: return []
-        return reports_qs.values('issue_category__name').annotate(
-            count=Count('id'),
-            percentage=ExpressionWrapper(Count('id') * 100.0 / total_reports, output_field=fields.FloatField())
+        return ReportDailyStat.objects.filter(municipality=municipality).values('issue_category__name').annotate(
+            count=Sum('report_count'),
+            percentage=ExpressionWrapper(Sum('report_count') * 100.0 / total_reports, output_field=fields.FloatField())
         ).order_by('-count')[:5]
 
-    def _get_severity_breakdown(self, reports_qs, total_reports):
-        """NEW: Generates a breakdown of reports by severity level."""
+    def _get_severity_breakdown(self, municipality, total_reports):
+        """Generates a breakdown of reports by severity level."""
         if total_reports == 0: return []
-        
-        # Use a subquery to get the display name for the choice field
-        severity_display_subquery = next(
-            (name for val, name in Report.SeverityLevel.choices if val == F('severity')), None
+
+        severity_display = Case(
+            *[When(severity=value, then=models.Value(str(label))) for value, label in Report.SeverityLevel.choices],
+            output_field=models.CharField()
         )
 
-        return reports_qs.annotate(
-            get_severity_display=models.Value(severity_display_subquery, output_field=models.CharField())
-        ).values('severity', 'get_severity_display').annotate(
-            count=Count('id'),
-            percentage=ExpressionWrapper(Count('id') * 100.0 / total_reports, output_field=fields.FloatField())
+        return ReportDailyStat.objects.filter(municipality=municipality).values('severity').annotate(
+            get_severity_display=severity_display,
+            count=Sum('report_count'),
+            percentage=ExpressionWrapper(Sum('report_count') * 100.0 / total_reports, output_field=fields.FloatField())
         ).order_by('-count')
 
 
@@ -159,6 +168,101 @@ class MunicipalDashboardAPIView(APIView):
         ).order_by('-total_points')[:5]
 
 
+def _heatmap_tile_etag(request, z, x, y):
+    municipality_id = request.user.municipality_id if request.user.is_authenticated else None
+    if not municipality_id:
+        return None
+    version = get_municipality_data_version(municipality_id)
+    return hashlib.sha256(f'{municipality_id}:{version}:{z}/{x}/{y}'.encode('ascii')).hexdigest()[:32]
+
+class MunicipalHeatmapTileView(APIView):
+    """
+    Mapbox Vector Tile of the municipality's report heatmap. Tiles carry an ETag
+    derived from the municipality's data version, so unchanged tiles revalidate
+    with a 304 and are rendered at most once per version.
+    """
+    permission_classes = [IsMunicipalAdmin]
+    tile_cache_timeout = 60 * 60
+
+    @method_decorator(condition(etag_func=_heatmap_tile_etag))
+    def get(self, request, z, x, y):
+        municipality_id = request.user.municipality_id
+        if not municipality_id:
+            raise ValidationError({"error": "User is not associated with a municipality."})
+        if not tiles.is_valid_tile(z, x, y):
+            raise NotFound("No such tile.")
+
+        version = get_municipality_data_version(municipality_id)
+        tile = cache.get_or_set(
+            f'dashboard:heatmap-tile:{municipality_id}:{version}:{z}/{x}/{y}',
+            lambda: tiles.render_report_tile(municipality_id, z, x, y),
+            self.tile_cache_timeout
+        )
+        response = HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ReportTrendsAPIView(APIView):
+    """
+    Dense report-count series for the admin's municipality. Query parameters:
+    `granularity` (hour/day/week/month, default day), `start` and `end` (ISO
+    dates or datetimes, inclusive; default the last 30 buckets), and the optional
+    `issue_category` and `status` filters. Empty buckets are returned with 0.
+    """
+    permission_classes = [IsMunicipalAdmin]
+
+    def _parse_bound(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: "Must be an ISO 8601 date or datetime."})
+        return parsed
+
+    def get(self, request, *args, **kwargs):
+        municipality_id = request.user.municipality_id
+        if not municipality_id:
+            raise ValidationError({"error": "User is not associated with a municipality."})
+
+        granularity = request.query_params.get('granularity', trends.GRANULARITY_DAY)
+        if granularity not in trends.GRANULARITIES:
+            raise ValidationError({"granularity": f"Must be one of: {', '.join(trends.GRANULARITIES)}."})
+        status = request.query_params.get('status')
+        if status and status not in Report.ReportStatus.values:
+            raise ValidationError({"status": f"Must be one of: {', '.join(Report.ReportStatus.values)}."})
+
+        issue_category_id = request.query_params.get('issue_category')
+        if issue_category_id:
+            try:
+                issue_category_id = uuid.UUID(issue_category_id)
+            except ValueError:
+                raise ValidationError({"issue_category": "Must be a valid issue category ID."})
+
+        end = self._parse_bound('end') or timezone.now()
+        start = self._parse_bound('start') or trends.default_start(end, granularity)
+        bucket_count = trends.count_buckets(start, end, granularity)
+        if bucket_count == 0:
+            raise ValidationError({"start": "Must not be after end."})
+        if bucket_count > trends.MAX_BUCKETS:
+            raise ValidationError({"granularity": f"The range spans {bucket_count} buckets; at most {trends.MAX_BUCKETS} are allowed."})
+
+        series = trends.report_count_series(
+            municipality_id, start, end, granularity,
+            issue_category_id=issue_category_id, status=status
+        )
+        return Response({
+            "granularity": granularity,
+            "start": series[0]['bucket'].isoformat(),
+            "end": series[-1]['bucket'].isoformat(),
+            "series": ReportTrendPointSerializer(instance=series, many=True).data,
+        })
+
+
 class CitizenDashboardAPIView(APIView):
     """
     An advanced dashboard for Citizens, showing personal stats, activity,
@@ -189,27 +293,16 @@ class CitizenDashboardAPIView(APIView):
         })
 
     def _get_citizen_kpis(self, user):
-        """Fetches all personal KPIs for the citizen."""
-        user_reports = Report.objects.filter(user=user)
-        
-        # Get user rank
-        try:
-            user_with_rank = User.objects.filter(
-                role='CITIZEN', is_active=True
-            ).annotate(
-                rank=Window(expression=Rank(), order_by=F('total_points').desc())
-            ).get(pk=user.pk)
-            rank = user_with_rank.rank
-        except User.DoesNotExist:
-            rank = None
+        """Fetches all personal KPIs for the citizen from the denormalized counters on User."""
+        rank = leaderboard.get_user_rank(user)
 
         return {
             "total_points": user.total_points,
             "rank": rank,
-            "reports_filed": user_reports.filter(verifies_report__isnull=True).count(),
-            "reports_verified": user_reports.filter(verifies_report__isnull=False).count(),
-            "reports_actioned": user_reports.filter(status=Report.ReportStatus.ACTIONED).count(),
-            "reports_pending": user_reports.filter(status__in=[Report.ReportStatus.PENDING, Report.ReportStatus.VERIFIED]).count()
+            "reports_filed": user.reports_filed_count,
+            "reports_verified": user.verifications_count,
+            "reports_actioned": user.reports_actioned_count,
+            "reports_pending": user.reports_pending_count
         }
 
     def _get_recent_activity(self, user, request):
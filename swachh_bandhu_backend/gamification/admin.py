@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Sponsor, PointLog, Badge, UserBadge, Lottery, LotteryTicket
+from .models import Sponsor, PointLog, Badge, UserBadge, Lottery, LotteryTicket, LotteryWinner
 
 @admin.register(Sponsor)
 class SponsorAdmin(admin.ModelAdmin):
@@ -26,11 +26,23 @@ class UserBadgeAdmin(admin.ModelAdmin):
     list_filter = ('badge',)
     date_hierarchy = 'earned_at'
 
+class LotteryWinnerInline(admin.TabularInline):
+    model = LotteryWinner
+    fields = ('position', 'user', 'weight')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Lottery)
 class LotteryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'municipality', 'sponsor', 'start_date', 'end_date', 'is_active', 'winner')
+    list_display = ('name', 'municipality', 'sponsor', 'start_date', 'end_date', 'is_active', 'winner_count', 'winner')
     list_filter = ('is_active', 'sponsor', 'municipality')
     search_fields = ('name', 'description')
+    readonly_fields = ('winner', 'draw_seed', 'drawn_at')
+    inlines = [LotteryWinnerInline]
 
 @admin.register(LotteryTicket)
 class LotteryTicketAdmin(admin.ModelAdmin):
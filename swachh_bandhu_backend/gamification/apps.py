@@ -4,4 +4,7 @@ from django.utils.translation import gettext_lazy as _
 class GamificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gamification'
-    verbose_name = _('Gamification & Rewards')
\ No newline at end of file
+    verbose_name = _('Gamification & Rewards')
+
+    def ready(self):
+        import gamification.signals
\ No newline at end of file
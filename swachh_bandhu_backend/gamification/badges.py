@@ -0,0 +1,94 @@
+"""
+Set-based badge evaluation.
+
+Users' progress (points, initial reports, verifications) is read from the
+denormalized counters on User for a whole batch of users at once, compared in
+memory against every badge's `required_*` thresholds, and the missing UserBadge
+rows are inserted with INSERT ... ON CONFLICT DO NOTHING RETURNING id, so
+concurrent evaluations can never award a badge twice, and each one returns
+(and notifies) only the rows it inserted itself.
+"""
+from django.db import connection
+from django.utils import timezone
+from users.models import User
+from .models import Badge, UserBadge
+
+EVALUATION_CHUNK_SIZE = 2000
+
+def _meets_requirements(badge, points, reports_count, verifications_count):
+    return (
+        points >= badge.required_points and
+        reports_count >= badge.required_reports and
+        verifications_count >= badge.required_verifications
+    )
+
+def _progress_rows(users):
+    return users.values_list('id', 'total_points', 'reports_filed_count', 'verifications_count').order_by()
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _award_chunk(rows, badges, earned_at):
+    user_ids = [row[0] for row in rows]
+    badge_ids = [badge.id for badge in badges]
+    already_earned = set(
+        UserBadge.objects.filter(user_id__in=user_ids, badge_id__in=badge_ids).values_list('user_id', 'badge_id')
+    )
+
+    pending = {
+        (user_id, badge.id)
+        for user_id, points, reports_count, verifications_count in rows
+        for badge in badges
+        if (user_id, badge.id) not in already_earned
+        and _meets_requirements(badge, points, reports_count, verifications_count)
+    }
+    if not pending:
+        return []
+
+    # bulk_create(ignore_conflicts=True) cannot return ids, and reading rows back would
+    # also pick up those inserted by an overlapping evaluation.
+    table = connection.ops.quote_name(UserBadge._meta.db_table)
+    values = ', '.join(['(%s, %s, %s)'] * len(pending))
+    params = [value for user_id, badge_id in pending for value in (user_id, badge_id, earned_at)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, badge_id, earned_at) VALUES {values} "
+            f"ON CONFLICT (user_id, badge_id) DO NOTHING RETURNING id",
+            params
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def evaluate_badges(user_ids=None, badge_ids=None):
+    """
+    Awards every qualifying badge to the given users (all users when `user_ids`
+    is None), optionally limited to `badge_ids`. Returns the new UserBadge ids.
+    """
+    badges = Badge.objects.all()
+    if badge_ids is not None:
+        badges = badges.filter(id__in=badge_ids)
+    badges = list(badges)
+    if not badges:
+        return []
+
+    users = User.objects.filter(
+        is_active=True,
+        total_points__gte=min(badge.required_points for badge in badges),
+        reports_filed_count__gte=min(badge.required_reports for badge in badges),
+        verifications_count__gte=min(badge.required_verifications for badge in badges),
+    )
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    earned_at = timezone.now()
+    awarded = []
+    rows = _progress_rows(users).iterator(chunk_size=EVALUATION_CHUNK_SIZE)
+    for chunk in _chunked(rows, EVALUATION_CHUNK_SIZE):
+        awarded.extend(_award_chunk(chunk, badges, earned_at))
+    return awarded
@@ -0,0 +1,239 @@
+"""
+Points ranking backed by Redis sorted sets, with an indexed database fallback.
+
+One sorted set holds every active citizen's `total_points`, and one more per
+municipality. Single-user rank is a ZCOUNT of strictly higher scores (O(log n)),
+which gives the same tie semantics as the SQL `Rank()` window it replaces.
+The sets are only read once a full rebuild has set the BUILT_KEY sentinel:
+after a Redis flush or on first deploy, incremental updates alone would leave
+them holding just the recently active users, so reads use the database until
+the next rebuild. A hash records the municipality each member is indexed
+under, so that a user who moves is removed from the old municipality's set.
+A rebuild swaps in sets read from the database, so users updated while it runs
+are recorded and re-indexed from their current row once the swap is done.
+
+Weekly, monthly and rolling-window boards are summed from DailyPointTotal
+buckets, so their cost is bounded by the window length rather than the size
+of PointLog. The leaderboard endpoint caches the rendered response.
+"""
+import logging
+from datetime import timedelta
+import redis
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+from users.models import User, UserRole
+from .models import DailyPointTotal
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_KEY = 'leaderboard:points:all'
+MUNICIPALITY_KEY = 'leaderboard:points:municipality:{}'
+MEMBERS_KEY = 'leaderboard:points:members'
+BUILT_KEY = 'leaderboard:points:built'
+REBUILD_PREFIX = 'leaderboard:rebuild:'
+REBUILDING_KEY = 'leaderboard:points:rebuilding'
+REBUILD_DIRTY_KEY = 'leaderboard:points:rebuild-dirty'
+REBUILD_MARKER_TIMEOUT = 3600
+REBUILD_CHUNK_SIZE = 5000
+
+PERIOD_ALL_TIME = 'all_time'
+PERIOD_WEEKLY = 'weekly'
+PERIOD_MONTHLY = 'monthly'
+PERIOD_ROLLING = 'rolling'
+PERIODS = (PERIOD_ALL_TIME, PERIOD_WEEKLY, PERIOD_MONTHLY, PERIOD_ROLLING)
+MAX_ROLLING_DAYS = 90
+
+_client = None
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5
+        )
+    return _client
+
+def _key(municipality_id=None):
+    return MUNICIPALITY_KEY.format(municipality_id) if municipality_id else GLOBAL_KEY
+
+def _ranked_citizens():
+    return User.objects.filter(is_active=True, role=UserRole.CITIZEN)
+
+def _is_ranked(user):
+    return user.is_active and user.role == UserRole.CITIZEN
+
+def _assign_ranks(users, points_attr='total_points'):
+    """Sets competition-style ranks (1, 2, 2, 4) on users already sorted by points."""
+    previous_points, rank = None, 0
+    for position, user in enumerate(users, start=1):
+        points = getattr(user, points_attr)
+        if points != previous_points:
+            rank, previous_points = position, points
+        user.rank = rank
+    return users
+
+def _is_built(client):
+    return client.exists(BUILT_KEY)
+
+def update_user_score(user):
+    """Mirrors a user's current `total_points` and municipality into the global and municipal sorted sets."""
+    keys = [GLOBAL_KEY]
+    if user.municipality_id:
+        keys.append(_key(user.municipality_id))
+    member = str(user.pk)
+    municipality_id = str(user.municipality_id or '')
+    try:
+        client = _get_client()
+        pipe = client.pipeline(transaction=False)
+        pipe.hget(MEMBERS_KEY, member)
+        pipe.exists(REBUILDING_KEY)
+        previous, rebuilding = pipe.execute()
+        if rebuilding:
+            pipe.sadd(REBUILD_DIRTY_KEY, member)
+        if previous and previous.decode() != municipality_id:
+            pipe.zrem(_key(previous.decode()), member)
+        for key in keys:
+            if _is_ranked(user):
+                pipe.zadd(key, {member: user.total_points})
+            else:
+                pipe.zrem(key, member)
+        if _is_ranked(user):
+            pipe.hset(MEMBERS_KEY, member, municipality_id)
+        else:
+            pipe.hdel(MEMBERS_KEY, member)
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning("Could not update leaderboard index for user %s", user.pk, exc_info=True)
+
+def get_user_rank(user, municipality_id=None):
+    """Returns the user's rank among active citizens, or None if the user is not ranked."""
+    if not _is_ranked(user):
+        return None
+    key = _key(municipality_id)
+    try:
+        client = _get_client()
+        if _is_built(client):
+            return client.zcount(key, f'({user.total_points}', '+inf') + 1
+    except redis.RedisError:
+        logger.warning("Leaderboard index unavailable, falling back to the database.", exc_info=True)
+
+    higher = _ranked_citizens().filter(total_points__gt=user.total_points)
+    if municipality_id:
+        higher = higher.filter(municipality_id=municipality_id)
+    return higher.count() + 1
+
+def get_top_users(limit=100, municipality_id=None):
+    """Returns the top `limit` active citizens, each with a `rank` attribute."""
+    key = _key(municipality_id)
+    try:
+        client = _get_client()
+        if _is_built(client):
+            entries = client.zrevrange(key, 0, limit - 1)
+            users_by_id = _ranked_citizens().in_bulk([entry.decode() for entry in entries])
+            users = sorted(users_by_id.values(), key=lambda u: (-u.total_points, u.date_joined))
+            return _assign_ranks(users)
+    except redis.RedisError:
+        logger.warning("Leaderboard index unavailable, falling back to the database.", exc_info=True)
+
+    queryset = _ranked_citizens()
+    if municipality_id:
+        queryset = queryset.filter(municipality_id=municipality_id)
+    return _assign_ranks(list(queryset.order_by('-total_points', 'date_joined')[:limit]))
+
+def rebuild_leaderboard_index():
+    """Rebuilds every sorted set from the User table, atomically swaps them in and marks the index built."""
+    client = _get_client()
+    # Set before the database is read, so every update the read can miss is recorded.
+    client.set(REBUILDING_KEY, timezone.now().isoformat(), ex=REBUILD_MARKER_TIMEOUT)
+    target_keys = set()
+    citizens = _ranked_citizens().values_list('id', 'total_points', 'municipality_id')
+
+    pipe = client.pipeline(transaction=False)
+    for position, (user_id, points, municipality_id) in enumerate(citizens.iterator(chunk_size=REBUILD_CHUNK_SIZE), start=1):
+        keys = [GLOBAL_KEY] + ([_key(municipality_id)] if municipality_id else [])
+        for key in keys:
+            target_keys.add(key)
+            pipe.zadd(REBUILD_PREFIX + key, {str(user_id): points})
+        pipe.hset(REBUILD_PREFIX + MEMBERS_KEY, str(user_id), str(municipality_id or ''))
+        if position % REBUILD_CHUNK_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+
+    for key in target_keys:
+        client.rename(REBUILD_PREFIX + key, key)
+    stale_keys = [
+        key for key in client.scan_iter(match=MUNICIPALITY_KEY.format('*'))
+        if key.decode() not in target_keys
+    ]
+    if GLOBAL_KEY not in target_keys:
+        stale_keys.append(GLOBAL_KEY)
+    if stale_keys:
+        client.delete(*stale_keys)
+    if target_keys:
+        client.rename(REBUILD_PREFIX + MEMBERS_KEY, MEMBERS_KEY)
+    else:
+        client.delete(MEMBERS_KEY)
+    client.set(BUILT_KEY, timezone.now().isoformat())
+    _replay_rebuild_updates(client)
+    return len(target_keys)
+
+def _replay_rebuild_updates(client):
+    """Re-indexes the users updated while the rebuild ran, whose scores the swap overwrote."""
+    pipe = client.pipeline()
+    pipe.delete(REBUILDING_KEY)
+    pipe.smembers(REBUILD_DIRTY_KEY)
+    pipe.delete(REBUILD_DIRTY_KEY)
+    _, dirty, _ = pipe.execute()
+    for user in User.objects.filter(pk__in=[member.decode() for member in dirty]):
+        update_user_score(user)
+
+def record_daily_points_bulk(points_by_user, timestamp=None):
+    """Adds points for many users to their buckets for one day using a single UPDATE."""
+    if not points_by_user:
+        return
+    date = timezone.localdate(timestamp) if timestamp else timezone.localdate()
+    DailyPointTotal.objects.bulk_create(
+        [DailyPointTotal(user_id=user_id, date=date) for user_id in points_by_user], ignore_conflicts=True
+    )
+    increments = Case(
+        *[When(user_id=user_id, then=Value(points)) for user_id, points in points_by_user.items()],
+        default=Value(0), output_field=IntegerField()
+    )
+    DailyPointTotal.objects.filter(date=date, user_id__in=list(points_by_user)).update(points=F('points') + increments)
+
+def get_period_start(period, days=None):
+    """Returns the first day included in a windowed period."""
+    today = timezone.localdate()
+    if period == PERIOD_WEEKLY:
+        return today - timedelta(days=today.weekday())
+    if period == PERIOD_MONTHLY:
+        return today.replace(day=1)
+    if period == PERIOD_ROLLING:
+        return today - timedelta(days=days - 1)
+    raise ValueError(f"Unsupported leaderboard period: {period}")
+
+def _compute_period_top_users(start_date, limit, municipality_id):
+    buckets = DailyPointTotal.objects.filter(
+        date__gte=start_date, user__is_active=True, user__role=UserRole.CITIZEN
+    )
+    if municipality_id:
+        buckets = buckets.filter(user__municipality_id=municipality_id)
+    rows = buckets.values('user_id').annotate(period_points=Sum('points')).order_by('-period_points', 'user_id')[:limit]
+    points_by_user = {row['user_id']: row['period_points'] for row in rows}
+
+    users = list(User.objects.filter(pk__in=points_by_user))
+    for user in users:
+        user.period_points = points_by_user[user.pk]
+    users.sort(key=lambda u: (-u.period_points, u.date_joined))
+    return _assign_ranks(users, points_attr='period_points')
+
+def get_period_top_users(period, limit=100, municipality_id=None, days=None):
+    """
+    Returns the top users for a period, each with `rank` and `period_points`.
+    `days` is only used by the rolling period and must be 1..MAX_ROLLING_DAYS.
+    """
+    if period == PERIOD_ALL_TIME:
+        return get_top_users(limit=limit, municipality_id=municipality_id)
+
+    return _compute_period_top_users(get_period_start(period, days), limit, municipality_id)
@@ -0,0 +1,189 @@
+"""
+Lottery draws.
+
+Tickets are streamed from a server-side cursor as (user_id, weight) pairs in
+user order, and winners are chosen by weighted reservoir sampling without
+replacement (Efraimidis-Spirakis A-Res): every ticket gets the key
+log(u) / weight and the `winner_count` largest keys win. Only those keys are kept,
+so memory is O(winner_count) however many tickets there are.
+
+A ticket weighs 1, plus the points its holder earned within the lottery window
+when the lottery is weighted by points. The random stream comes from a recorded
+seed, and tickets are read in a fixed order, so anyone can re-run a draw from
+`Lottery.draw_seed` and the ticket table and get the same winners.
+
+Ticket issuance looks up each municipality's open lottery in the shared cache
+(invalidated whenever a Lottery is saved). When a lottery opens, tickets for the
+citizens who reported earlier in its window are issued in one
+INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+"""
+import heapq
+import math
+import random
+import secrets
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from notifications.tasks import notify_lottery_winner
+from reports.models import Report
+from users.models import UserRole
+from .models import Lottery, LotteryTicket, LotteryWinner, PointLog
+
+CHUNK_SIZE = 5000
+ACTIVE_LOTTERY_KEY = 'lottery:active:{}'
+ACTIVE_LOTTERY_TIMEOUT = 300
+# Cached in place of None, which the cache cannot tell apart from a miss.
+NO_LOTTERY = ''
+
+def new_seed():
+    return secrets.token_hex(16)
+
+def ticket_weights(lottery):
+    """(user_id, weight) for every ticket of the lottery, in a stable order."""
+    tickets = LotteryTicket.objects.filter(lottery=lottery).order_by('user_id')
+    if not lottery.weight_by_points:
+        return tickets.annotate(weight=Value(1, output_field=IntegerField())).values_list('user_id', 'weight')
+
+    window_points = PointLog.objects.filter(
+        user=OuterRef('user_id'), timestamp__gte=lottery.start_date, timestamp__lte=lottery.end_date
+    ).order_by().values('user').annotate(total=Sum('points')).values('total')
+    # Penalties can make the window total negative; every ticket keeps a weight of at least 1.
+    weight = Greatest(Coalesce(Subquery(window_points), 0), 0) + 1
+    return tickets.annotate(weight=weight).values_list('user_id', 'weight')
+
+def pick_winners(weighted_tickets, count, seed):
+    """
+    Draws up to `count` distinct (user_id, weight) pairs from an iterable of them,
+    in one pass and O(count) memory. Returns them in draw order, most favoured first.
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    for user_id, weight in weighted_tickets:
+        if weight <= 0:
+            continue
+        # 1 - random() is in (0, 1], so the log is finite; a larger key wins.
+        key = math.log(1.0 - rng.random()) / weight
+        if len(reservoir) < count:
+            heapq.heappush(reservoir, (key, user_id, weight))
+        elif key > reservoir[0][0]:
+            heapq.heapreplace(reservoir, (key, user_id, weight))
+    return [(user_id, weight) for _, user_id, weight in sorted(reservoir, reverse=True)]
+
+def draw_lottery(lottery_id, seed=None):
+    """
+    Draws and records the winners of a lottery and closes it. Returns the list of
+    LotteryWinner rows, empty if the lottery had no tickets or was already drawn.
+    """
+    with transaction.atomic():
+        lottery = Lottery.objects.select_for_update().get(pk=lottery_id)
+        if lottery.drawn_at:
+            return []
+
+        lottery.draw_seed = seed or new_seed()
+        picked = pick_winners(
+            ticket_weights(lottery).iterator(chunk_size=CHUNK_SIZE), max(lottery.winner_count, 1), lottery.draw_seed
+        )
+        winners = LotteryWinner.objects.bulk_create([
+            LotteryWinner(lottery=lottery, user_id=user_id, position=position, weight=weight)
+            for position, (user_id, weight) in enumerate(picked, start=1)
+        ])
+
+        lottery.winner_id = picked[0][0] if picked else None
+        lottery.drawn_at = timezone.now()
+        lottery.is_active = False
+        lottery.save(update_fields=['winner', 'draw_seed', 'drawn_at', 'is_active'])
+
+        if winners:
+            transaction.on_commit(lambda: notify_lottery_winner.delay(lottery.id))
+    return winners
+
+def replay_draw(lottery):
+    """Re-runs a recorded draw from its seed, for audit. Returns [(user_id, weight)] in draw order."""
+    return pick_winners(ticket_weights(lottery).iterator(chunk_size=CHUNK_SIZE), max(lottery.winner_count, 1), lottery.draw_seed)
+
+def _open_lotteries(now):
+    return Lottery.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now)
+
+def _cache_timeout(lottery, next_start, now):
+    # Never cache past the moment the answer changes: the lottery closing or another one opening.
+    boundaries = [ACTIVE_LOTTERY_TIMEOUT]
+    if lottery is not None:
+        boundaries.append((lottery['end_date'] - now).total_seconds())
+    if next_start is not None:
+        boundaries.append((next_start - now).total_seconds())
+    return max(1, int(min(boundaries)))
+
+def get_active_lottery_ids(municipality_ids, now=None):
+    """Maps each municipality id to the id of its open lottery, or None, using the cache where possible."""
+    now = now or timezone.now()
+    keys = {municipality_id: ACTIVE_LOTTERY_KEY.format(municipality_id) for municipality_id in set(municipality_ids)}
+    cached = cache.get_many(keys.values())
+
+    active = {}
+    missing = []
+    for municipality_id, key in keys.items():
+        entry = cached.get(key)
+        if entry is None:
+            missing.append(municipality_id)
+        elif entry == NO_LOTTERY:
+            active[municipality_id] = None
+        elif entry['start_date'] <= now <= entry['end_date']:
+            active[municipality_id] = entry['id']
+        else:
+            missing.append(municipality_id)
+    if not missing:
+        return active
+
+    found = {}
+    for lottery in _open_lotteries(now).filter(municipality_id__in=missing).order_by('start_date', 'id').values(
+        'id', 'municipality_id', 'start_date', 'end_date'
+    ):
+        found.setdefault(lottery.pop('municipality_id'), lottery)
+    upcoming = {}
+    for municipality_id, start_date in Lottery.objects.filter(
+        municipality_id__in=missing, is_active=True, start_date__gt=now
+    ).order_by('start_date').values_list('municipality_id', 'start_date'):
+        upcoming.setdefault(municipality_id, start_date)
+
+    for municipality_id in missing:
+        lottery = found.get(municipality_id)
+        active[municipality_id] = lottery['id'] if lottery else None
+        cache.set(
+            keys[municipality_id], lottery or NO_LOTTERY,
+            _cache_timeout(lottery, upcoming.get(municipality_id), now)
+        )
+    return active
+
+def get_active_lottery_id(municipality_id, now=None):
+    return get_active_lottery_ids([municipality_id], now)[municipality_id]
+
+def invalidate_active_lottery(municipality_id):
+    cache.delete(ACTIVE_LOTTERY_KEY.format(municipality_id))
+
+def backfill_lottery_tickets(lottery_id, now=None):
+    """
+    Issues a ticket to every active citizen who has reported in the lottery's
+    municipality since it started, in one statement. Citizens who already hold a
+    ticket are skipped by the unique (lottery, user) constraint. Returns the
+    number of tickets created.
+    """
+    now = now or timezone.now()
+    lottery = Lottery.objects.get(pk=lottery_id)
+    eligible = Report.objects.filter(
+        location__municipality_id=lottery.municipality_id,
+        created_at__gte=lottery.start_date, created_at__lte=min(now, lottery.end_date),
+        user__is_active=True, user__role=UserRole.CITIZEN,
+    ).order_by().values('user_id').distinct()
+    select_sql, select_params = eligible.query.sql_with_params()
+
+    ticket_table = connection.ops.quote_name(LotteryTicket._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ticket_table} (id, lottery_id, user_id, created_at) "
+            f"SELECT gen_random_uuid(), %s, eligible.user_id, %s FROM ({select_sql}) AS eligible "
+            f"ON CONFLICT (lottery_id, user_id) DO NOTHING",
+            [lottery.pk, now, *select_params]
+        )
+        return cursor.rowcount
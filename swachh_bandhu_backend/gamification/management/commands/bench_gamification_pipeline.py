@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.bench import rolled_back, synthetic_users, timed
+from locations.models import Location
+from reports.models import Report, IssueCategory
+from gamification import services
+from gamification.models import GamificationEvent
+from gamification.pipeline import _points_for_report, process_pending_events
+
+class Command(BaseCommand):
+    help = (
+        'Measures gamification throughput (events/sec) of the legacy per-report chain - points, '
+        'badge check, lottery ticket - against the micro-batched pipeline. Uses synthetic reports inside '
+        'a transaction that is rolled back; run it against a staging database with seed data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000, help='Synthetic reports per run.')
+        parser.add_argument('--users', type=int, default=200, help='Distinct synthetic citizens.')
+        parser.add_argument('--batch-size', type=int, default=200, help='Events per batch in batched mode.')
+
+    def handle(self, *args, **options):
+        location = Location.objects.filter(is_active=True).select_related('municipality').first()
+        category = IssueCategory.objects.filter(municipality=location.municipality).first() if location else None
+        if not category:
+            raise CommandError('Needs at least one active location with an issue category (try seed_nagpur_data).')
+
+        with rolled_back():
+            users = synthetic_users(options['users'])
+            for label, run in (('legacy', self._run_legacy), ('batched', self._run_batched)):
+                reports = Report.objects.bulk_create([
+                    Report(user=users[i % len(users)], location=location, issue_category=category, description='Benchmark report')
+                    for i in range(options['events'])
+                ])
+                processed, elapsed = timed(lambda: run(reports, options))
+                self.stdout.write(
+                    f'{label:>10}: {processed} events in {elapsed:.2f}s = {processed / max(elapsed, 1e-9):.0f} events/sec'
+                )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete; synthetic data rolled back.'))
+
+    def _run_legacy(self, reports, options):
+        # The chain process_report_points ran per report, minus the broker hops between
+        # its tasks: a locked points transaction, then a badge check and a lottery ticket.
+        for report in reports:
+            points, reason = _points_for_report(report)
+            services._award_points(report.user, points, reason, report)
+            Report.objects.filter(pk=report.pk).update(points_awarded=points)
+            services._check_and_award_badges(report.user_id)
+            services._assign_lottery_ticket(report.user)
+        return len(reports)
+
+    def _run_batched(self, reports, options):
+        GamificationEvent.objects.bulk_create([GamificationEvent(report=report) for report in reports])
+        processed = 0
+        while True:
+            result = process_pending_events(batch_size=options['batch_size'])
+            if not result['processed']:
+                return processed
+            processed += result['processed']
@@ -0,0 +1,75 @@
+import random
+import tracemalloc
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.bench import rolled_back, synthetic_municipality, synthetic_users, timed
+from gamification.lottery import draw_lottery, new_seed, pick_winners
+from gamification.models import Lottery, LotteryTicket
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the streaming lottery draw over a million tickets: draw time and peak memory '
+        'against loading every ticket and calling random.choice. With --db it also runs a full draw '
+        'against synthetic tickets in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=1_000_000)
+        parser.add_argument('--winners', type=int, default=3)
+        parser.add_argument('--memory-budget-kb', type=int, default=256, help='Allowed peak memory of the streaming draw.')
+        parser.add_argument('--db', action='store_true', help='Also draw from synthetic tickets in the database.')
+
+    def _tickets(self, count):
+        # Generated lazily, as rows arrive from a server-side cursor.
+        rng = random.Random(0)
+        for _ in range(count):
+            yield uuid.UUID(int=rng.getrandbits(128)), rng.randint(1, 50)
+
+    def _measure(self, draw):
+        tracemalloc.start()
+        result, elapsed = timed(draw)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    def handle(self, *args, **options):
+        count, winners = options['tickets'], options['winners']
+        seed = new_seed()
+
+        def load_all():
+            tickets = list(self._tickets(count))
+            return [random.Random(seed).choice(tickets)]
+
+        _, load_elapsed, load_peak = self._measure(load_all)
+        picked, stream_elapsed, stream_peak = self._measure(lambda: pick_winners(self._tickets(count), winners, seed))
+        self.stdout.write(f'load + random.choice: {count} tickets in {load_elapsed:.2f}s, peak {load_peak / 1024:.0f} KiB')
+        self.stdout.write(f'streaming weighted:   {count} tickets in {stream_elapsed:.2f}s, peak {stream_peak / 1024:.0f} KiB, {len(picked)} winners')
+
+        replayed = pick_winners(self._tickets(count), winners, seed)
+        if replayed != picked:
+            raise CommandError('The draw is not reproducible from its seed.')
+
+        if options['db']:
+            self._bench_database(count, winners)
+
+        if stream_peak > options['memory_budget_kb'] * 1024:
+            raise CommandError(f'Streaming draw peaked at {stream_peak / 1024:.0f} KiB, over the {options["memory_budget_kb"]} KiB budget.')
+        self.stdout.write(self.style.SUCCESS('Streaming draw is reproducible and within the memory budget.'))
+
+    def _bench_database(self, count, winners):
+        with rolled_back():
+            municipality = synthetic_municipality()
+            now = timezone.now()
+            lottery = Lottery.objects.create(
+                name='Benchmark Lottery', description='Benchmark', municipality=municipality,
+                start_date=now - timedelta(days=30), end_date=now - timedelta(days=1),
+                is_active=True, winner_count=winners, weight_by_points=True
+            )
+            for offset in range(0, count, 10000):
+                users = synthetic_users(min(10000, count - offset), municipality=municipality)
+                LotteryTicket.objects.bulk_create([LotteryTicket(lottery=lottery, user=user) for user in users])
+
+            drawn, elapsed, peak = self._measure(lambda: draw_lottery(lottery.id))
+            self.stdout.write(f'database draw: {count} tickets in {elapsed:.2f}s, peak {peak / 1024:.0f} KiB, {len(drawn)} winners')
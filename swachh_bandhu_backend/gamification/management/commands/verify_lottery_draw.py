@@ -0,0 +1,25 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from gamification.lottery import replay_draw
+from gamification.models import Lottery
+
+class Command(BaseCommand):
+    help = 'Re-runs a recorded lottery draw from its seed and checks that it yields the recorded winners.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('lottery_id')
+
+    def handle(self, *args, **options):
+        try:
+            lottery = Lottery.objects.get(pk=options['lottery_id'])
+        except (Lottery.DoesNotExist, ValidationError):
+            raise CommandError(f"No lottery with id {options['lottery_id']}.")
+        if not lottery.drawn_at or not lottery.draw_seed:
+            raise CommandError('This lottery has no recorded draw to verify.')
+
+        recorded = list(lottery.winners.order_by('position').values_list('user_id', flat=True))
+        replayed = [user_id for user_id, _ in replay_draw(lottery)]
+        self.stdout.write(f'seed {lottery.draw_seed}: recorded {len(recorded)} winners, replay drew {len(replayed)}')
+        if replayed != recorded:
+            raise CommandError('The replayed draw does not match the recorded winners.')
+        self.stdout.write(self.style.SUCCESS('The recorded draw is reproducible from its seed.'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_point_totals(apps, schema_editor):
+    PointLog = apps.get_model('gamification', 'PointLog')
+    DailyPointTotal = apps.get_model('gamification', 'DailyPointTotal')
+    totals = PointLog.objects.annotate(date=TruncDate('timestamp')).values('user_id', 'date').annotate(
+        points=Sum('points')
+    ).order_by()
+    DailyPointTotal.objects.bulk_create(
+        (DailyPointTotal(**row) for row in totals.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPointTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('points', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_point_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'user'], name='gamificatio_date_083d8f_idx')],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_point_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gamification', '0004_gamificationevent'),
+        ('subscriptions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lottery',
+            index=models.Index(fields=['-end_date', '-id'], name='gamification_lottery_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointlog',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='gamification_pointlog_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0005_lottery_gamification_lottery_feed_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lottery',
+            name='draw_seed',
+            field=models.CharField(blank=True, help_text='Seed of the draw, recorded so that the result can be reproduced.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='lottery',
+            name='weight_by_points',
+            field=models.BooleanField(default=False, help_text='Weight each ticket by the points its holder earned during the lottery window.'),
+        ),
+        migrations.AddField(
+            model_name='lottery',
+            name='winner_count',
+            field=models.PositiveSmallIntegerField(default=1, help_text='How many distinct winners to draw.'),
+        ),
+        migrations.AlterField(
+            model_name='lottery',
+            name='winner',
+            field=models.ForeignKey(blank=True, help_text='The first-drawn winner; every winner is listed in LotteryWinner.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_lotteries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='LotteryWinner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(help_text='1 for the first winner drawn.')),
+                ('weight', models.PositiveIntegerField(default=1, help_text="The winning ticket's weight at draw time.")),
+                ('lottery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='winners', to='gamification.lottery')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lottery_wins', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['lottery', 'position'],
+                'unique_together': {('lottery', 'position'), ('lottery', 'user')},
+            },
+        ),
+    ]
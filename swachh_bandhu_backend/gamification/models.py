@@ -36,10 +36,41 @@ class PointLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=['user', '-timestamp', '-id'], name='gamification_pointlog_feed_idx')]
 
     def __str__(self):
         return f"{self.user.email}: {self.points} points for {self.get_reason_display()}"
 
+class GamificationEvent(models.Model):
+    """
+    A report waiting to be processed by the gamification pipeline. The one-to-one
+    link to the report is the idempotency key: a report is only ever queued once.
+    """
+    report = models.OneToOneField('reports.Report', on_delete=models.CASCADE, related_name='gamification_event')
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['processed_at', 'created_at'])]
+
+    def __str__(self):
+        return f"Gamification event for report #{self.report_id}"
+
+class DailyPointTotal(models.Model):
+    """Points earned by a user on a single day, summed from PointLog. Backs the windowed leaderboards."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_point_totals')
+    date = models.DateField()
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date')
+        indexes = [models.Index(fields=['date', 'user'])]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.user_id} on {self.date}: {self.points} points"
+
 class Badge(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
@@ -73,9 +104,15 @@ class Lottery(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     is_active = models.BooleanField(default=False)
-    winner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='won_lotteries')
+    winner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='won_lotteries', help_text=_("The first-drawn winner; every winner is listed in LotteryWinner."))
+    winner_count = models.PositiveSmallIntegerField(default=1, help_text=_("How many distinct winners to draw."))
+    weight_by_points = models.BooleanField(default=False, help_text=_("Weight each ticket by the points its holder earned during the lottery window."))
+    draw_seed = models.CharField(max_length=64, blank=True, help_text=_("Seed of the draw, recorded so that the result can be reproduced."))
     drawn_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['-end_date', '-id'], name='gamification_lottery_feed_idx')]
+
     def __str__(self):
         return f"{self.name} ({self.municipality.name})"
 
@@ -89,4 +126,17 @@ class LotteryTicket(models.Model):
         unique_together = ('lottery', 'user')
 
     def __str__(self):
-        return f"Ticket for {self.user.email} in {self.lottery.name}"
\ No newline at end of file
+        return f"Ticket for {self.user.email} in {self.lottery.name}"
+
+class LotteryWinner(models.Model):
+    lottery = models.ForeignKey(Lottery, on_delete=models.CASCADE, related_name='winners')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='lottery_wins')
+    position = models.PositiveSmallIntegerField(help_text=_("1 for the first winner drawn."))
+    weight = models.PositiveIntegerField(default=1, help_text=_("The winning ticket's weight at draw time."))
+
+    class Meta:
+        ordering = ['lottery', 'position']
+        unique_together = [('lottery', 'user'), ('lottery', 'position')]
+
+    def __str__(self):
+        return f"#{self.position} {self.user.email} in {self.lottery.name}"
@@ -0,0 +1,120 @@
+"""
+Micro-batched gamification pipeline.
+
+Creating a report queues a GamificationEvent and schedules (at most once per
+flush window) a single Celery task that drains pending events in batches. Each
+batch awards points, updates daily point buckets, evaluates badges and issues
+lottery tickets for all of its reports in one transaction. The per-user report
+counters are already maintained when the report is written, so the pipeline
+does not touch them.
+"""
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from reports.models import Report
+from users.models import User
+from .models import GamificationEvent, PointLog, LotteryTicket
+from .badges import evaluate_badges
+from .lottery import get_active_lottery_ids
+from . import leaderboard
+
+FLUSH_SCHEDULED_KEY = 'gamification:flush-scheduled'
+
+def enqueue_report_event(report):
+    """Queues a report for the pipeline; safe to call more than once for the same report."""
+    GamificationEvent.objects.get_or_create(report=report)
+    transaction.on_commit(schedule_flush)
+
+def schedule_flush():
+    # Collapse a burst of reports into one task per flush window.
+    delay = settings.GAMIFICATION_FLUSH_DELAY_SECONDS
+    if cache.add(FLUSH_SCHEDULED_KEY, True, delay):
+        from .tasks import process_gamification_events
+        process_gamification_events.apply_async(countdown=delay)
+
+def _points_for_report(report):
+    if report.status == Report.ReportStatus.REJECTED:
+        return getattr(settings, 'PENALTY_FOR_FAKE_REPORT', -50), PointLog.PointReason.REPORT_REJECTED
+    if report.verifies_report_id:
+        return getattr(settings, 'POINTS_FOR_PEER_VERIFICATION', 5), PointLog.PointReason.PEER_VERIFICATION
+    return getattr(settings, 'POINTS_FOR_INITIAL_REPORT', 10), PointLog.PointReason.INITIAL_REPORT
+
+def _per_user_value(values_by_user):
+    return Case(
+        *[When(pk=user_id, then=Value(value)) for user_id, value in values_by_user.items()],
+        default=Value(0), output_field=IntegerField()
+    )
+
+def _award_points(reports, now):
+    report_type = ContentType.objects.get_for_model(Report)
+    already_awarded = set(PointLog.objects.filter(
+        content_type=report_type, object_id__in=[report.id for report in reports]
+    ).values_list('object_id', flat=True))
+
+    point_logs, awarded_reports = [], []
+    points_by_user = defaultdict(int)
+    for report in reports:
+        if not report.user_id or report.id in already_awarded:
+            continue
+        points, reason = _points_for_report(report)
+        if points == 0:
+            continue
+        point_logs.append(PointLog(
+            user_id=report.user_id, points=points, reason=reason,
+            content_type=report_type, object_id=report.id
+        ))
+        report.points_awarded = points
+        awarded_reports.append(report)
+        points_by_user[report.user_id] += points
+
+    if not point_logs:
+        return [], {}
+
+    # Lock the affected users in a stable order so that concurrent batches cannot deadlock.
+    list(User.objects.select_for_update().filter(pk__in=list(points_by_user)).order_by('pk').values_list('pk', flat=True))
+    PointLog.objects.bulk_create(point_logs)
+    Report.objects.bulk_update(awarded_reports, ['points_awarded'])
+    User.objects.filter(pk__in=list(points_by_user)).update(total_points=F('total_points') + _per_user_value(points_by_user))
+    leaderboard.record_daily_points_bulk(points_by_user, now)
+    return awarded_reports, points_by_user
+
+def _assign_lottery_tickets(reports, now):
+    active_lotteries = get_active_lottery_ids({report.location.municipality_id for report in reports}, now)
+    tickets = {
+        (active_lotteries[report.location.municipality_id], report.user_id)
+        for report in reports if active_lotteries[report.location.municipality_id]
+    }
+    LotteryTicket.objects.bulk_create(
+        [LotteryTicket(lottery_id=lottery_id, user_id=user_id) for lottery_id, user_id in tickets],
+        ignore_conflicts=True
+    )
+    return len(tickets)
+
+def process_pending_events(batch_size=None):
+    """
+    Processes one batch of pending events in a single transaction. Returns a dict
+    with the number of events processed, the users whose points changed and the
+    newly created UserBadge ids; publishing those is left to the caller.
+    """
+    batch_size = batch_size or settings.GAMIFICATION_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            GamificationEvent.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(processed_at__isnull=True)
+            .select_related('report__location')
+            .order_by('created_at')[:batch_size]
+        )
+        if not events:
+            return {'processed': 0, 'user_ids': [], 'user_badge_ids': []}
+
+        awarded_reports, points_by_user = _award_points([event.report for event in events], now)
+        user_badge_ids = evaluate_badges(user_ids=list(points_by_user)) if points_by_user else []
+        _assign_lottery_tickets(awarded_reports, now)
+        GamificationEvent.objects.filter(pk__in=[event.pk for event in events]).update(processed_at=now)
+
+    return {'processed': len(events), 'user_ids': list(points_by_user), 'user_badge_ids': user_badge_ids}
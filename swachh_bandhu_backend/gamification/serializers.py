@@ -1,13 +1,25 @@
 from rest_framework import serializers
 from users.models import User
-from .models import Badge, UserBadge, Lottery, Sponsor
+from .models import Badge, UserBadge, Lottery, LotteryWinner, PointLog, Sponsor
 
 class LeaderboardUserSerializer(serializers.ModelSerializer):
     rank = serializers.IntegerField(read_only=True)
+    period_points = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'full_name', 'total_points', 'rank']
+        fields = ['id', 'full_name', 'total_points', 'period_points', 'rank']
+
+    def get_period_points(self, obj):
+        # Windowed leaderboards rank by points earned in the period; all-time boards by total points.
+        return getattr(obj, 'period_points', obj.total_points)
+
+class PointLogSerializer(serializers.ModelSerializer):
+    reason_display = serializers.CharField(source='get_reason_display', read_only=True)
+
+    class Meta:
+        model = PointLog
+        fields = ['id', 'points', 'reason', 'reason_display', 'timestamp']
 
 class BadgeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -26,14 +38,22 @@ class SponsorSerializer(serializers.ModelSerializer):
         model = Sponsor
         fields = ['name', 'logo', 'website', 'description']
 
+class LotteryWinnerSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='user.full_name', read_only=True)
+
+    class Meta:
+        model = LotteryWinner
+        fields = ['position', 'full_name']
+
 class LotterySerializer(serializers.ModelSerializer):
     sponsor = SponsorSerializer(read_only=True)
     winner_name = serializers.CharField(source='winner.full_name', read_only=True, allow_null=True)
+    winners = LotteryWinnerSerializer(many=True, read_only=True)
     municipality_name = serializers.CharField(source='municipality.name', read_only=True)
 
     class Meta:
         model = Lottery
-        fields = ['id', 'name', 'description', 'sponsor', 'municipality_name', 'end_date', 'winner_name', 'drawn_at']
+        fields = ['id', 'name', 'description', 'sponsor', 'municipality_name', 'end_date', 'winner_count', 'winner_name', 'winners', 'drawn_at']
 
 class UserProfileStatsSerializer(serializers.ModelSerializer):
     # The rank is now calculated in the view and passed in
@@ -1,4 +1,5 @@
-from django.db import transaction, F
+from django.db import transaction
+from django.db.models import F
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from reports.models import Report
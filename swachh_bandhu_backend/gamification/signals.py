@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from core import response_cache
+from users.models import User
+from . import leaderboard
+from .models import Badge, Lottery, Sponsor
+from .lottery import invalidate_active_lottery
+from .tasks import backfill_badges, backfill_lottery_tickets
+
+@receiver(post_save, sender=Badge)
+def backfill_new_badge(sender, instance, created, **kwargs):
+    # Award a newly added badge to every user who already qualifies for it.
+    if created:
+        transaction.on_commit(lambda: backfill_badges.delay([instance.id]))
+
+@receiver(post_save, sender=Lottery)
+@receiver(post_delete, sender=Lottery)
+def invalidate_cached_lotteries(sender, instance, **kwargs):
+    # Covers admin edits as well as the draw in run_daily_lottery_draw.
+    municipality_id = instance.municipality_id
+    transaction.on_commit(lambda: response_cache.invalidate(response_cache.LOTTERIES, municipality_id))
+    transaction.on_commit(lambda: invalidate_active_lottery(municipality_id))
+
+@receiver(post_save, sender=Lottery)
+def backfill_tickets_for_open_lottery(sender, instance, **kwargs):
+    # Lotteries that open later are picked up by the open_due_lotteries beat task.
+    now = timezone.now()
+    if instance.is_active and not instance.drawn_at and instance.start_date <= now <= instance.end_date:
+        transaction.on_commit(lambda: backfill_lottery_tickets.delay(instance.id))
+
+@receiver(post_save, sender=Sponsor)
+def invalidate_cached_sponsor_lotteries(sender, instance, **kwargs):
+    municipality_ids = set(instance.lottery_set.values_list('municipality_id', flat=True))
+    transaction.on_commit(lambda: response_cache.invalidate(response_cache.LOTTERIES, *municipality_ids))
+
+@receiver(post_save, sender=User)
+def reindex_moved_user(sender, instance, **kwargs):
+    # Point awards reindex users in the gamification pipeline; this covers admin edits to
+    # the municipality, role or active flag. Saves of unrelated fields (e.g. last_login) are skipped.
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'municipality', 'role', 'is_active', 'total_points'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: leaderboard.update_user_score(instance))
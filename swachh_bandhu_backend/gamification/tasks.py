@@ -1,124 +1,91 @@
 from celery import shared_task
-from django.db import transaction
-from django.db.models import F
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.contrib.contenttypes.models import ContentType
-import random
+from core import response_cache
 from reports.models import Report
-from .models import PointLog, Badge, UserBadge, Lottery, LotteryTicket
+from .models import Lottery
 from users.models import User
-from notifications.tasks import notify_user_of_new_badge, notify_lottery_winner
+from notifications.tasks import notify_user_of_new_badge
+from . import leaderboard, pipeline
+from .badges import evaluate_badges
+from . import lottery
+from .lottery import draw_lottery
+
+def _publish_batch_result(result):
+    municipality_ids = set()
+    for user in User.objects.filter(pk__in=result['user_ids']):
+        leaderboard.update_user_score(user)
+        municipality_ids.add(user.municipality_id)
+    if municipality_ids:
+        response_cache.invalidate(response_cache.LEADERBOARD, *municipality_ids)
+    for user_badge_id in result['user_badge_ids']:
+        notify_user_of_new_badge.delay(user_badge_id)
+
+@shared_task
+def process_gamification_events():
+    """Drains the pending gamification events in micro-batches."""
+    cache.delete(pipeline.FLUSH_SCHEDULED_KEY)
+    processed = 0
+    for _ in range(settings.GAMIFICATION_MAX_BATCHES_PER_RUN):
+        result = pipeline.process_pending_events()
+        if not result['processed']:
+            break
+        _publish_batch_result(result)
+        processed += result['processed']
+    return f"Processed {processed} gamification events."
 
 @shared_task
 def process_report_points(report_id):
+    # Kept for messages queued before the batched pipeline; routes the report through it.
     try:
-        report = Report.objects.select_related('user').get(pk=report_id)
-        user = report.user
-        if not user: return
-
-        content_type = ContentType.objects.get_for_model(Report)
-        if PointLog.objects.filter(content_type=content_type, object_id=report.id).exists():
-            return "Points already processed for this report."
-
-        points = 0
-        reason = ''
-
-        if report.status == Report.ReportStatus.REJECTED:
-            points = getattr(settings, 'PENALTY_FOR_FAKE_REPORT', -50)
-            reason = PointLog.PointReason.REPORT_REJECTED
-        elif report.verifies_report:
-            points = getattr(settings, 'POINTS_FOR_PEER_VERIFICATION', 5)
-            reason = PointLog.PointReason.PEER_VERIFICATION
-        else:
-            points = getattr(settings, 'POINTS_FOR_INITIAL_REPORT', 10)
-            reason = PointLog.PointReason.INITIAL_REPORT
-        
-        if points != 0:
-            with transaction.atomic():
-                # Lock the user row to prevent race conditions when updating points
-                user_locked = User.objects.select_for_update().get(pk=user.pk)
-                
-                point_log = PointLog.objects.create(
-                    user=user_locked, points=points, reason=reason, source_object=report
-                )
-                
-                # Update the report with the points awarded
-                report.points_awarded = points
-                report.save(update_fields=['points_awarded'])
-
-                # Update user's total points
-                user_locked.total_points = F('total_points') + points
-                user_locked.save(update_fields=['total_points'])
-            
-            # Refresh the user object to get the latest point total for badge checks
-            user.refresh_from_db()
-            check_and_award_badges.delay(user.id)
-            assign_lottery_ticket.delay(user.id, report.id)
-
+        report = Report.objects.get(pk=report_id)
     except Report.DoesNotExist:
-        pass
+        return
+    pipeline.enqueue_report_event(report)
+
+@shared_task
+def rebuild_leaderboard():
+    key_count = leaderboard.rebuild_leaderboard_index()
+    return f"Rebuilt {key_count} leaderboard indexes."
 
 @shared_task
 def check_and_award_badges(user_id):
-    user = User.objects.get(pk=user_id)
-    earned_badge_ids = user.earned_badges.values_list('badge_id', flat=True)
-    unearned_badges = Badge.objects.exclude(id__in=earned_badge_ids)
-    
-    reports_count = user.reports.filter(verifies_report__isnull=True).count()
-    verifications_count = user.reports.filter(verifies_report__isnull=False).count()
-    
-    user.refresh_from_db()
-    
-    for badge in unearned_badges:
-        earned = all([
-            user.total_points >= badge.required_points,
-            reports_count >= badge.required_reports,
-            verifications_count >= badge.required_verifications
-        ])
-        
-        if earned:
-            user_badge, created = UserBadge.objects.get_or_create(user=user, badge=badge)
-            if created:
-                notify_user_of_new_badge.delay(user_badge.id)
+    for user_badge_id in evaluate_badges(user_ids=[user_id]):
+        notify_user_of_new_badge.delay(user_badge_id)
 
 @shared_task
-def assign_lottery_ticket(user_id, report_id):
-    try:
-        report = Report.objects.select_related('location__municipality').get(pk=report_id)
-        active_lottery = Lottery.objects.filter(
-            municipality=report.location.municipality,
-            is_active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).first()
+def backfill_badges(badge_ids=None):
+    awarded = evaluate_badges(badge_ids=badge_ids)
+    for user_badge_id in awarded:
+        notify_user_of_new_badge.delay(user_badge_id)
+    return f"Awarded {len(awarded)} badges."
 
-        if active_lottery:
-            user = User.objects.get(pk=user_id)
-            LotteryTicket.objects.get_or_create(user=user, lottery=active_lottery)
-    except (Report.DoesNotExist, User.DoesNotExist):
-        pass
+@shared_task
+def backfill_lottery_tickets(lottery_id):
+    created = lottery.backfill_lottery_tickets(lottery_id)
+    return f"Issued {created} lottery tickets."
+
+@shared_task
+def open_due_lotteries():
+    """Backfills tickets for lotteries whose window opened since the last run; repeats are harmless."""
+    now = timezone.now()
+    lottery_ids = list(Lottery.objects.filter(
+        is_active=True, start_date__lte=now, start_date__gt=now - settings.LOTTERY_OPEN_LOOKBACK, end_date__gte=now
+    ).values_list('id', flat=True))
+    created = sum(lottery.backfill_lottery_tickets(lottery_id, now) for lottery_id in lottery_ids)
+    return f"Issued {created} tickets for {len(lottery_ids)} newly opened lotteries."
 
 @shared_task
 def run_daily_lottery_draw():
     today = timezone.now().date()
-    lotteries_to_draw = Lottery.objects.filter(
-        end_date__lt=today, 
+    lottery_ids = list(Lottery.objects.filter(
+        end_date__lt=today,
         is_active=True,
-        winner__isnull=True
-    )
-    for lottery in lotteries_to_draw:
-        with transaction.atomic():
-            tickets = list(lottery.tickets.all())
-            if not tickets:
-                lottery.is_active = False
-                lottery.save()
-                continue
-            
-            winner_ticket = random.choice(tickets)
-            lottery.winner = winner_ticket.user
-            lottery.drawn_at = timezone.now()
-            lottery.is_active = False
-            lottery.save()
-            
-            notify_lottery_winner.delay(lottery.id)
\ No newline at end of file
+        drawn_at__isnull=True
+    ).values_list('id', flat=True))
+    winners = 0
+    for lottery_id in lottery_ids:
+        # One transaction per lottery; the tickets are streamed, never loaded at once.
+        winners += len(draw_lottery(lottery_id))
+    return f"Drew {len(lottery_ids)} lotteries with {winners} winners."
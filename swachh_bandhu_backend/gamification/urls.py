@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LeaderboardViewSet, UserProfileStatsView, LotteryViewSet
+from .views import LeaderboardViewSet, UserProfileStatsView, LotteryViewSet, PointLogViewSet
 
 router = DefaultRouter()
 router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
 router.register(r'lotteries', LotteryViewSet, basename='lottery')
+router.register(r'point-logs', PointLogViewSet, basename='point-log')
 
 urlpatterns = [
     path('profile-stats/', UserProfileStatsView.as_view(), name='user-gamification-profile'),
@@ -1,27 +1,71 @@
-from django.db.models import F, Window
-from django.db.models.functions import Rank
-from django.utils import timezone
+import uuid
 from rest_framework import generics, viewsets, permissions
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from core.pagination import KeysetPagination
+from core import response_cache
+from core.response_cache import CachedListMixin
 from users.models import User, UserRole
-from .models import Lottery
-from .serializers import LeaderboardUserSerializer, LotterySerializer, UserProfileStatsSerializer
+from .models import Lottery, PointLog
+from . import leaderboard
+from .serializers import LeaderboardUserSerializer, LotterySerializer, PointLogSerializer, UserProfileStatsSerializer
 
-class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+class LeaderboardViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = LeaderboardUserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    leaderboard_size = 100
+    cache_namespace = response_cache.LEADERBOARD
+    cache_timeout = 30
 
     def get_queryset(self):
-        period = self.request.query_params.get('period', 'all_time')
-        
-        # Currently only supports 'all_time'.
-        # A more complex implementation would be needed for monthly leaderboards.
-        queryset = User.objects.filter(is_active=True, role=UserRole.CITIZEN)
+        return User.objects.filter(is_active=True, role=UserRole.CITIZEN)
 
-        # Annotate rank using a window function for efficiency
-        return queryset.annotate(
-            rank=Window(expression=Rank(), order_by=F('total_points').desc())
-        ).order_by('rank', 'date_joined')[:100] # Increased leaderboard size
+    def _get_municipality_id(self):
+        municipality_id = self.request.query_params.get('municipality')
+        if not municipality_id:
+            return None
+        try:
+            return uuid.UUID(municipality_id)
+        except ValueError:
+            raise ValidationError({"municipality": "Must be a valid municipality ID."})
+
+    def _get_rolling_days(self):
+        try:
+            days = int(self.request.query_params.get('days', 7))
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer."})
+        if not 1 <= days <= leaderboard.MAX_ROLLING_DAYS:
+            raise ValidationError({"days": f"Must be between 1 and {leaderboard.MAX_ROLLING_DAYS}."})
+        return days
+
+    def get_cache_municipality_id(self):
+        return self._get_municipality_id()
+
+    def list_data(self, request, *args, **kwargs):
+        period = request.query_params.get('period', leaderboard.PERIOD_ALL_TIME)
+        if period not in leaderboard.PERIODS:
+            raise ValidationError({"period": f"Must be one of: {', '.join(leaderboard.PERIODS)}."})
+
+        # Ranks come from the precomputed leaderboard index (all_time) or the daily point buckets (windowed periods).
+        users = leaderboard.get_period_top_users(
+            period,
+            limit=self.leaderboard_size,
+            municipality_id=self._get_municipality_id(),
+            days=self._get_rolling_days() if period == leaderboard.PERIOD_ROLLING else None
+        )
+
+        page = self.paginate_queryset(users)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data).data
+        return self.get_serializer(users, many=True).data
+
+    def retrieve(self, request, *args, **kwargs):
+        user = self.get_object()
+        user.rank = leaderboard.get_user_rank(user, municipality_id=self._get_municipality_id())
+        serializer = self.get_serializer(user)
+        return Response(serializer.data)
 
 
 class UserProfileStatsView(generics.RetrieveAPIView):
@@ -30,24 +74,31 @@ class UserProfileStatsView(generics.RetrieveAPIView):
 
     def get_object(self):
         user = self.request.user
-        try:
-            # Annotate the user object with its rank efficiently
-            user_with_rank = User.objects.filter(
-                is_active=True, role=UserRole.CITIZEN
-            ).annotate(
-                rank=Window(expression=Rank(), order_by=F('total_points').desc())
-            ).get(pk=user.pk)
-            return user_with_rank
-        except User.DoesNotExist:
-            # This can happen if the user is not a CITIZEN or if there's an issue.
-            # Fallback to the original user object and set rank to None.
-            user.rank = None 
-            return user
-
-
-class LotteryViewSet(viewsets.ReadOnlyModelViewSet):
+        # Non-citizens are not ranked and get a rank of None.
+        user.rank = leaderboard.get_user_rank(user)
+        return user
+
+
+class LotteryViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = LotterySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-end_date', '-id')
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['municipality', 'is_active']
+    cache_namespace = response_cache.LOTTERIES
+    cache_timeout = 300
+
+    def get_queryset(self):
+        return Lottery.objects.select_related('sponsor', 'winner', 'municipality').prefetch_related('winners__user').order_by('-end_date')
+
+
+class PointLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """The current user's points history, newest first."""
+    serializer_class = PointLogSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
 
     def get_queryset(self):
-        return Lottery.objects.select_related('sponsor', 'winner', 'municipality').all().order_by('-end_date')
\ No newline at end of file
+        return PointLog.objects.filter(user=self.request.user)
@@ -0,0 +1,65 @@
+from django.contrib.gis.geos import Point, Polygon
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .geo import GeographyDistance, GeographyDWithin, GeographyKNN
+
+def _parse_floats(value, count, param, message):
+    try:
+        values = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValidationError({param: message})
+    if len(values) != count:
+        raise ValidationError({param: message})
+    return values
+
+class LocationGeoFilter(BaseFilterBackend):
+    """
+    Spatial filters for locations:
+
+    - `in_bbox=min_lng,min_lat,max_lng,max_lat` keeps locations inside the box.
+    - `near=lat,lng&radius=<meters>` keeps locations within the radius, annotates
+      `distance` in meters and returns at most `limit` of them nearest-first.
+
+    Both are served by the GiST indexes on `point` and `(point::geography)`.
+    Must run after any ordering filter, since `near` slices the queryset.
+    """
+    default_radius = 2000
+    max_radius = 50000
+    default_limit = 20
+    max_limit = 100
+
+    def filter_queryset(self, request, queryset, view):
+        # Detail lookups go through filter_queryset too and cannot work on a sliced queryset.
+        if getattr(view, 'action', 'list') != 'list':
+            return queryset
+        params = request.query_params
+        if params.get('in_bbox'):
+            min_lng, min_lat, max_lng, max_lat = _parse_floats(
+                params['in_bbox'], 4, 'in_bbox', "Must be min_lng,min_lat,max_lng,max_lat."
+            )
+            bbox = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+            bbox.srid = 4326
+            queryset = queryset.filter(point__bboverlaps=bbox)
+
+        if params.get('near'):
+            lat, lng = _parse_floats(params['near'], 2, 'near', "Must be lat,lng.")
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValidationError({"near": "Latitude must be within -90..90 and longitude within -180..180."})
+            radius = self._bounded_int(params, 'radius', self.default_radius, 1, self.max_radius)
+            limit = self._bounded_int(params, 'limit', self.default_limit, 1, self.max_limit)
+            origin = Point(lng, lat, srid=4326)
+            queryset = queryset.filter(
+                GeographyDWithin('point', origin, radius)
+            ).annotate(
+                distance=GeographyDistance('point', origin)
+            ).order_by(GeographyKNN('point', origin))[:limit]
+        return queryset
+
+    def _bounded_int(self, params, name, default, minimum, maximum):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "Must be an integer."})
+        if not minimum <= value <= maximum:
+            raise ValidationError({name: f"Must be between {minimum} and {maximum}."})
+        return value
@@ -0,0 +1,48 @@
+from django.contrib.gis.db.models import GeometryField, PointField
+from django.db.models import BooleanField, F, FloatField, Func, Value
+
+class AsGeography(Func):
+    """Casts a geometry to geography, matching the `(point::geography)` GiST index on Location."""
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(geography=True)
+
+class GeographyDWithin(Func):
+    """`ST_DWithin` on geography: true when two points are within `distance_meters` on the spheroid."""
+    function = 'ST_DWithin'
+    output_field = BooleanField()
+
+    def __init__(self, field, point, distance_meters, **extra):
+        field = F(field) if isinstance(field, str) else field
+        point = Value(point, output_field=PointField(srid=4326))
+        super().__init__(AsGeography(field), AsGeography(point), Value(float(distance_meters)), **extra)
+
+class PointX(Func):
+    """Longitude of a 4326 point, computed in PostGIS."""
+    function = 'ST_X'
+    output_field = FloatField()
+
+    def __init__(self, field, **extra):
+        super().__init__(F(field), **extra)
+
+class PointY(PointX):
+    """Latitude of a 4326 point, computed in PostGIS."""
+    function = 'ST_Y'
+
+class GeographyDistance(Func):
+    """`ST_Distance` on geography: meters between two points on the spheroid."""
+    function = 'ST_Distance'
+    output_field = FloatField()
+
+    def __init__(self, field, point, **extra):
+        field = F(field) if isinstance(field, str) else field
+        point = Value(point, output_field=PointField(srid=4326))
+        super().__init__(AsGeography(field), AsGeography(point), **extra)
+
+class GeographyKNN(GeographyDistance):
+    """
+    The `<->` KNN distance operator on geography. Ordering by it walks the GiST
+    index on `(point::geography)` nearest-first instead of sorting every match.
+    """
+    function = None
+    arg_joiner = ' <-> '
+    template = '(%(expressions)s)'
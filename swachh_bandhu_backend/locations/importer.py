@@ -0,0 +1,130 @@
+"""
+Bulk import of locations from CSV or GeoJSON.
+
+Rows are validated one by one but written in chunks: each chunk takes a lock on
+the municipality, counts its locations once to find the remaining plan capacity,
+bulk-inserts the valid rows and queues their QR codes. `import_locations` is a
+generator of progress events so that callers can stream them to the client.
+"""
+import csv
+import io
+import json
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from core.versioning import bump_municipality_data_version
+from subscriptions.models import Municipality
+from .models import Location
+from .serializers import LocationImportRowSerializer
+from .tasks import queue_qr_code_generation
+
+FORMAT_CSV = 'csv'
+FORMAT_GEOJSON = 'geojson'
+FORMATS = (FORMAT_CSV, FORMAT_GEOJSON)
+DEFAULT_CHUNK_SIZE = 500
+
+class LocationImportError(ValueError):
+    """The import file as a whole cannot be read."""
+
+def detect_format(filename):
+    return FORMAT_GEOJSON if filename.lower().endswith(('.geojson', '.json')) else FORMAT_CSV
+
+def parse_csv(stream):
+    """Yields (row_number, row) pairs; expects a header with at least name, latitude and longitude."""
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.StringIO(stream.decode('utf-8-sig'))
+    elif not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    reader = csv.DictReader(stream)
+    missing = {'name', 'latitude', 'longitude'} - set(reader.fieldnames or [])
+    if missing:
+        raise LocationImportError(f"CSV header is missing required columns: {', '.join(sorted(missing))}.")
+    # Row 1 is the header.
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, {key: value for key, value in row.items() if key and value not in (None, '')}
+
+def parse_geojson(stream):
+    """Yields (feature_number, row) pairs from a FeatureCollection of Point features."""
+    try:
+        data = json.load(stream)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise LocationImportError(f"Invalid GeoJSON: {exc}")
+    if not isinstance(data, dict) or data.get('type') != 'FeatureCollection':
+        raise LocationImportError("GeoJSON must be a FeatureCollection.")
+
+    for feature_number, feature in enumerate(data.get('features') or [], start=1):
+        geometry = (feature or {}).get('geometry') or {}
+        row = dict((feature or {}).get('properties') or {})
+        coordinates = geometry.get('coordinates')
+        if geometry.get('type') == 'Point' and isinstance(coordinates, list) and len(coordinates) >= 2:
+            row['longitude'], row['latitude'] = coordinates[0], coordinates[1]
+        yield feature_number, row
+
+def parse_rows(stream, file_format):
+    if file_format == FORMAT_GEOJSON:
+        return parse_geojson(stream)
+    return parse_csv(stream)
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _insert_chunk(municipality_id, valid_rows):
+    """Inserts as many rows as the plan allows. Returns (created_ids, rejected_row_numbers, plan_limit)."""
+    with transaction.atomic():
+        # Serializes concurrent imports into this municipality so that together they cannot overshoot the plan.
+        municipality = Municipality.objects.select_for_update().select_related('plan').get(pk=municipality_id)
+        capacity = len(valid_rows)
+        plan_limit = municipality.plan.max_locations if municipality.plan else None
+        if plan_limit is not None:
+            capacity = max(0, plan_limit - Location.objects.filter(municipality=municipality).count())
+
+        accepted, rejected = valid_rows[:capacity], [row_number for row_number, _ in valid_rows[capacity:]]
+        locations = []
+        for _, data in accepted:
+            data = dict(data)
+            point = Point(data.pop('longitude'), data.pop('latitude'), srid=4326)
+            locations.append(Location(municipality=municipality, point=point, **data))
+        Location.objects.bulk_create(locations)
+
+        # bulk_create skips post_save, so queue the QR codes explicitly.
+        created_ids = [location.id for location in locations]
+        if created_ids:
+            transaction.on_commit(lambda: queue_qr_code_generation(created_ids))
+            transaction.on_commit(lambda: bump_municipality_data_version(municipality_id))
+    return created_ids, rejected, plan_limit
+
+def import_locations(municipality, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Validates and inserts `rows` ((row_number, dict) pairs) for the municipality.
+    Yields an `error` event per rejected row, a `progress` event per chunk and a
+    final `summary` event. Rows are committed chunk by chunk, so an interrupted
+    import keeps the chunks already reported.
+    """
+    processed = created = failed = 0
+    for chunk in _chunked(rows, chunk_size):
+        valid_rows = []
+        for row_number, row in chunk:
+            serializer = LocationImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid_rows.append((row_number, serializer.validated_data))
+            else:
+                failed += 1
+                yield {'event': 'error', 'row': row_number, 'errors': serializer.errors}
+
+        if valid_rows:
+            created_ids, rejected, plan_limit = _insert_chunk(municipality.pk, valid_rows)
+            created += len(created_ids)
+            for row_number in rejected:
+                failed += 1
+                yield {'event': 'error', 'row': row_number, 'errors': {'municipality': [f"Municipality has reached its limit of {plan_limit} locations for the current plan."]}}
+
+        processed += len(chunk)
+        yield {'event': 'progress', 'processed': processed, 'created': created, 'failed': failed}
+
+    yield {'event': 'summary', 'processed': processed, 'created': created, 'failed': failed}
@@ -0,0 +1,62 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from core.bench import check_p99, latency_percentiles, random_point, rolled_back, synthetic_locations, synthetic_municipality
+from locations.filters import LocationGeoFilter
+from locations.models import Location
+
+class _ListView:
+    action = 'list'
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks "locations near me" (radius + distance ordering) and bbox queries against a synthetic '
+        'city and fails if the p99 latency exceeds the target. All synthetic data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=100000)
+        parser.add_argument('--samples', type=int, default=1000)
+        parser.add_argument('--radius', type=int, default=2000)
+        parser.add_argument('--p99-ms', type=float, default=25.0, help='Maximum acceptable p99 latency in milliseconds.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _time_queries(self, rng, params_for_sample, samples):
+        factory, backend, view = APIRequestFactory(), LocationGeoFilter(), _ListView()
+        timings = []
+        for _ in range(samples):
+            request = Request(factory.get('/api/v1/locations/', params_for_sample(rng)))
+            started = time.perf_counter()
+            list(backend.filter_queryset(request, Location.objects.filter(is_active=True), view))
+            timings.append((time.perf_counter() - started) * 1000)
+        return latency_percentiles(timings)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Roughly a 40 km x 40 km city.
+        spread = 0.2
+
+        def near(rng):
+            point = random_point(rng, spread)
+            return {'near': f'{point.y},{point.x}', 'radius': options['radius'], 'limit': 20}
+
+        def in_bbox(rng):
+            point = random_point(rng, spread)
+            return {'in_bbox': f'{point.x},{point.y},{point.x + 0.01},{point.y + 0.01}'}
+
+        with rolled_back():
+            synthetic_locations(synthetic_municipality(), options['locations'], rng, spread)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE locations_location')
+
+            results = {
+                'near': self._time_queries(rng, near, options['samples']),
+                'in_bbox': self._time_queries(rng, in_bbox, options['samples']),
+            }
+
+        self.stdout.write(f'{options["samples"]} queries of each kind over {options["locations"]} locations')
+        check_p99(self.stdout, results, options['p99_ms'])
+        self.stdout.write(self.style.SUCCESS('Location search is within the latency target.'))
@@ -0,0 +1,29 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from locations import qr
+from locations.tasks import queue_qr_code_generation
+
+class Command(BaseCommand):
+    help = 'Renders QR codes for every location whose image is missing or stale, locally in a process pool or on Celery workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Local render processes.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--queue', action='store_true', help='Dispatch batches to Celery instead of rendering here.')
+
+    def handle(self, *args, **options):
+        location_ids = list(qr.stale_location_ids())
+        if options['queue']:
+            batches = queue_qr_code_generation(location_ids)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(location_ids)} locations in {batches} batches.'))
+            return
+
+        started = time.perf_counter()
+        written = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(location_ids), batch_size):
+            written += qr.generate_qr_codes(location_ids[start:start + batch_size], workers=options['workers'])
+        elapsed = time.perf_counter() - started
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f'Rendered {written} QR codes in {elapsed:.1f}s ({rate:,.0f}/s).'))
@@ -0,0 +1,38 @@
+import json
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from subscriptions.models import Municipality
+from locations import importer
+
+class Command(BaseCommand):
+    help = 'Bulk-imports locations for a municipality from a CSV or GeoJSON file, enforcing the plan location limit.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--municipality', required=True, help='Municipality ID.')
+        parser.add_argument('--format', choices=importer.FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=importer.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            municipality = Municipality.objects.select_related('plan').get(pk=options['municipality'])
+        except (Municipality.DoesNotExist, ValidationError):
+            raise CommandError(f"Municipality {options['municipality']} not found.")
+
+        file_format = options['format'] or importer.detect_format(options['path'])
+        with open(options['path'], 'rb') as stream:
+            try:
+                rows = importer.parse_rows(stream, file_format)
+                for event in importer.import_locations(municipality, rows, chunk_size=options['chunk_size']):
+                    if event['event'] == 'error':
+                        self.stderr.write(f"Row {event['row']}: {json.dumps(event['errors'])}")
+                    elif event['event'] == 'progress':
+                        self.stdout.write(f"{event['processed']} rows processed, {event['created']} created, {event['failed']} failed")
+                    else:
+                        summary = event
+            except importer.LocationImportError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} of {summary['processed']} locations into {municipality.name} ({summary['failed']} failed)."
+        ))
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        # Expression index used by geography-cast distance queries (ST_DWithin, KNN ordering)
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS locations_location_point_geog_idx ON locations_location USING GIST ((point::geography));',
+            reverse_sql='DROP INDEX IF EXISTS locations_location_point_geog_idx;',
+        ),
+    ]
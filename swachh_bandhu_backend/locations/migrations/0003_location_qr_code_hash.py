@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_location_point_geography_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='qr_code_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the inputs the QR image was rendered from.', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_location_qr_code_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.F('point'), models.Value(12), function='ST_GeoHash', output_field=models.CharField(max_length=12)), help_text='Geohash of the point, maintained by the database; its prefixes are the map clustering cells.', output_field=models.CharField(max_length=12)),
+        ),
+    ]
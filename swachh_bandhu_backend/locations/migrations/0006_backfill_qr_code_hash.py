@@ -0,0 +1,41 @@
+import hashlib
+from django.conf import settings
+from django.db import migrations
+
+# Frozen copy of locations.qr.qr_content_hash for QR_RENDER_VERSION 'v1:L:10:4', the
+# parameters the images rendered before 0003 were made with.
+QR_RENDER_VERSION = 'v1:L:10:4'
+BATCH_SIZE = 2000
+
+
+def qr_content_hash(location_id):
+    frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
+    payload = f"{frontend_url}/report/new/{location_id}"
+    return hashlib.sha256(f'{QR_RENDER_VERSION}|{payload}'.encode('utf-8')).hexdigest()
+
+
+def backfill_qr_code_hash(apps, schema_editor):
+    # Existing images were rendered from the same inputs, so they are recorded as
+    # current instead of being re-rendered on the next save of every location.
+    Location = apps.get_model('locations', 'Location')
+    pending = Location.objects.filter(qr_code_hash='').exclude(qr_code_image='').exclude(qr_code_image__isnull=True)
+    batch = []
+    for location in pending.only('id').iterator(chunk_size=BATCH_SIZE):
+        location.qr_code_hash = qr_content_hash(location.id)
+        batch.append(location)
+        if len(batch) >= BATCH_SIZE:
+            Location.objects.bulk_update(batch, ['qr_code_hash'])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ['qr_code_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_qr_code_hash, migrations.RunPython.noop),
+    ]
@@ -2,14 +2,13 @@ import uuid
 from django.db import models
 from django.conf import settings
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from subscriptions.models import Municipality
-import qrcode
-from io import BytesIO
-from django.core.files.base import ContentFile
 
 def qr_code_upload_path(instance, filename):
-    return f'locations/{instance.municipality.id}/{instance.id}/qr_code.png'
+    return f'locations/{instance.municipality.id}/{instance.id}/{filename}'
 
 class Location(models.Model):
     class LocationType(models.TextChoices):
@@ -29,6 +28,18 @@ class Location(models.Model):
     municipality = models.ForeignKey(Municipality, on_delete=models.CASCADE, related_name='locations', help_text=_("The governing municipality for this location."))
     location_type = models.CharField(max_length=30, choices=LocationType.choices, default=LocationType.OTHER, db_index=True)
     qr_code_image = models.ImageField(upload_to=qr_code_upload_path, blank=True, null=True)
+    geohash = models.GeneratedField(
+        expression=models.Func(models.F('point'), models.Value(12), function='ST_GeoHash', output_field=models.CharField(max_length=12)),
+        output_field=models.CharField(max_length=12),
+        db_persist=True,
+        help_text=_("Geohash of the point, maintained by the database; its prefixes are the map clustering cells."),
+    )
+    search_vector = models.GeneratedField(
+        expression=SearchVector('name', weight='A', config='english') + SearchVector('description', weight='B', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    qr_code_hash = models.CharField(max_length=64, blank=True, editable=False, help_text=_("SHA-256 of the inputs the QR image was rendered from."))
     is_active = models.BooleanField(default=True, help_text=_("Inactive locations cannot have new reports filed against them."))
     last_reported_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -38,11 +49,16 @@ class Location(models.Model):
         ordering = ['municipality', 'name']
         verbose_name = _("Location")
         verbose_name_plural = _("Locations")
+        indexes = [
+            GinIndex(fields=['search_vector'], name='locations_search_idx'),
+            # Fuzzy (typo-tolerant) name matching.
+            GinIndex(fields=['name'], name='locations_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.municipality.name})"
 
-    # QR code generation is now handled by a post_save signal in locations/signals.py
+    # QR codes are rendered asynchronously; see locations/qr.py and locations/tasks.py
 
     @property
     def latitude(self):
@@ -0,0 +1,104 @@
+"""
+QR code rendering for Locations.
+
+A location's QR image is a pure function of its payload (FRONTEND_URL and the
+location id) and the render parameters, so the SHA-256 of those inputs is stored
+next to the image as `qr_code_hash`. A location is only (re)rendered when that
+hash is missing or stale, e.g. after FRONTEND_URL changes. Rendering is CPU-bound
+and is done outside any request: single locations by a Celery task, bulk runs in
+chunks spread over Celery workers or a local process pool.
+"""
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import qrcode
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import Location, qr_code_upload_path
+
+# Part of the content hash: changing the rendering invalidates every stored image.
+QR_RENDER_VERSION = 'v1:L:10:4'
+
+def qr_payload(location_id):
+    frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
+    return f"{frontend_url}/report/new/{location_id}"
+
+def qr_content_hash(location_id):
+    return hashlib.sha256(f'{QR_RENDER_VERSION}|{qr_payload(location_id)}'.encode('utf-8')).hexdigest()
+
+def needs_qr_code(location):
+    return not location.qr_code_image or location.qr_code_hash != qr_content_hash(location.id)
+
+def render_qr_png(payload):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def _render_job(job):
+    # Module-level so that it can be pickled for the process pool.
+    location_id, payload = job
+    return location_id, render_qr_png(payload)
+
+def stale_location_ids(location_ids=None, chunk_size=2000):
+    """Yields the ids of locations whose QR image is missing or was rendered from other inputs."""
+    locations = Location.objects.order_by()
+    if location_ids is not None:
+        locations = locations.filter(pk__in=location_ids)
+    for location_id, image, content_hash in locations.values_list('id', 'qr_code_image', 'qr_code_hash').iterator(chunk_size=chunk_size):
+        if not image or content_hash != qr_content_hash(location_id):
+            yield location_id
+
+def generate_qr_codes(location_ids, workers=1):
+    """
+    Renders and stores QR images for the given locations, skipping any whose
+    stored hash is current. With `workers` > 1 the PNGs are rendered in a process
+    pool. Returns the number of images written.
+    """
+    locations = {
+        location.id: location
+        for location in Location.objects.filter(pk__in=list(location_ids)).select_related('municipality')
+        if needs_qr_code(location)
+    }
+    if not locations:
+        return 0
+
+    jobs = [(location_id, qr_payload(location_id)) for location_id in locations]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rendered = list(executor.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        rendered = [_render_job(job) for job in jobs]
+
+    old_names = []
+    for location_id, png in rendered:
+        location = locations[location_id]
+        if location.qr_code_image:
+            old_names.append(location.qr_code_image.name)
+        location.qr_code_hash = qr_content_hash(location_id)
+        location.qr_code_image.name = default_storage.save(
+            qr_code_upload_path(location, f'qr_{location.qr_code_hash[:16]}.png'), BytesIO(png)
+        )
+
+    # An UPDATE of just these two columns rather than save(): no post_save re-entry
+    # and no lost update if another field of the location is edited concurrently.
+    Location.objects.bulk_update(locations.values(), ['qr_code_image', 'qr_code_hash'], batch_size=500)
+    current_names = {location.qr_code_image.name for location in locations.values()}
+    stale_names = [name for name in old_names if name not in current_names]
+    if stale_names:
+        transaction.on_commit(lambda: _delete_files(stale_names))
+    return len(rendered)
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
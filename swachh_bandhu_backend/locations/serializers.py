@@ -35,12 +35,23 @@ class LocationCreateUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class LocationImportRowSerializer(serializers.ModelSerializer):
+    """One row of a bulk import; the municipality is fixed for the whole import."""
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+    class Meta:
+        model = Location
+        fields = ('name', 'description', 'location_type', 'latitude', 'longitude', 'is_active', 'geofence_radius')
+
+
 class LocationReadSerializer(serializers.ModelSerializer):
     municipality = serializers.UUIDField(source='municipality.id', read_only=True)
     municipality_name = serializers.CharField(source='municipality.name', read_only=True)
     qr_code_url = serializers.ImageField(source='qr_code_image', read_only=True)
     latitude = serializers.FloatField(source='point.y', read_only=True)
     longitude = serializers.FloatField(source='point.x', read_only=True)
+    distance = serializers.SerializerMethodField()
     
     class Meta:
         model = Location
@@ -48,5 +59,9 @@ class LocationReadSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'location_type', 
             'municipality', 'municipality_name',
             'qr_code_url', 'is_active', 'latitude', 'longitude', 'geofence_radius',
-            'last_reported_at'
-        ]
\ No newline at end of file
+            'last_reported_at', 'distance'
+        ]
+
+    def get_distance(self, obj):
+        # Meters from the `near` point; only annotated on distance queries.
+        return getattr(obj, 'distance', None)
\ No newline at end of file
@@ -0,0 +1,30 @@
+from celery import shared_task
+from django.conf import settings
+from . import qr
+
+def _chunked(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def queue_qr_code_generation(location_ids):
+    """Splits the locations into batches and renders each on whichever Celery worker picks it up."""
+    location_ids = [str(location_id) for location_id in location_ids]
+    batches = list(_chunked(location_ids, settings.QR_CODE_BATCH_SIZE))
+    for batch in batches:
+        generate_qr_code_batch.delay(batch)
+    return len(batches)
+
+@shared_task
+def generate_location_qr_code(location_id):
+    qr.generate_qr_codes([location_id])
+
+@shared_task
+def generate_qr_code_batch(location_ids):
+    written = qr.generate_qr_codes(location_ids)
+    return f"Rendered {written} QR codes."
+
+@shared_task
+def refresh_stale_qr_codes():
+    """Queues every location whose QR image is missing or stale, e.g. after FRONTEND_URL changed."""
+    batches = queue_qr_code_generation(list(qr.stale_location_ids()))
+    return f"Queued {batches} QR code batches."
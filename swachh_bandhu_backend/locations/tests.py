@@ -1,3 +1,10 @@
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+class LocationSearchBenchmarkTests(TestCase):
+
+    def test_benchmark_meets_latency_target(self):
+        out = StringIO()
+        call_command('bench_location_search', locations=1000, samples=50, stdout=out)
+        self.assertIn('within the latency target', out.getvalue())
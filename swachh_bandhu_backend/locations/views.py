@@ -1,16 +1,23 @@
-from rest_framework import viewsets, permissions, filters
+import json
+from rest_framework import viewsets, permissions, filters, parsers
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Location
+from . import importer
+from .filters import LocationGeoFilter
 from .serializers import LocationReadSerializer, LocationCreateUpdateSerializer
 from core.permissions import IsMunicipalAdmin
+from core.search import FullTextSearchFilter
 
 class LocationViewSet(viewsets.ModelViewSet):
     queryset = Location.objects.all().select_related('municipality')
     lookup_field = 'id'
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter, LocationGeoFilter]
     filterset_fields = ['municipality', 'location_type', 'is_active']
-    search_fields = ['name', 'description']
+    search_trigram_fields = ['name']
     ordering_fields = ['name', 'created_at', 'last_reported_at']
     ordering = ['-created_at']
 
@@ -19,8 +26,14 @@ class LocationViewSet(viewsets.ModelViewSet):
             return LocationCreateUpdateSerializer
         return LocationReadSerializer
 
+    def paginate_queryset(self, queryset):
+        # `near` results are already capped and ordered by distance; paging them would only add a COUNT.
+        if self.request.query_params.get('near'):
+            return None
+        return super().paginate_queryset(queryset)
+
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import']:
             self.permission_classes = [IsMunicipalAdmin]
         else:
             self.permission_classes = [permissions.IsAuthenticated]
@@ -40,4 +53,42 @@ class LocationViewSet(viewsets.ModelViewSet):
             return qs.filter(municipality=user.municipality)
         
         # Citizens see all active locations
-        return qs.filter(is_active=True)
\ No newline at end of file
+        return qs.filter(is_active=True)
+
+    @action(detail=False, methods=['post'], url_path='bulk-import', parser_classes=[parsers.MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Imports a CSV or GeoJSON `file` into the admin's municipality. The response
+        streams one JSON event per line (row errors, per-chunk progress, summary).
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            raise ValidationError({"file": "A CSV or GeoJSON file is required."})
+        municipality = request.user.municipality
+        if not municipality:
+            raise ValidationError({"municipality": "Your account is not assigned to a municipality."})
+
+        file_format = request.data.get('format') or importer.detect_format(upload.name)
+        if file_format not in importer.FORMATS:
+            raise ValidationError({"format": f"Must be one of: {', '.join(importer.FORMATS)}."})
+        try:
+            rows = importer.parse_rows(upload.file, file_format)
+            # Parse the header/document up front so that a malformed file is a 400 rather than a broken stream.
+            first_row = next(rows, None)
+        except importer.LocationImportError as exc:
+            raise ValidationError({"file": str(exc)})
+
+        def events():
+            remaining = rows if first_row is None else _prepend(first_row, rows)
+            try:
+                for event in importer.import_locations(municipality, remaining):
+                    yield json.dumps(event) + '\n'
+            except importer.LocationImportError as exc:
+                yield json.dumps({'event': 'failed', 'error': str(exc)}) + '\n'
+
+        return StreamingHttpResponse(events(), content_type='application/x-ndjson')
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
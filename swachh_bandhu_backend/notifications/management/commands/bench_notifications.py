@@ -0,0 +1,94 @@
+import socketserver
+import threading
+from django.conf import settings
+from django.core.mail import get_connection, send_mail
+from django.core.management.base import BaseCommand
+from core.bench import rolled_back, synthetic_users, timed
+from notifications.models import Notification
+from notifications.services import dispatch_pending_notifications
+
+class _SMTPStandIn(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; counts connections and messages on the server."""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply('220 localhost SMTP stand-in')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self._reply('250 localhost')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.messages += 1
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    connections = 0
+    messages = 0
+
+class Command(BaseCommand):
+    help = (
+        'Compares one-connection-per-email delivery with the batched outbox dispatcher against a local '
+        'SMTP stand-in and reports messages/minute. All synthetic data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=2000, help='Fewer users than messages exercises digesting.')
+
+    def handle(self, *args, **options):
+        server = _SMTPServer(('127.0.0.1', 0), _SMTPStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+
+        def connection():
+            return get_connection('django.core.mail.backends.smtp.EmailBackend', host=host, port=port, use_tls=False, use_ssl=False)
+
+        count = options['messages']
+
+        def send_legacy():
+            for i in range(count):
+                send_mail('Legacy', 'One connection per email.', settings.DEFAULT_FROM_EMAIL, [f'legacy{i}@example.invalid'], connection=connection())
+
+        _, legacy_elapsed = timed(send_legacy)
+        legacy_connections, server.connections, server.messages = server.connections, 0, 0
+
+        def dispatch_all():
+            sent = 0
+            while True:
+                result = dispatch_pending_notifications(connection=connection())
+                if not result['sent']:
+                    return sent
+                sent += result['sent']
+
+        with rolled_back():
+            users = synthetic_users(max(1, options['users']))
+            Notification.objects.bulk_create([
+                Notification(
+                    user=users[i % len(users)], email=users[i % len(users)].email, kind=Notification.Kind.BADGE_EARNED,
+                    context={'full_name': users[i % len(users)].full_name, 'badge': 'Benchmark', 'description': 'Synthetic badge.'}
+                ) for i in range(count)
+            ])
+            sent, batched_elapsed = timed(dispatch_all)
+        server.shutdown()
+
+        self.stdout.write(f'legacy:  {count} emails, {legacy_connections} connections, {count / legacy_elapsed * 60:,.0f} messages/min')
+        self.stdout.write(
+            f'outbox:  {sent} notifications as {server.messages} emails, {server.connections} connections, '
+            f'{sent / batched_elapsed * 60:,.0f} notifications/min'
+        )
@@ -1,3 +1,37 @@
 from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+class Notification(models.Model):
+    """
+    An outbound email waiting in the outbox. Only the template context is stored;
+    the dispatcher renders and sends pending notifications in batches.
+    """
+    class Kind(models.TextChoices):
+        REPORT_STATUS_CHANGED = 'REPORT_STATUS_CHANGED', _('Report Status Changed')
+        BADGE_EARNED = 'BADGE_EARNED', _('Badge Earned')
+        LOTTERY_WON = 'LOTTERY_WON', _('Lottery Won')
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        SENDING = 'SENDING', _('Sending')
+        SENT = 'SENT', _('Sent')
+        FAILED = 'FAILED', _('Failed')
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    email = models.EmailField(help_text=_("Recipient address at the time the notification was queued."))
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    context = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text=_("When a dispatcher claimed it for sending; the claim lapses after the send lease."))
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.email} ({self.status})"
@@ -0,0 +1,133 @@
+"""
+Notification outbox.
+
+Events queue a Notification row (recipient plus template context) instead of an
+email task. The dispatcher drains pending rows in batches: templates are compiled
+once per worker process, a recipient with several pending notifications gets a single
+digest, and the whole batch goes out over one SMTP connection.
+
+A batch is claimed in a short transaction (marked SENDING with a lease
+timestamp) and sent after it commits, so a slow mail server never holds row
+locks or an open transaction. If a dispatcher dies mid-batch, its claim lapses
+after NOTIFICATION_SEND_LEASE_SECONDS and the rows are picked up again.
+"""
+from datetime import timedelta
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template import Context, Engine
+from django.utils import timezone
+from .models import Notification
+
+DISPATCH_SCHEDULED_KEY = 'notifications:dispatch-scheduled'
+TEMPLATE_PREFIX = 'notifications/email/'
+
+# The engine's cached loader compiles each template once per process.
+_engine = Engine(app_dirs=True)
+
+def enqueue_notification(user, kind, **context):
+    """Queues an email for the user; nothing is sent until the dispatcher runs."""
+    if not user or not user.email:
+        return None
+    context.setdefault('full_name', user.full_name)
+    notification = Notification.objects.create(user=user, email=user.email, kind=kind, context=context)
+    transaction.on_commit(schedule_dispatch)
+    return notification
+
+def schedule_dispatch():
+    # Collapse a burst of notifications into one dispatch per window, which is also what lets them be digested.
+    delay = settings.NOTIFICATION_DISPATCH_DELAY_SECONDS
+    if cache.add(DISPATCH_SCHEDULED_KEY, True, delay):
+        from .tasks import dispatch_notifications
+        dispatch_notifications.apply_async(countdown=delay)
+
+def _render(name, context):
+    # Plain-text email, so no HTML autoescaping of names and descriptions.
+    return _engine.get_template(f'{TEMPLATE_PREFIX}{name}.txt').render(Context(context, autoescape=False))
+
+def _render_item(notification):
+    prefix = notification.kind.lower()
+    return {
+        'subject': _render(f'{prefix}_subject', notification.context).strip(),
+        'body': _render(f'{prefix}_body', notification.context),
+    }
+
+def _build_messages(notifications):
+    """Returns (EmailMessage, [notification ids]) pairs, one message per recipient or per notification."""
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.email].append(notification)
+
+    messages = []
+    for email, pending in by_recipient.items():
+        items = [_render_item(notification) for notification in pending]
+        full_name = pending[-1].context.get('full_name', '')
+        if len(pending) >= settings.NOTIFICATION_DIGEST_THRESHOLD:
+            context = {'full_name': full_name, 'items': items, 'count': len(items)}
+            subject = _render('digest_subject', context).strip()
+            body = _render('digest_body', context)
+            messages.append((EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email]), [n.pk for n in pending]))
+            continue
+        for notification, item in zip(pending, items):
+            body = _render('message', {'full_name': full_name, 'body': item['body']})
+            messages.append((EmailMessage(item['subject'], body, settings.DEFAULT_FROM_EMAIL, [email]), [notification.pk]))
+    return messages
+
+def _claim_batch(batch_size):
+    now = timezone.now()
+    lapsed = now - timedelta(seconds=settings.NOTIFICATION_SEND_LEASE_SECONDS)
+    with transaction.atomic():
+        notifications = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Notification.Status.PENDING) | Q(status=Notification.Status.SENDING, claimed_at__lt=lapsed))
+            .order_by('created_at')[:batch_size]
+        )
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            status=Notification.Status.SENDING, claimed_at=now
+        )
+    return notifications, now
+
+def dispatch_pending_notifications(batch_size=None, connection=None):
+    """
+    Sends one batch of pending notifications over a single connection. A message
+    that fails is retried on later runs until NOTIFICATION_MAX_ATTEMPTS, then
+    marked FAILED. Returns a dict with the notifications sent and failed.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    notifications, claimed_at = _claim_batch(batch_size)
+    if not notifications:
+        return {'sent': 0, 'failed': 0}
+
+    messages = _build_messages(notifications)
+    sent_ids, errors = [], {}
+    connection = connection or get_connection(fail_silently=False)
+    with connection:
+        for message, notification_ids in messages:
+            try:
+                # Each message on its own so one bad address does not fail the batch; the connection stays open.
+                connection.send_messages([message])
+                sent_ids.extend(notification_ids)
+            except Exception as exc:
+                for notification_id in notification_ids:
+                    errors[notification_id] = str(exc)
+
+    # Only rows still under this claim; a lapsed claim may already belong to another dispatcher.
+    claimed = Notification.objects.filter(status=Notification.Status.SENDING, claimed_at=claimed_at)
+    claimed.filter(pk__in=sent_ids).update(status=Notification.Status.SENT, sent_at=timezone.now())
+    failed = [notification for notification in notifications if notification.pk in errors]
+    for notification in failed:
+        notification.attempts += 1
+        notification.last_error = errors[notification.pk]
+        notification.status = (
+            Notification.Status.FAILED if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS
+            else Notification.Status.PENDING
+        )
+    still_claimed = set(claimed.filter(pk__in=[n.pk for n in failed]).values_list('pk', flat=True))
+    Notification.objects.bulk_update(
+        [notification for notification in failed if notification.pk in still_claimed], ['attempts', 'last_error', 'status']
+    )
+
+    return {'sent': len(sent_ids), 'failed': len(failed)}
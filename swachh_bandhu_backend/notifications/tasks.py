@@ -1,9 +1,11 @@
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
-from users.models import User
+from django.core.cache import cache
 from reports.models import Report
 from gamification.models import UserBadge, Lottery
+from .models import Notification
+from . import services
 
 @shared_task(rate_limit='10/m')
 def send_email_task(subject, message, recipient_list):
@@ -21,58 +23,53 @@ def send_email_task(subject, message, recipient_list):
         # logger.error(f"Failed to send email to {recipient_list}: {str(e)}")
         return f"Failed to send email to {recipient_list}: {str(e)}"
 
+@shared_task
+def dispatch_notifications():
+    """Drains the notification outbox in batches over one SMTP connection each."""
+    cache.delete(services.DISPATCH_SCHEDULED_KEY)
+    sent = failed = 0
+    for _ in range(settings.NOTIFICATION_MAX_BATCHES_PER_RUN):
+        result = services.dispatch_pending_notifications()
+        sent += result['sent']
+        failed += result['failed']
+        # Stop once a batch sends nothing, rather than retrying the same failures back to back.
+        if not result['sent']:
+            break
+    return f"Sent {sent} notifications, {failed} failed."
+
 @shared_task
 def notify_user_of_status_change(report_id):
     try:
-        report = Report.objects.select_related('user', 'location').get(pk=report_id)
-        user = report.user
-        if user and user.email:
-            subject = f"Update on your Swachh Bandhu Report #{report.id}"
-            message = (
-                f"Hello {user.full_name},\n\n"
-                f"Your report regarding '{report.issue_category.name}' at '{report.location.name}' has been updated.\n"
-                f"The new status is: {report.get_status_display()}.\n\n"
-                f"Thank you for your contribution to a cleaner community!\n\n"
-                "The Swachh Bandhu Team"
-            )
-            send_email_task.delay(subject, message, [user.email])
+        report = Report.objects.select_related('user', 'location', 'issue_category').get(pk=report_id)
     except Report.DoesNotExist:
-        pass
+        return
+    services.enqueue_notification(
+        report.user, Notification.Kind.REPORT_STATUS_CHANGED,
+        report_id=report.id, category=report.issue_category.name,
+        location=report.location.name, status=report.get_status_display()
+    )
 
 @shared_task
 def notify_user_of_new_badge(user_badge_id):
     try:
         user_badge = UserBadge.objects.select_related('user', 'badge').get(pk=user_badge_id)
-        user = user_badge.user
-        badge = user_badge.badge
-        if user and user.email:
-            subject = f"Congratulations! You've earned the '{badge.name}' badge!"
-            message = (
-                f"Hello {user.full_name},\n\n"
-                f"Amazing work! You have just earned the '{badge.name}' badge.\n\n"
-                f"Description: {badge.description}\n\n"
-                "Keep up the great work and continue to make a difference!\n\n"
-                "The Swachh Bandhu Team"
-            )
-            send_email_task.delay(subject, message, [user.email])
     except UserBadge.DoesNotExist:
-        pass
+        return
+    services.enqueue_notification(
+        user_badge.user, Notification.Kind.BADGE_EARNED,
+        badge=user_badge.badge.name, description=user_badge.badge.description
+    )
 
 @shared_task
 def notify_lottery_winner(lottery_id):
     try:
         lottery = Lottery.objects.select_related('winner').get(pk=lottery_id)
-        winner = lottery.winner
-        if winner and winner.email:
-            subject = f"You're a Winner! Congratulations from Swachh Bandhu!"
-            message = (
-                f"Hello {winner.full_name},\n\n"
-                f"Congratulations! You have won the '{lottery.name}' lottery.\n\n"
-                f"Description: {lottery.description}\n\n"
-                "We will be in touch shortly with details on how to claim your prize.\n"
-                "Thank you for being an active member of the Swachh Bandhu community!\n\n"
-                "The Swachh Bandhu Team"
-            )
-            send_email_task.delay(subject, message, [winner.email])
     except Lottery.DoesNotExist:
-        pass
\ No newline at end of file
+        return
+    # Lotteries drawn before multi-winner draws only have `winner`.
+    winners = [winner.user for winner in lottery.winners.select_related('user')] or [lottery.winner]
+    for winner in winners:
+        services.enqueue_notification(
+            winner, Notification.Kind.LOTTERY_WON,
+            lottery=lottery.name, description=lottery.description
+        )
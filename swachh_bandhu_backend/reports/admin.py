@@ -1,10 +1,12 @@
 from django.contrib import admin
-from .models import Report, ReportMedia
+from .models import Report, ReportMedia, MediaUpload
+from .moderation import record_status_change, set_report_status
 
 class ReportMediaInline(admin.TabularInline):
     model = ReportMedia
     extra = 1
-    readonly_fields = ('uploaded_at',)
+    fields = ('file', 'processing_status', 'width', 'height', 'size_bytes', 'display', 'thumbnail', 'uploaded_at')
+    readonly_fields = ('processing_status', 'width', 'height', 'size_bytes', 'display', 'thumbnail', 'uploaded_at')
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
@@ -31,14 +33,32 @@ class ReportAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_verified', 'mark_as_rejected', 'mark_as_actioned']
 
+    def save_model(self, request, obj, form, change):
+        old_status = form.initial.get('status', obj.status) if change else obj.status
+        previous_updated_at = obj.updated_at
+        super().save_model(request, obj, form, change)
+        if change:
+            record_status_change(obj, old_status, previous_updated_at, request.user, obj.moderator_notes or "Status changed in admin.")
+
+    def _set_status(self, request, queryset, status):
+        changed = set_report_status(queryset, status, request.user, "Status changed in admin.")
+        self.message_user(request, f"{changed} reports marked as {status}.")
+
     @admin.action(description='Mark selected reports as VERIFIED')
     def mark_as_verified(self, request, queryset):
-        queryset.update(status=Report.ReportStatus.VERIFIED)
+        self._set_status(request, queryset, Report.ReportStatus.VERIFIED)
 
     @admin.action(description='Mark selected reports as REJECTED')
     def mark_as_rejected(self, request, queryset):
-        queryset.update(status=Report.ReportStatus.REJECTED)
+        self._set_status(request, queryset, Report.ReportStatus.REJECTED)
 
     @admin.action(description='Mark selected reports as ACTIONED')
     def mark_as_actioned(self, request, queryset):
-        queryset.update(status=Report.ReportStatus.ACTIONED)
\ No newline at end of file
+        self._set_status(request, queryset, Report.ReportStatus.ACTIONED)
+
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'content_type', 'size_bytes', 'status', 'created_at')
+    list_filter = ('status', 'content_type')
+    search_fields = ('user__email', 'key')
+    readonly_fields = ('id', 'user', 'key', 'content_type', 'size_bytes', 'created_at')
@@ -0,0 +1,64 @@
+"""
+Flat, streamed exports of a municipality's reports and the rows hanging off them.
+Every dataset is driven by an already scoped and filtered Report queryset.
+"""
+from django.contrib.contenttypes.models import ContentType
+from core.exports import stream_export
+from locations.geo import PointX, PointY
+from gamification.models import PointLog
+from .models import Report, ReportStatusHistory
+
+DATASET_REPORTS = 'reports'
+DATASET_STATUS_HISTORY = 'status_history'
+DATASET_POINT_LOGS = 'point_logs'
+DATASETS = (DATASET_REPORTS, DATASET_STATUS_HISTORY, DATASET_POINT_LOGS)
+
+REPORT_COLUMNS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('status', 'status'),
+    ('severity', 'severity'),
+    ('issue_category', 'issue_category__name'),
+    ('location_id', 'location_id'),
+    ('location_name', 'location__name'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('user_email', 'user__email'),
+    ('verifies_report_id', 'verifies_report_id'),
+    ('verification_count', 'verification_count'),
+    ('points_awarded', 'points_awarded'),
+    ('description', 'description'),
+]
+
+STATUS_HISTORY_COLUMNS = [
+    ('id', 'id'),
+    ('report_id', 'report_id'),
+    ('status', 'status'),
+    ('timestamp', 'timestamp'),
+    ('changed_by_email', 'changed_by__email'),
+    ('notes', 'notes'),
+]
+
+POINT_LOG_COLUMNS = [
+    ('id', 'id'),
+    ('report_id', 'object_id'),
+    ('user_email', 'user__email'),
+    ('points', 'points'),
+    ('reason', 'reason'),
+    ('timestamp', 'timestamp'),
+]
+
+def export_reports(reports, dataset, export_format):
+    """Streams `dataset` for the given Report queryset; rows are in primary key order."""
+    report_ids = reports.order_by().values('pk')
+    if dataset == DATASET_STATUS_HISTORY:
+        rows = ReportStatusHistory.objects.filter(report__in=report_ids).order_by('id')
+        return stream_export(rows, STATUS_HISTORY_COLUMNS, export_format, 'report_status_history')
+    if dataset == DATASET_POINT_LOGS:
+        rows = PointLog.objects.filter(
+            content_type=ContentType.objects.get_for_model(Report), object_id__in=report_ids
+        ).order_by('id')
+        return stream_export(rows, POINT_LOG_COLUMNS, export_format, 'report_point_logs')
+    rows = reports.annotate(latitude=PointY('location__point'), longitude=PointX('location__point')).order_by('id')
+    return stream_export(rows, REPORT_COLUMNS, export_format, 'reports')
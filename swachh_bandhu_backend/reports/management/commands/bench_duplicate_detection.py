@@ -0,0 +1,48 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from core.bench import check_p99, latency_percentiles, rolled_back, synthetic_locations, synthetic_municipality, synthetic_users
+from reports.models import Report, IssueCategory
+from reports.services import find_nearby_duplicate_report
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks submit-time duplicate detection against a synthetic city and fails if the '
+        'p99 latency exceeds the target. All synthetic data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=20000)
+        parser.add_argument('--reports', type=int, default=100000)
+        parser.add_argument('--samples', type=int, default=1000, help='Duplicate lookups to time.')
+        parser.add_argument('--p99-ms', type=float, default=25.0, help='Maximum acceptable p99 latency in milliseconds.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with rolled_back():
+            municipality = synthetic_municipality()
+            category = IssueCategory.objects.create(municipality=municipality, name='Overflowing Bin')
+            user, = synthetic_users(1)
+            # Roughly a 20 km x 20 km city.
+            locations = synthetic_locations(municipality, options['locations'], rng, spread=0.1)
+            Report.objects.bulk_create([
+                Report(user=user, location=rng.choice(locations), issue_category=category, description='Benchmark report')
+                for _ in range(options['reports'])
+            ], batch_size=5000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE locations_location')
+                cursor.execute('ANALYZE reports_report')
+
+            timings = []
+            for _ in range(options['samples']):
+                location = rng.choice(locations)
+                started = time.perf_counter()
+                find_nearby_duplicate_report(location, category)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f'{options["samples"]} lookups over {options["locations"]} locations / {options["reports"]} reports')
+        check_p99(self.stdout, {'duplicates': latency_percentiles(timings)}, options['p99_ms'])
+        self.stdout.write(self.style.SUCCESS('Duplicate detection is within the latency target.'))
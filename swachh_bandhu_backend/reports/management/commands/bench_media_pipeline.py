@@ -0,0 +1,70 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw
+from core.bench import timed
+from reports.media import process_image
+
+class Command(BaseCommand):
+    help = (
+        'Measures report photo processing throughput (images/sec, and per core) on synthetic '
+        'phone-sized JPEGs carrying GPS EXIF, serially and in a process pool, and checks that '
+        'no output keeps the metadata. Needs no database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=24)
+        parser.add_argument('--width', type=int, default=4032)
+        parser.add_argument('--height', type=int, default=3024)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def _photo(self, seed, width, height):
+        rng = random.Random(seed)
+        image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(200):
+            x, y = rng.randrange(width), rng.randrange(height)
+            draw.ellipse((x, y, x + rng.randrange(50, 600), y + rng.randrange(50, 600)), fill=tuple(rng.randrange(256) for _ in range(3)))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotated 90 degrees
+        exif[0x8825] = {1: 'N', 2: (21.0, 8.0, 45.0), 3: 'E', 4: (79.0, 5.0, 17.0)}  # GPSInfo
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=92, exif=exif)
+        return buffer.getvalue()
+
+    def _check(self, result, width, height):
+        if result is None:
+            raise CommandError('A synthetic photo was rejected.')
+        # Orientation 6 means the upright image is portrait.
+        if (result['width'], result['height']) != (height, width):
+            raise CommandError('The original was not rotated upright.')
+        outputs = [result['original']] + [variant['data'] for variant in result['variants'].values()]
+        for data in outputs:
+            with Image.open(BytesIO(data)) as image:
+                if image.getexif():
+                    raise CommandError('EXIF metadata survived processing.')
+
+    def handle(self, *args, **options):
+        width, height, count, workers = options['width'], options['height'], options['images'], options['workers']
+        photos = [self._photo(i, width, height) for i in range(count)]
+        self.stdout.write(f'{count} synthetic {width}x{height} JPEGs, {sum(map(len, photos)) / count / 1024:.0f} KiB on average')
+
+        serial, elapsed = timed(lambda: [process_image(photo) for photo in photos])
+        serial_rate = count / elapsed
+        for result in serial:
+            self._check(result, width, height)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pooled, elapsed = timed(lambda: list(executor.map(process_image, photos)))
+        pooled_rate = count / elapsed
+        for result in pooled:
+            self._check(result, width, height)
+
+        result = serial[0]
+        sizes = ', '.join(f"{name} {variant['width']}x{variant['height']} {len(variant['data']) / 1024:.0f} KiB" for name, variant in result['variants'].items())
+        self.stdout.write(f'variants: {sizes}')
+        self.stdout.write(f'serial: {serial_rate:.2f} images/sec')
+        self.stdout.write(f'{workers} workers: {pooled_rate:.2f} images/sec ({pooled_rate / workers:.2f} per core)')
+        self.stdout.write(self.style.SUCCESS('EXIF stripped from every output.'))
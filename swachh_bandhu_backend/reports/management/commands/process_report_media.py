@@ -0,0 +1,29 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from reports import media
+from reports.tasks import queue_media_processing
+
+class Command(BaseCommand):
+    help = 'Processes every pending report upload (EXIF stripping, WebP variants), locally in a process pool or on Celery workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Local processes.')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--queue', action='store_true', help='Dispatch batches to Celery instead of processing here.')
+
+    def handle(self, *args, **options):
+        media_ids = list(media.pending_media_ids())
+        if options['queue']:
+            batches = queue_media_processing(media_ids)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(media_ids)} uploads in {batches} batches.'))
+            return
+
+        started = time.perf_counter()
+        processed = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(media_ids), batch_size):
+            processed += media.process_report_media(media_ids[start:start + batch_size], workers=options['workers'])
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images in {elapsed:.1f}s ({rate:,.1f}/s).'))
@@ -0,0 +1,168 @@
+"""
+Processing of uploaded report photos.
+
+Phones upload multi-megabyte photos that carry EXIF metadata, including the GPS
+position of the reporter. Each image is processed once, after upload:
+
+- The original is rotated upright and re-encoded without its metadata (HEIC
+  photos as JPEG).
+- A screen-sized and a thumbnail WebP variant are generated.
+- The dimensions and byte sizes of the original and of each variant are recorded.
+
+Decoding and encoding are CPU-bound and run outside any request. New uploads are
+handled by Celery tasks, and backlogs by a local process pool (see the
+process_report_media command). Files Pillow cannot read, such as videos, are
+marked UNSUPPORTED and served as uploaded: at creation when the upload is known
+not to be an image, otherwise from the file header before anything else is read.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pillow_heif import register_heif_opener
+from .models import ReportMedia
+
+# iPhones upload HEIC by default; decoding it is what lets its EXIF be stripped.
+register_heif_opener()
+
+# Longest side in pixels, per variant.
+VARIANT_SIZES = {'display': 1280, 'thumbnail': 320}
+WEBP_QUALITY = 80
+ORIGINAL_JPEG_QUALITY = 92
+# Refuse decompression bombs well before Pillow's own limit.
+MAX_PIXELS = 50_000_000
+# Originals in these formats are re-encoded as JPEG.
+JPEG_FORMATS = ('JPEG', 'MPO', 'HEIF')
+
+def _encode(image, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+def process_image(data):
+    """
+    Returns the EXIF-free original and its WebP variants for raw image bytes, or
+    None if the bytes are not a supported image. Pure function of its input, so
+    that it can run in a worker process.
+    """
+    try:
+        with Image.open(BytesIO(data)) as source:
+            if source.width * source.height > MAX_PIXELS:
+                return None
+            source_format = source.format
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+
+    # Saving without exif=/icc_profile= is what drops the metadata. Multi-frame phone
+    # photos (MPO) are JPEGs whose first frame is the picture; HEIC is served as JPEG,
+    # which every browser can show.
+    if source_format in JPEG_FORMATS or image.mode not in ('RGB', 'RGBA', 'L', 'P'):
+        image = image.convert('RGB')
+        original = _encode(image, 'JPEG', quality=ORIGINAL_JPEG_QUALITY, optimize=True)
+        extension = 'jpg'
+    else:
+        original = _encode(image, source_format or 'PNG')
+        extension = (source_format or 'PNG').lower()
+
+    result = {
+        'original': original, 'extension': extension,
+        'width': image.width, 'height': image.height, 'variants': {},
+    }
+    for name, size in VARIANT_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        encoded = _encode(variant, 'WEBP', quality=WEBP_QUALITY, method=4)
+        result['variants'][name] = {'data': encoded, 'width': variant.width, 'height': variant.height}
+    return result
+
+def _process_job(job):
+    # Module-level so that it can be pickled for the process pool.
+    media_id, data = job
+    return media_id, process_image(data)
+
+def pending_media_ids(chunk_size=2000):
+    yield from ReportMedia.objects.filter(
+        processing_status=ReportMedia.ProcessingStatus.PENDING
+    ).order_by('uploaded_at').values_list('id', flat=True).iterator(chunk_size=chunk_size)
+
+def is_image(handle):
+    """Whether Pillow recognises the file; reads the header only and rewinds."""
+    try:
+        with Image.open(handle):
+            return True
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return False
+    finally:
+        handle.seek(0)
+
+def _read_image(media):
+    # Videos and other non-images are recognised from their header, without reading them whole.
+    with media.file.open('rb') as handle:
+        return handle.read() if is_image(handle) else None
+
+def process_report_media(media_ids, workers=1):
+    """
+    Processes the given pending ReportMedia rows, with `workers` > 1 in a process
+    pool. Returns the number of images processed.
+    """
+    media_by_id = {
+        media.id: media
+        for media in ReportMedia.objects.filter(
+            pk__in=list(media_ids), processing_status=ReportMedia.ProcessingStatus.PENDING
+        ).select_related('report__location')
+    }
+    if not media_by_id:
+        return 0
+
+    jobs = []
+    for media_id, media in media_by_id.items():
+        data = _read_image(media)
+        if data is None:
+            media.processing_status = ReportMedia.ProcessingStatus.UNSUPPORTED
+        else:
+            jobs.append((media_id, data))
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_process_job, jobs))
+    else:
+        results = [_process_job(job) for job in jobs]
+
+    replaced_names, processed = [], 0
+    for media_id, result in results:
+        media = media_by_id[media_id]
+        if result is None:
+            media.processing_status = ReportMedia.ProcessingStatus.UNSUPPORTED
+            continue
+        stem = os.path.splitext(os.path.basename(media.file.name))[0]
+        replaced_names.append(media.file.name)
+        media.file.save(f"{stem}.{result['extension']}", ContentFile(result['original']), save=False)
+        for name, variant in result['variants'].items():
+            getattr(media, name).save(f'{stem}_{name}.webp', ContentFile(variant['data']), save=False)
+        media.width, media.height = result['width'], result['height']
+        media.size_bytes = len(result['original'])
+        media.variants = {
+            name: {'width': variant['width'], 'height': variant['height'], 'bytes': len(variant['data'])}
+            for name, variant in result['variants'].items()
+        }
+        media.processing_status = ReportMedia.ProcessingStatus.READY
+        processed += 1
+
+    ReportMedia.objects.bulk_update(
+        media_by_id.values(),
+        ['file', 'thumbnail', 'display', 'width', 'height', 'size_bytes', 'variants', 'processing_status']
+    )
+    # The originals with metadata are gone only once the rows point at their replacements.
+    current_names = {media.file.name for media in media_by_id.values()}
+    stale_names = [name for name in replaced_names if name not in current_names]
+    if stale_names:
+        transaction.on_commit(lambda: _delete_files(stale_names))
+    return processed
+
+def _delete_files(names):
+    storage = ReportMedia._meta.get_field('file').storage
+    for name in names:
+        storage.delete(name)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_location_point_geography_index'),
+        ('reports', '0004_alter_report_points_awarded_alter_report_status_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['-created_at', '-id'], name='reports_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='reports_user_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:00
+
+import reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportmedia',
+            name='display',
+            field=models.FileField(blank=True, help_text='Screen-sized WebP variant.', upload_to=reports.models.report_media_upload_path),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('UNSUPPORTED', 'Not an image')], default='PENDING', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='size_bytes',
+            field=models.PositiveIntegerField(blank=True, help_text='Size of the stored original, after EXIF stripping.', null=True),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='thumbnail',
+            field=models.FileField(blank=True, help_text='Small WebP variant for lists.', upload_to=reports.models.report_media_upload_path),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Width, height and bytes of each generated variant.'),
+        ),
+        migrations.AddField(
+            model_name='reportmedia',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
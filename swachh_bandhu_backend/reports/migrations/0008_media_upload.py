@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:03
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_report_media_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(help_text='Object key in the default storage.', max_length=255, unique=True)),
+                ('content_type', models.CharField(max_length=100)),
+                ('size_bytes', models.PositiveBigIntegerField(help_text='Size declared by the client and verified on finalize.')),
+                ('status', models.CharField(choices=[('PENDING', 'Awaiting upload'), ('READY', 'Verified'), ('ATTACHED', 'Attached to a report')], default='PENDING', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reports_med_status_5d3756_idx')],
+            },
+        ),
+    ]
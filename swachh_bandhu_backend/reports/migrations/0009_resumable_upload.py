@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_media_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mediaupload',
+            name='reports_med_status_5d3756_idx',
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='received_bytes',
+            field=models.PositiveBigIntegerField(default=0, help_text='Bytes of a resumable upload received so far.'),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='resumable',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['status', 'updated_at'], name='reports_med_status_f263fb_idx'),
+        ),
+    ]
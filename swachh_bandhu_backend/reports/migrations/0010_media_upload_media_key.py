@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:18
+
+from django.db import migrations, models
+
+
+def use_upload_key_for_finalized(apps, schema_editor):
+    # Tickets finalized before verified copies existed keep attaching the object they were checked against.
+    MediaUpload = apps.get_model('reports', 'MediaUpload')
+    MediaUpload.objects.exclude(status='PENDING').update(media_key=models.F('key'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_resumable_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaupload',
+            name='media_key',
+            field=models.CharField(blank=True, help_text='Key of the verified copy, which no upload URL grants; this is what gets attached.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='mediaupload',
+            name='key',
+            field=models.CharField(help_text='Object key in the default storage the client uploads to.', max_length=255, unique=True),
+        ),
+        migrations.RunPython(use_upload_key_for_finalized, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from locations.models import Location
@@ -49,25 +51,80 @@ class Report(models.Model):
     points_awarded = models.IntegerField(default=0, help_text=_("Points awarded or deducted for this report submission."))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = models.GeneratedField(
+        expression=SearchVector('description', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = _("Report")
         verbose_name_plural = _("Reports")
+        indexes = [
+            # Keyset pagination of the report feeds on (created_at, id).
+            models.Index(fields=['-created_at', '-id'], name='reports_created_keyset_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='reports_user_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='reports_search_idx'),
+        ]
 
     def __str__(self):
         user_email = self.user.email if self.user else 'Anonymous'
         return f"Report #{self.id} by {user_email} at {self.location.name}"
 
 class ReportMedia(models.Model):
+    class ProcessingStatus(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        READY = 'READY', _('Ready')
+        UNSUPPORTED = 'UNSUPPORTED', _('Not an image')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='media')
     file = models.FileField(upload_to=report_media_upload_path)
+    thumbnail = models.FileField(upload_to=report_media_upload_path, blank=True, help_text=_("Small WebP variant for lists."))
+    display = models.FileField(upload_to=report_media_upload_path, blank=True, help_text=_("Screen-sized WebP variant."))
+    processing_status = models.CharField(max_length=20, choices=ProcessingStatus.choices, default=ProcessingStatus.PENDING)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    size_bytes = models.PositiveIntegerField(null=True, blank=True, help_text=_("Size of the stored original, after EXIF stripping."))
+    variants = models.JSONField(default=dict, blank=True, help_text=_("Width, height and bytes of each generated variant."))
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Media for Report #{self.report.id}"
 
+class MediaUpload(models.Model):
+    """
+    A file the client uploads straight to storage under `key`, before the report
+    that uses it exists. It becomes usable once finalized (the stored object has
+    been checked against the declared size and type), and is attached to one
+    report at most. Resumable uploads are sent to the API in chunks instead, and
+    `received_bytes` is the offset the client resumes from.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Awaiting upload')
+        READY = 'READY', _('Verified')
+        ATTACHED = 'ATTACHED', _('Attached to a report')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_uploads')
+    key = models.CharField(max_length=255, unique=True, help_text=_("Object key in the default storage the client uploads to."))
+    media_key = models.CharField(max_length=255, blank=True, help_text=_("Key of the verified copy, which no upload URL grants; this is what gets attached."))
+    content_type = models.CharField(max_length=100)
+    size_bytes = models.PositiveBigIntegerField(help_text=_("Size declared by the client and verified on finalize."))
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    resumable = models.BooleanField(default=False)
+    received_bytes = models.PositiveBigIntegerField(default=0, help_text=_("Bytes of a resumable upload received so far."))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Stale uploads are found by their last activity.
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
+
 class ReportStatusHistory(models.Model):
     report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='status_history')
     status = models.CharField(max_length=20, choices=Report.ReportStatus.choices)
@@ -0,0 +1,39 @@
+"""
+Report status changes.
+
+Every path that moves a report to another status - the moderate endpoint, the
+admin change form and the admin bulk actions - goes through here, so that the
+author's counters, the status history, the dashboard rollups and the
+municipality data version always change together with the report.
+"""
+from django.db import transaction
+from dashboard.services import record_report_status_change
+from notifications.tasks import notify_user_of_status_change
+from .models import Report, ReportStatusHistory
+from .services import update_user_status_counters
+
+def record_status_change(report, old_status, previous_updated_at, changed_by, notes):
+    """
+    Records a status change that has just been saved on `report`.
+    `previous_updated_at` is the report's `updated_at` before the save.
+    """
+    if old_status == report.status:
+        return
+    record_report_status_change(report, old_status, previous_updated_at)
+    update_user_status_counters(report, old_status)
+    ReportStatusHistory.objects.create(report=report, status=report.status, changed_by=changed_by, notes=notes)
+    report_id = report.id
+    transaction.on_commit(lambda: notify_user_of_status_change.delay(report_id))
+
+@transaction.atomic
+def set_report_status(reports, status, changed_by, notes):
+    """Moves every report in the queryset to `status`, one locked row at a time. Returns how many changed."""
+    locked = Report.objects.filter(pk__in=reports.values('pk')).exclude(status=status)
+    changed = 0
+    for report in locked.select_related('location').select_for_update(of=('self',)).order_by('pk'):
+        old_status, previous_updated_at = report.status, report.updated_at
+        report.status = status
+        report.save(update_fields=['status', 'updated_at'])
+        record_status_change(report, old_status, previous_updated_at, changed_by, notes)
+        changed += 1
+    return changed
@@ -1,9 +1,15 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
-from .models import Report, ReportMedia, ReportStatusHistory, IssueCategory
+from rest_framework.reverse import reverse
+from .models import Report, ReportMedia, ReportStatusHistory, IssueCategory, MediaUpload
 from locations.models import Location
 from .services import is_user_within_geofence, find_nearby_duplicate_report
 from users.serializers import UserSerializer
-from notifications.tasks import notify_user_of_status_change
+from .moderation import record_status_change
+from .tasks import queue_media_processing
+from .media import is_image
+from . import uploads
 
 class IssueCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,9 +17,57 @@ class IssueCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description']
 
 class ReportMediaSerializer(serializers.ModelSerializer):
+    # `display` and `thumbnail` stay null until the upload has been processed.
     class Meta:
         model = ReportMedia
-        fields = ['id', 'file', 'uploaded_at']
+        fields = [
+            'id', 'file', 'display', 'thumbnail', 'processing_status',
+            'width', 'height', 'size_bytes', 'variants', 'uploaded_at'
+        ]
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """An upload ticket; while pending it carries the URL and headers for the client's PUT or PATCHes."""
+    upload = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaUpload
+        fields = ['id', 'content_type', 'size_bytes', 'resumable', 'received_bytes', 'status', 'created_at', 'upload']
+
+    def get_upload(self, obj):
+        if obj.status != MediaUpload.Status.PENDING:
+            return None
+        if obj.resumable:
+            return {
+                'method': 'PATCH',
+                'url': reverse('report-upload-content', args=[obj.pk], request=self.context['request']),
+                'headers': {'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': obj.received_bytes},
+            }
+        return {
+            'method': 'PUT',
+            'url': uploads.upload_url(self.context['request'], obj),
+            'headers': {'Content-Type': obj.content_type},
+            'expires_in': settings.MEDIA_UPLOAD_URL_EXPIRY_SECONDS,
+        }
+
+class MediaUploadCreateSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(uploads.ALLOWED_CONTENT_TYPES))
+    size_bytes = serializers.IntegerField(min_value=1)
+    resumable = serializers.BooleanField(default=False, help_text="Send the file to the API in chunks instead of one PUT.")
+
+    def validate(self, data):
+        limit = uploads.max_bytes_for(data['content_type'])
+        if data['size_bytes'] > limit:
+            raise serializers.ValidationError({"size_bytes": f"Files of type {data['content_type']} may be at most {limit} bytes."})
+        return data
+
+    def create(self, validated_data):
+        return uploads.create_upload(
+            self.context['request'].user, validated_data['content_type'], validated_data['size_bytes'],
+            resumable=validated_data['resumable']
+        )
+
+    def to_representation(self, instance):
+        return MediaUploadSerializer(instance, context=self.context).data
 
 class ReportStatusHistorySerializer(serializers.ModelSerializer):
     changed_by_email = serializers.EmailField(source='changed_by.email', read_only=True, allow_null=True)
@@ -22,6 +76,13 @@ class ReportStatusHistorySerializer(serializers.ModelSerializer):
         model = ReportStatusHistory
         fields = ['status', 'timestamp', 'notes', 'changed_by_email']
 
+class ReportClusterSerializer(serializers.Serializer):
+    cell = serializers.CharField(help_text="Geohash prefix identifying the map cell.")
+    count = serializers.IntegerField()
+    location_count = serializers.IntegerField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+
 class ReportReadSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     media = ReportMediaSerializer(many=True, read_only=True)
@@ -30,7 +91,7 @@ class ReportReadSerializer(serializers.ModelSerializer):
     location_longitude = serializers.CharField(source='location.longitude', read_only=True)
     geofence_radius = serializers.CharField(source='location.geofence_radius', read_only=True)
     issue_category = IssueCategorySerializer(read_only=True)
-    verification_count = serializers.IntegerField(source='verifications.count', read_only=True)
+    verification_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Report
@@ -40,6 +101,11 @@ class ReportReadSerializer(serializers.ModelSerializer):
             'verifies_report','location_latitude', 'location_longitude','geofence_radius'
         ]
 
+    def get_verification_count(self, obj):
+        # Annotated by ReportViewSet; only freshly created reports fall back to a COUNT query.
+        count = getattr(obj, 'verification_count', None)
+        return count if count is not None else obj.verifications.count()
+
 class ReportDetailSerializer(ReportReadSerializer):
     status_history = ReportStatusHistorySerializer(many=True, read_only=True)
     
@@ -49,15 +115,22 @@ class ReportDetailSerializer(ReportReadSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         user = self.context['request'].user
-        if not (user.is_staff or user.is_superuser or (user.municipality and user.municipality == instance.location.municipality)):
+        if not (user.is_staff or user.is_superuser or (user.municipality_id and user.municipality_id == instance.location.municipality_id)):
             representation.pop('moderator_notes', None)
             representation.pop('action_taken_notes', None)
         return representation
 
+def _initial_processing_status(image):
+    return ReportMedia.ProcessingStatus.PENDING if image else ReportMedia.ProcessingStatus.UNSUPPORTED
+
 class ReportCreateSerializer(serializers.ModelSerializer):
     location = serializers.UUIDField(write_only=True)
     user_latitude = serializers.DecimalField(max_digits=9, decimal_places=6, write_only=True)
     user_longitude = serializers.DecimalField(max_digits=10, decimal_places=6, write_only=True)
+    media_uploads = serializers.ListField(
+        child=serializers.UUIDField(), write_only=True, required=False, max_length=10,
+        help_text="Ids of finalized upload tickets to attach, instead of sending media_files."
+    )
     issue_category = serializers.PrimaryKeyRelatedField(
         queryset=IssueCategory.objects.all(), # Queryset is filtered dynamically in __init__
         pk_field=serializers.UUIDField()
@@ -67,7 +140,7 @@ class ReportCreateSerializer(serializers.ModelSerializer):
         model = Report
         fields = [
             'location', 'issue_category', 'description', 'severity',
-            'user_latitude', 'user_longitude'
+            'user_latitude', 'user_longitude', 'media_uploads'
         ]
 
     def __init__(self, *args, **kwargs):
@@ -100,29 +173,67 @@ class ReportCreateSerializer(serializers.ModelSerializer):
                 {"geolocation": f"Geo-fence check failed. You must be within {radius} meters of the location to file a report."}
             )
 
-        # nearby_report = find_nearby_duplicate_report(location_obj, data['issue_category'])
-        # if nearby_report:
-        #     raise serializers.ValidationError({"duplicate_report": f"A similar report (ID: {nearby_report.id}) was recently filed for this location and issue. Please check if it's the same problem."})
+        self.check_for_duplicate(location_obj, data['issue_category'])
 
         data['location'] = location_obj
         return data
 
+    def validate_media_uploads(self, value):
+        upload_ids = set(value)
+        found = list(MediaUpload.objects.filter(
+            pk__in=upload_ids, user=self.context['request'].user, status=MediaUpload.Status.READY
+        ))
+        if len(found) != len(upload_ids):
+            raise serializers.ValidationError("Every upload must be your own, finalized and not yet attached to a report.")
+        return found
+
+    def check_for_duplicate(self, location_obj, issue_category):
+        nearby_report = find_nearby_duplicate_report(location_obj, issue_category)
+        if nearby_report:
+            raise serializers.ValidationError({"duplicate_report": f"A similar report (ID: {nearby_report.id}) was recently filed for this location and issue. Please check if it's the same problem."})
+
     def create(self, validated_data):
         # The user is now passed from perform_create in the viewset
         media_files = self.context['request'].FILES.getlist('media_files')
         
         validated_data.pop('user_latitude', None)
         validated_data.pop('user_longitude', None)
+        media_uploads = validated_data.pop('media_uploads', [])
         
-        report = Report.objects.create(**validated_data)
+        with transaction.atomic():
+            # Claim the uploads first, so that two reports cannot attach the same one.
+            if media_uploads:
+                claimed = MediaUpload.objects.filter(
+                    pk__in=[upload.pk for upload in media_uploads], status=MediaUpload.Status.READY
+                ).update(status=MediaUpload.Status.ATTACHED)
+                if claimed != len(media_uploads):
+                    raise serializers.ValidationError({"media_uploads": "An upload was attached to another report."})
+
+            report = Report.objects.create(**validated_data)
 
-        if media_files:
-            media_to_create = [ReportMedia(report=report, file=file) for file in media_files]
-            ReportMedia.objects.bulk_create(media_to_create)
+            # Non-images are marked UNSUPPORTED up front, so processing never downloads a video.
+            # Uploaded objects are already in storage; the rows just point at their verified copies.
+            media_to_create = [
+                ReportMedia(report=report, file=file, processing_status=_initial_processing_status(is_image(file)))
+                for file in media_files
+            ]
+            media_to_create += [
+                ReportMedia(report=report, file=upload.media_key, processing_status=_initial_processing_status(uploads.is_image_upload(upload)))
+                for upload in media_uploads
+            ]
+            if media_to_create:
+                ReportMedia.objects.bulk_create(media_to_create)
+                media_ids = [media.id for media in media_to_create if media.processing_status == ReportMedia.ProcessingStatus.PENDING]
+                if media_ids:
+                    transaction.on_commit(lambda: queue_media_processing(media_ids))
             
         return report
 
 class ReportVerificationSerializer(ReportCreateSerializer):
+    def check_for_duplicate(self, location_obj, issue_category):
+        # A verification deliberately targets an existing report, so it is never a duplicate.
+        pass
+
     def validate(self, data):
         data = super().validate(data)
         original_report = self.context.get('original_report')
@@ -137,10 +248,9 @@ class ReportVerificationSerializer(ReportCreateSerializer):
         return data
 
     def create(self, validated_data):
-        report = super().create(validated_data)
-        report.verifies_report = self.context['original_report']
-        report.save()
-        return report
+        # Set before the insert so the post_save handlers see this as a verification.
+        validated_data['verifies_report'] = self.context['original_report']
+        return super().create(validated_data)
 
 class ReportModerateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -150,18 +260,12 @@ class ReportModerateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         user = self.context['request'].user
         old_status = instance.status
-        new_status = validated_data.get('status', old_status)
+        previous_updated_at = instance.updated_at
 
         report = super().update(instance, validated_data)
 
-        if old_status != new_status:
-             ReportStatusHistory.objects.create(
-                report=instance,
-                status=new_status,
-                changed_by=user,
-                notes=validated_data.get('moderator_notes', "Status updated by moderator.")
-            )
-             # CRITICAL FIX: Trigger notification task on status change
-             notify_user_of_status_change.delay(instance.id)
-
+        record_status_change(
+            report, old_status, previous_updated_at, user,
+            validated_data.get('moderator_notes', "Status updated by moderator.")
+        )
         return report
\ No newline at end of file
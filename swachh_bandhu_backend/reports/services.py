@@ -1,26 +1,129 @@
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from django.db import transaction
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Left
 from django.contrib.gis.db.models.functions import Distance
 from decimal import Decimal
-from geopy.distance import geodesic
 from .models import Report
+from users.models import User
+from locations.geo import GeographyDWithin, PointX, PointY
+from core.geodesy import is_within_radius
 
 def is_user_within_geofence(user_lat: Decimal, user_lng: Decimal, location_lat: float, location_lng: float, radius_meters: int) -> bool:
     if not all([user_lat is not None, user_lng is not None, location_lat is not None, location_lng is not None, radius_meters is not None]):
         return False
-    user_coords = (user_lat, user_lng)
-    location_coords = (location_lat, location_lng)
-    distance_in_meters = geodesic(user_coords, location_coords).meters
-    return distance_in_meters <= radius_meters
+    return is_within_radius(user_lat, user_lng, location_lat, location_lng, radius_meters)
 
 def find_nearby_duplicate_report(location, issue_category):
-    time_threshold = timezone.now() - timedelta(days=7)
+    """
+    Returns the earliest open report for the same issue within
+    MIN_DISTANCE_BETWEEN_REPORTS_METERS of the location and inside the duplicate
+    window. The distance check is an ST_DWithin on the geography-cast point, so it
+    is served by the GiST index on Location rather than a sequential scan.
+    """
+    time_threshold = timezone.now() - timedelta(hours=settings.DUPLICATE_REPORT_WINDOW_HOURS)
     
     nearby_reports = Report.objects.filter(
-        location=location,
+        GeographyDWithin('location__point', location.point, settings.MIN_DISTANCE_BETWEEN_REPORTS_METERS),
         issue_category=issue_category,
+        verifies_report__isnull=True,
         created_at__gte=time_threshold,
         status__in=[Report.ReportStatus.PENDING, Report.ReportStatus.VERIFIED, Report.ReportStatus.IN_PROGRESS]
     ).order_by('created_at')
     
-    return nearby_reports.first()
\ No newline at end of file
+    return nearby_reports.first()
+
+OPEN_STATUSES_FOR_COUNTERS = (Report.ReportStatus.PENDING, Report.ReportStatus.VERIFIED)
+
+def _status_counter_deltas(status, sign):
+    deltas = {}
+    if status == Report.ReportStatus.ACTIONED:
+        deltas['reports_actioned_count'] = sign
+    elif status in OPEN_STATUSES_FOR_COUNTERS:
+        deltas['reports_pending_count'] = sign
+    return deltas
+
+def _apply_counter_deltas(user_id, deltas):
+    if user_id and deltas:
+        User.objects.filter(pk=user_id).update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+def increment_user_report_counters(report):
+    """Counts a newly created report against its author's denormalized counters."""
+    deltas = _status_counter_deltas(report.status, 1)
+    deltas['verifications_count' if report.verifies_report_id else 'reports_filed_count'] = 1
+    _apply_counter_deltas(report.user_id, deltas)
+
+def decrement_user_report_counters(report):
+    """Takes a deleted report back out of its author's denormalized counters."""
+    deltas = _status_counter_deltas(report.status, -1)
+    deltas['verifications_count' if report.verifies_report_id else 'reports_filed_count'] = -1
+    _apply_counter_deltas(report.user_id, deltas)
+
+def update_user_status_counters(report, old_status):
+    """Moves a report between the author's actioned/pending counters after a status change."""
+    if old_status == report.status:
+        return
+    deltas = _status_counter_deltas(old_status, -1)
+    for field, delta in _status_counter_deltas(report.status, 1).items():
+        deltas[field] = deltas.get(field, 0) + delta
+    _apply_counter_deltas(report.user_id, {field: delta for field, delta in deltas.items() if delta})
+
+def _user_report_count(**filters):
+    counts = Report.objects.filter(user=OuterRef('pk'), **filters).order_by().values('user').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+def expected_user_report_counters():
+    """Expressions that recompute each counter from the Report table for a User queryset."""
+    return {
+        'reports_filed_count': _user_report_count(verifies_report__isnull=True),
+        'verifications_count': _user_report_count(verifies_report__isnull=False),
+        'reports_actioned_count': _user_report_count(status=Report.ReportStatus.ACTIONED),
+        'reports_pending_count': _user_report_count(status__in=OPEN_STATUSES_FOR_COUNTERS),
+    }
+
+def repair_user_report_counters(dry_run=False):
+    """
+    Recomputes the counters of every user whose stored values have drifted from
+    the Report table. Returns the number of drifted users and how many were repaired.
+    """
+    expected = expected_user_report_counters()
+    annotations = {f'expected_{field}': expression for field, expression in expected.items()}
+    drift = Q()
+    for field in expected:
+        drift |= ~Q(**{field: F(f'expected_{field}')})
+
+    with transaction.atomic():
+        drifted_ids = User.objects.annotate(**annotations).filter(drift).values('pk')
+        drifted_count = drifted_ids.count()
+        if dry_run or not drifted_count:
+            return drifted_count, 0
+        return drifted_count, User.objects.filter(pk__in=drifted_ids).update(**expected)
+
+def verification_count_annotation():
+    """Number of peer verifications of each report, as a correlated count that needs no GROUP BY."""
+    counts = Report.objects.filter(verifies_report=OuterRef('pk')).order_by().values('verifies_report').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+# Geohash length per map zoom level, chosen so that a screen-sized bbox spans at
+# most a few hundred cells (each extra character divides a cell by 32).
+GEOHASH_PRECISION_BY_ZOOM = (1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 7, 8, 8, 9, 9, 9)
+MAX_CLUSTER_ZOOM = len(GEOHASH_PRECISION_BY_ZOOM) - 1
+
+def cluster_reports(reports, bbox, zoom):
+    """
+    Counts `reports` per geohash cell inside `bbox` (a Polygon) at the precision
+    for `zoom`. The bbox filter is served by the GiST index on Location.point and
+    the cells by the stored geohash column, so the work is bounded by what is on
+    screen and the result by the number of cells.
+    """
+    precision = GEOHASH_PRECISION_BY_ZOOM[min(max(zoom, 0), MAX_CLUSTER_ZOOM)]
+    return reports.filter(location__point__bboverlaps=bbox).annotate(
+        cell=Left('location__geohash', precision)
+    ).values('cell').annotate(
+        count=Count('id'),
+        location_count=Count('location_id', distinct=True),
+        latitude=Avg(PointY('location__point')),
+        longitude=Avg(PointX('location__point')),
+    ).order_by('-count')
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Report, ReportStatusHistory
+from dashboard.services import record_report_created, record_report_deleted
+from .models import IssueCategory, Report, ReportMedia, ReportStatusHistory
+from .services import decrement_user_report_counters, increment_user_report_counters
+from .tasks import queue_media_processing
+from core import response_cache
 
 @receiver(post_save, sender=Report)
 def create_report_status_history_and_update_location(sender, instance, created, **kwargs):
@@ -15,6 +20,26 @@ def create_report_status_history_and_update_location(sender, instance, created,
         # Update the location's last reported time
         instance.location.last_reported_at = timezone.now()
         instance.location.save(update_fields=['last_reported_at'])
+        record_report_created(instance)
+        increment_user_report_counters(instance)
     
     # History for status changes is now handled in the ReportModerateSerializer
-    # to ensure the user who made the change is correctly attributed.
\ No newline at end of file
+    # to ensure the user who made the change is correctly attributed.
+
+@receiver(post_delete, sender=Report)
+def uncount_report_on_delete(sender, instance, **kwargs):
+    decrement_user_report_counters(instance)
+    record_report_deleted(instance)
+
+@receiver(post_save, sender=IssueCategory)
+@receiver(post_delete, sender=IssueCategory)
+def invalidate_cached_issue_categories(sender, instance, **kwargs):
+    municipality_id = instance.municipality_id
+    transaction.on_commit(lambda: response_cache.invalidate(response_cache.ISSUE_CATEGORIES, municipality_id))
+
+@receiver(post_save, sender=ReportMedia)
+def queue_media_processing_on_upload(sender, instance, created, **kwargs):
+    # Uploads created through the API are bulk-inserted and queued by ReportCreateSerializer.
+    if created and instance.processing_status == ReportMedia.ProcessingStatus.PENDING:
+        media_id = instance.id
+        transaction.on_commit(lambda: queue_media_processing([media_id]))
@@ -0,0 +1,30 @@
+from celery import shared_task
+from django.conf import settings
+from . import media, services, uploads
+
+def _chunked(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def queue_media_processing(media_ids):
+    """Splits the uploads into batches and processes each on whichever Celery worker picks it up."""
+    media_ids = [str(media_id) for media_id in media_ids]
+    batches = list(_chunked(media_ids, settings.MEDIA_PROCESSING_BATCH_SIZE))
+    for batch in batches:
+        process_report_media_batch.delay(batch)
+    return len(batches)
+
+@shared_task
+def process_report_media_batch(media_ids):
+    processed = media.process_report_media(media_ids)
+    return f"Processed {processed} report images."
+
+@shared_task
+def purge_stale_uploads():
+    purged = uploads.purge_stale_uploads()
+    return f"Purged {purged} stale uploads."
+
+@shared_task
+def recount_user_report_stats():
+    drifted, repaired = services.repair_user_report_counters()
+    return f"Repaired report counters for {repaired} of {drifted} drifted users."
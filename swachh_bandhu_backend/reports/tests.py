@@ -1,3 +1,141 @@
+from io import StringIO
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from subscriptions.models import Municipality
+from users.models import User, UserRole
+from locations.models import Location
+from .models import Report, ReportMedia, IssueCategory
+from .services import find_nearby_duplicate_report
 
-# Create your tests here.
+PAGE_SIZE = 20
+FAN_OUT = 25
+MEDIA_PER_REPORT = 2
+LIST_QUERY_BUDGET = 3
+DETAIL_QUERY_BUDGET = 4
+
+class ReportQueryBudgetTests(APITestCase):
+    """
+    Report list and detail pages, and verifications, are served in a fixed number
+    of queries however many verifications and media each report has.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.municipality = Municipality.objects.create(name='Nagpur', city='Nagpur', state='Maharashtra')
+        cls.category = IssueCategory.objects.create(municipality=cls.municipality, name='Overflowing Bin')
+        cls.point = Point(79.0882, 21.1458, srid=4326)
+        cls.location = Location.objects.create(
+            name='Sitabuldi Bin', municipality=cls.municipality, location_type=Location.LocationType.PUBLIC_BIN, point=cls.point
+        )
+        cls.moderator = User.objects.create_user(
+            email='moderator@example.com', full_name='Moderator', role=UserRole.MODERATOR, municipality=cls.municipality
+        )
+        cls.citizens = [
+            User.objects.create_user(email=f'citizen{i}@example.com', full_name=f'Citizen {i}', municipality=cls.municipality)
+            for i in range(PAGE_SIZE)
+        ]
+        cls.reports = Report.objects.bulk_create([
+            Report(user=citizen, location=cls.location, issue_category=cls.category, description='Bin overflowing')
+            for citizen in cls.citizens
+        ])
+        ReportMedia.objects.bulk_create([
+            ReportMedia(report=report, file=f'reports/test/{report.pk}-{i}.jpg', processing_status=ReportMedia.ProcessingStatus.READY)
+            for report in cls.reports for i in range(MEDIA_PER_REPORT)
+        ])
+
+    def _add_verifications(self, reports):
+        Report.objects.bulk_create([
+            Report(user=self.citizens[(i + 1) % PAGE_SIZE], location=self.location, issue_category=self.category,
+                   description='Still overflowing', verifies_report=report)
+            for report in reports for i in range(FAN_OUT)
+        ])
+
+    def _get(self, url, **params):
+        # A fresh user each time, so that no per-instance cache hides a query.
+        self.client.force_authenticate(user=User.objects.get(pk=self.moderator.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_list_page_query_count_is_independent_of_verifications(self):
+        url = reverse('report-list')
+        _, baseline = self._get(url, page_size=PAGE_SIZE)
+        self.assertLessEqual(baseline, LIST_QUERY_BUDGET)
+
+        self._add_verifications(self.reports)
+        self.client.force_authenticate(user=User.objects.get(pk=self.moderator.pk))
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url, {'page_size': PAGE_SIZE})
+        self.assertEqual(len(response.data['results']), PAGE_SIZE)
+
+    def test_detail_query_count_is_independent_of_verifications(self):
+        _, baseline = self._get(reverse('report-detail', args=[self.reports[0].pk]))
+        self.assertLessEqual(baseline, DETAIL_QUERY_BUDGET)
+
+        self._add_verifications([self.reports[1]])
+        self.client.force_authenticate(user=User.objects.get(pk=self.moderator.pk))
+        with self.assertNumQueries(baseline):
+            response = self.client.get(reverse('report-detail', args=[self.reports[1].pk]))
+        self.assertEqual(response.data['verification_count'], FAN_OUT)
+        self.assertEqual(len(response.data['media']), MEDIA_PER_REPORT)
+
+    def _verify(self, report, verifier):
+        self.client.force_authenticate(user=verifier)
+        payload = {
+            'location': str(self.location.pk), 'issue_category': str(self.category.pk), 'description': 'Confirmed',
+            'user_latitude': f'{self.point.y:.6f}', 'user_longitude': f'{self.point.x:.6f}',
+        }
+        response = self.client.post(reverse('report-verify', args=[report.pk]), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response
+
+    def test_verification_query_count_is_independent_of_verifications(self):
+        verifiers = [
+            User.objects.create_user(email=f'verifier{i}@example.com', full_name=f'Verifier {i}', municipality=self.municipality)
+            for i in range(3)
+        ]
+        # The first verification also creates the per-hour rollup rows; measure from the second.
+        self._verify(self.reports[0], verifiers[0])
+        with CaptureQueriesContext(connection) as queries:
+            self._verify(self.reports[1], verifiers[1])
+        baseline = len(queries)
+
+        self._add_verifications([self.reports[2]])
+        with self.assertNumQueries(baseline):
+            response = self._verify(self.reports[2], verifiers[2])
+        self.assertEqual(response.data['verifies_report'], self.reports[2].pk)
+
+
+class DuplicateDetectionTests(TestCase):
+    """The submit-time duplicate lookup stays a single query on the geography-cast point."""
+
+    @classmethod
+    def setUpTestData(cls):
+        municipality = Municipality.objects.create(name='Nagpur', city='Nagpur', state='Maharashtra')
+        cls.category = IssueCategory.objects.create(municipality=municipality, name='Overflowing Bin')
+        cls.location = Location.objects.create(
+            name='Sitabuldi Bin', municipality=municipality, location_type=Location.LocationType.PUBLIC_BIN,
+            point=Point(79.0882, 21.1458, srid=4326)
+        )
+        citizen = User.objects.create_user(email='citizen@example.com', full_name='Citizen', municipality=municipality)
+        cls.report = Report.objects.create(user=citizen, location=cls.location, issue_category=cls.category, description='Bin overflowing')
+
+    def test_duplicate_lookup_is_one_geography_dwithin_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            duplicate = find_nearby_duplicate_report(self.location, self.category)
+        self.assertEqual(duplicate, self.report)
+        self.assertEqual(len(queries), 1)
+        # The same expression as the (point::geography) GiST index on Location, so the index can serve it.
+        self.assertIn('ST_DWithin(("locations_location"."point")::geography', queries[0]['sql'])
+
+    def test_benchmark_meets_latency_target(self):
+        out = StringIO()
+        call_command('bench_duplicate_detection', locations=200, reports=1000, samples=50, stdout=out)
+        self.assertIn('within the latency target', out.getvalue())
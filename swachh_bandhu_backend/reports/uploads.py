@@ -0,0 +1,242 @@
+"""
+Upload tickets for report media.
+
+Instead of posting photos and videos through the API, the client asks for a
+ticket (declaring the content type and size), PUTs the file straight to storage
+with the ticket's presigned URL, and finalizes the ticket. The URL stays valid
+until it expires, so finalizing first copies the object to a media key that no
+URL grants, then checks that the copy has the declared size and content type
+and starts with the file signature of that type. Report creation then
+references finalized tickets by id and attaches the verified copy.
+
+Resumable tickets serve clients on flaky connections (a tus-like protocol):
+the file is PATCHed to the API in chunks, each starting at the offset the server
+reports, and a dropped connection keeps every byte that arrived. Chunks are
+streamed onto a partial file under MEDIA_UPLOAD_PARTIAL_ROOT, which must be
+shared by the web servers. One PATCH at a time holds a lease in the shared
+cache, renewed while the body streams in, so a slow chunk never holds a
+database transaction; the offset is then advanced by a conditional UPDATE. The
+last chunk moves the file into storage and finalizes the ticket. Pending and
+unattached READY tickets idle for MEDIA_UPLOAD_STALE_AFTER_HOURS, and their
+partial files and objects, are purged by a periodic task.
+"""
+from contextlib import contextmanager
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+from core import storage
+from .models import MediaUpload
+
+# Content type -> (extension, kind)
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg': ('jpg', 'image'),
+    'image/png': ('png', 'image'),
+    'image/webp': ('webp', 'image'),
+    'image/heic': ('heic', 'image'),
+    'video/mp4': ('mp4', 'video'),
+    'video/quicktime': ('mov', 'video'),
+}
+SIGNATURE_BYTES = 16
+CHUNK_READ_BYTES = 64 * 1024
+CHUNK_LEASE_KEY = 'uploads:resumable-lease:{}'
+CHUNK_LEASE_SECONDS = 120
+# Renew the lease every this many reads (4 MiB), well within its timeout even on 2G.
+CHUNK_LEASE_RENEW_READS = 64
+
+class UploadVerificationError(ValueError):
+    """The stored object does not match its upload ticket."""
+
+def max_bytes_for(content_type):
+    _, kind = ALLOWED_CONTENT_TYPES[content_type]
+    return settings.MEDIA_UPLOAD_MAX_VIDEO_BYTES if kind == 'video' else settings.MEDIA_UPLOAD_MAX_IMAGE_BYTES
+
+def is_image_upload(upload):
+    return ALLOWED_CONTENT_TYPES[upload.content_type][1] == 'image'
+
+def _matches_signature(content_type, head):
+    if content_type == 'image/jpeg':
+        return head.startswith(b'\xff\xd8\xff')
+    if content_type == 'image/png':
+        return head.startswith(b'\x89PNG\r\n\x1a\n')
+    if content_type == 'image/webp':
+        return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    # HEIC, MP4 and QuickTime are all ISO base media files: a size, then a box type.
+    if content_type == 'video/quicktime':
+        return head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip')
+    return head[4:8] == b'ftyp'
+
+def create_upload(user, content_type, size_bytes, resumable=False):
+    upload_id = uuid.uuid4()
+    extension, _ = ALLOWED_CONTENT_TYPES[content_type]
+    return MediaUpload.objects.create(
+        id=upload_id, user=user, content_type=content_type, size_bytes=size_bytes, resumable=resumable,
+        key=f'uploads/{user.id}/{upload_id}.{extension}',
+    )
+
+def upload_url(request, upload):
+    return storage.presigned_put_url(
+        request, upload.key, upload.content_type, upload.size_bytes, settings.MEDIA_UPLOAD_URL_EXPIRY_SECONDS
+    )
+
+def _media_key(upload):
+    extension, _ = ALLOWED_CONTENT_TYPES[upload.content_type]
+    return f'uploads/{upload.user_id}/verified/{upload.id}.{extension}'
+
+def _verify_object(upload, key):
+    stat = storage.stat_object(key)
+    if stat is None:
+        raise UploadVerificationError("The file has not been uploaded yet.")
+    size, content_type = stat
+    if size != upload.size_bytes:
+        raise UploadVerificationError(f"Uploaded {size} bytes but {upload.size_bytes} were declared.")
+    if content_type is not None and content_type.split(';')[0].strip() != upload.content_type:
+        raise UploadVerificationError(f"Uploaded as {content_type} but {upload.content_type} was declared.")
+    if not _matches_signature(upload.content_type, storage.read_object_prefix(key, SIGNATURE_BYTES)):
+        raise UploadVerificationError(f"The file content is not {upload.content_type}.")
+
+def finalize_upload(upload):
+    """Verifies the uploaded object against the ticket and marks it READY; raises UploadVerificationError."""
+    if upload.status != MediaUpload.Status.PENDING:
+        return upload
+    if upload.resumable:
+        # Assembled by the API from the ticket's own chunks; no URL grants its key.
+        media_key = upload.key
+    else:
+        # Verify a copy, so that a later PUT to the still-valid URL cannot swap the content.
+        if storage.stat_object(upload.key) is None:
+            raise UploadVerificationError("The file has not been uploaded yet.")
+        media_key = _media_key(upload)
+        storage.copy_object(upload.key, media_key)
+    try:
+        _verify_object(upload, media_key)
+    except UploadVerificationError:
+        if media_key != upload.key:
+            default_storage.delete(media_key)
+        raise
+    if media_key != upload.key:
+        default_storage.delete(upload.key)
+
+    upload.media_key = media_key
+    upload.status = MediaUpload.Status.READY
+    upload.save(update_fields=['media_key', 'status', 'updated_at'])
+    return upload
+
+def partial_path(upload_id):
+    return os.path.join(settings.MEDIA_UPLOAD_PARTIAL_ROOT, f'{upload_id}.part')
+
+@contextmanager
+def chunk_lease(upload_id):
+    """Yields whether this caller holds the upload's PATCH lease; released on exit."""
+    key = CHUNK_LEASE_KEY.format(upload_id)
+    acquired = cache.add(key, True, CHUNK_LEASE_SECONDS)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+def append_chunk(upload, stream, chunk_size=CHUNK_READ_BYTES):
+    """
+    Appends a request body to a resumable upload whose chunk_lease the caller
+    holds, reading `chunk_size` bytes at a time. Stops at the declared size, and
+    keeps what arrived if the client disconnects. Returns the new offset, or None
+    if the recorded offset moved meanwhile (the lease lapsed).
+    """
+    os.makedirs(settings.MEDIA_UPLOAD_PARTIAL_ROOT, exist_ok=True)
+    lease_key = CHUNK_LEASE_KEY.format(upload.id)
+    start = upload.received_bytes
+    remaining = upload.size_bytes - start
+    with open(partial_path(upload.id), 'ab') as handle:
+        # Drop bytes past the recorded offset, left by a chunk whose offset update never happened.
+        handle.truncate(start)
+        try:
+            reads = 0
+            while remaining > 0 and (chunk := stream.read(min(chunk_size, remaining))):
+                handle.write(chunk)
+                remaining -= len(chunk)
+                reads += 1
+                if reads % CHUNK_LEASE_RENEW_READS == 0:
+                    cache.touch(lease_key, CHUNK_LEASE_SECONDS)
+        except UnreadablePostError:
+            pass
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    received = upload.size_bytes - remaining
+    advanced = MediaUpload.objects.filter(
+        pk=upload.pk, status=MediaUpload.Status.PENDING, received_bytes=start
+    ).update(received_bytes=received, updated_at=timezone.now())
+    if not advanced:
+        return None
+    upload.received_bytes = received
+    return received
+
+def complete_resumable_upload(upload):
+    """Moves a fully received resumable upload into storage and finalizes it; raises UploadVerificationError."""
+    path = partial_path(upload.id)
+    if os.path.exists(path):
+        with open(path, 'rb') as handle:
+            content = File(handle)
+            # Stored as the declared type; object storage would otherwise guess it from the extension.
+            content.content_type = upload.content_type
+            default_storage.delete(upload.key)
+            saved_name = default_storage.save(upload.key, content)
+        if saved_name != upload.key:
+            default_storage.delete(saved_name)
+            raise UploadVerificationError("Could not store the upload under its key.")
+        os.remove(path)
+    return finalize_upload(upload)
+
+def purge_stale_uploads(now=None):
+    """
+    Deletes pending tickets, and READY tickets never attached to a report, with
+    no activity for MEDIA_UPLOAD_STALE_AFTER_HOURS, along with their partial files
+    and stored objects, and partial files left without a pending ticket. Returns
+    the number of tickets deleted.
+    """
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.MEDIA_UPLOAD_STALE_AFTER_HOURS)
+    # Rows go first, so that a report being created cannot claim a ticket whose files are being deleted.
+    with transaction.atomic():
+        stale = list(MediaUpload.objects.select_for_update(skip_locked=True).filter(
+            status__in=[MediaUpload.Status.PENDING, MediaUpload.Status.READY], updated_at__lt=cutoff
+        ).values_list('id', 'key', 'media_key'))
+        MediaUpload.objects.filter(pk__in=[upload_id for upload_id, _, _ in stale]).delete()
+    for upload_id, key, media_key in stale:
+        default_storage.delete(key)
+        if media_key and media_key != key:
+            default_storage.delete(media_key)
+        try:
+            os.remove(partial_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    # Partial files whose ticket is gone, e.g. deleted along with its user.
+    if os.path.isdir(settings.MEDIA_UPLOAD_PARTIAL_ROOT):
+        with os.scandir(settings.MEDIA_UPLOAD_PARTIAL_ROOT) as entries:
+            old_parts = {
+                entry.name.removesuffix('.part'): entry.path for entry in entries
+                if entry.name.endswith('.part') and entry.stat().st_mtime < cutoff.timestamp()
+            }
+        pending = {
+            str(upload_id) for upload_id in MediaUpload.objects.filter(
+                pk__in=[name for name in old_parts if _is_uuid(name)], status=MediaUpload.Status.PENDING
+            ).values_list('id', flat=True)
+        }
+        for name, path in old_parts.items():
+            if name not in pending:
+                os.remove(path)
+    return len(stale)
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReportViewSet, IssueCategoryViewSet
+from .views import ReportViewSet, IssueCategoryViewSet, MediaUploadViewSet, LocalUploadView
 
 router = DefaultRouter()
 router.register(r'reports', ReportViewSet, basename='report')
 router.register(r'issue-categories', IssueCategoryViewSet, basename='issue-category')
+router.register(r'report-uploads', MediaUploadViewSet, basename='report-upload')
 
 urlpatterns = [
+    path('report-uploads/local/<str:token>/', LocalUploadView.as_view(), name='local-upload'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
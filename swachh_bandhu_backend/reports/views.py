@@ -1,22 +1,42 @@
-from rest_framework import viewsets, permissions, parsers, status
+import tempfile
+from rest_framework import viewsets, mixins, permissions, parsers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Report, IssueCategory
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.contrib.gis.geos import Polygon
+from .models import Report, ReportStatusHistory, IssueCategory, MediaUpload
 from .serializers import (
     ReportReadSerializer, ReportCreateSerializer, 
     ReportVerificationSerializer, ReportModerateSerializer,
-    ReportDetailSerializer, ReportStatusHistorySerializer,
-    IssueCategorySerializer
+    ReportDetailSerializer, ReportStatusHistorySerializer, ReportClusterSerializer,
+    IssueCategorySerializer, MediaUploadSerializer, MediaUploadCreateSerializer
 )
-from core.permissions import IsModerator, IsCitizen
-from gamification.tasks import process_report_points
+from core.permissions import IsAdminOrStaff, IsModerator, IsCitizen
+from core import exports as core_exports
+from core.pagination import KeysetPagination
+from core.search import FullTextSearchFilter
+from core import response_cache, storage
+from core.response_cache import CachedListMixin
+from gamification.pipeline import enqueue_report_event
+from .services import verification_count_annotation, cluster_reports, MAX_CLUSTER_ZOOM
+from . import exports
+from .uploads import finalize_upload, append_chunk, chunk_lease, complete_resumable_upload, UploadVerificationError
 
 class ReportViewSet(viewsets.ModelViewSet):
-    queryset = Report.objects.all().select_related('user', 'location', 'issue_category').prefetch_related('media', 'verifications', 'status_history')
+    queryset = Report.objects.all().select_related('user__municipality', 'location', 'issue_category').prefetch_related('media')
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    max_clusters = 2000
     filterset_fields = {
         'status': ['in', 'exact'],
         'location': ['exact'],
@@ -37,19 +57,26 @@ class ReportViewSet(viewsets.ModelViewSet):
             return ReportModerateSerializer
         if self.action == 'history':
             return ReportStatusHistorySerializer
+        if self.action == 'clusters':
+            return ReportClusterSerializer
         return ReportReadSerializer
 
     def get_queryset(self):
         user = self.request.user
-        qs = super().get_queryset()
-
         if not user.is_authenticated:
             return Report.objects.none()
 
+        qs = super().get_queryset()
+        if self.action != 'clusters':
+            # Keep the number of queries per page constant, independent of verification fan-out.
+            qs = qs.annotate(verification_count=verification_count_annotation())
+        if self.action in ('retrieve', 'history'):
+            qs = qs.prefetch_related(Prefetch('status_history', queryset=ReportStatusHistory.objects.select_related('changed_by')))
+
         # Admins and moderators see reports based on their municipality
         if user.role in ['SUPER_ADMIN', 'MUNICIPAL_ADMIN', 'MODERATOR']:
-            if user.municipality:
-                return qs.filter(location__municipality=user.municipality)
+            if user.municipality_id:
+                return qs.filter(location__municipality_id=user.municipality_id)
             return qs  # Super admin sees all
 
         # This uses the `?exclude_user=true` query parameter.
@@ -67,10 +94,10 @@ class ReportViewSet(viewsets.ModelViewSet):
         # will handle security (e.g., a citizen can't moderate).
         return qs
 
-    # CRITICAL FIX: Trigger gamification tasks after report creation
+    # Queue the report for the batched gamification pipeline
     def perform_create(self, serializer):
         report = serializer.save(user=self.request.user)
-        process_report_points.delay(report.id)
+        enqueue_report_event(report)
 
     @action(detail=True, methods=['post'], url_path='verify', permission_classes=[IsCitizen])
     def verify(self, request, pk=None):
@@ -80,9 +107,9 @@ class ReportViewSet(viewsets.ModelViewSet):
             context={'request': request, 'original_report': original_report}
         )
         serializer.is_valid(raise_exception=True)
-        # Manually save and trigger points, since perform_create is not called for actions
+        # Manually save and queue for points, since perform_create is not called for actions
         verification_report = serializer.save(user=request.user)
-        process_report_points.delay(verification_report.id)
+        enqueue_report_event(verification_report)
 
         read_serializer = ReportReadSerializer(verification_report, context={'request': request})
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
@@ -96,6 +123,48 @@ class ReportViewSet(viewsets.ModelViewSet):
         read_serializer = ReportDetailSerializer(updated_report, context={'request': request})
         return Response(read_serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAdminOrStaff])
+    def export(self, request):
+        """
+        Streams every report matching the list filters (or their status history or
+        point logs, via ?dataset=) as CSV or NDJSON, without pagination.
+        """
+        dataset = request.query_params.get('dataset', exports.DATASET_REPORTS)
+        if dataset not in exports.DATASETS:
+            raise ValidationError({"dataset": f"Must be one of: {', '.join(exports.DATASETS)}."})
+        export_format = request.query_params.get('export_format', core_exports.FORMAT_CSV)
+        if export_format not in core_exports.FORMATS:
+            raise ValidationError({"export_format": f"Must be one of: {', '.join(core_exports.FORMATS)}."})
+
+        reports = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return exports.export_reports(reports, dataset, export_format)
+
+    @action(detail=False, methods=['get'], url_path='clusters')
+    def clusters(self, request):
+        """
+        Report counts per map cell for `?bbox=min_lng,min_lat,max_lng,max_lat&zoom=`,
+        honouring the list filters. The response size is bounded by the cells on screen.
+        """
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(value) for value in request.query_params.get('bbox', '').split(','))
+        except ValueError:
+            raise ValidationError({"bbox": "Must be min_lng,min_lat,max_lng,max_lat."})
+        if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise ValidationError({"bbox": "Must be a non-empty box within -180..180 / -90..90."})
+        try:
+            zoom = int(request.query_params.get('zoom', ''))
+        except ValueError:
+            raise ValidationError({"zoom": "Must be an integer."})
+        if not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+            raise ValidationError({"zoom": f"Must be between 0 and {MAX_CLUSTER_ZOOM}."})
+
+        bbox = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+        bbox.srid = 4326
+        reports = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        cells = cluster_reports(reports, bbox, zoom)[:self.max_clusters]
+        serializer = self.get_serializer(cells, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='history')
     def history(self, request, pk=None):
         report = self.get_object()
@@ -104,9 +173,126 @@ class ReportViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class IssueCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class IssueCategoryViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = IssueCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = IssueCategory.objects.filter(is_active=True)
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['municipality']
\ No newline at end of file
+    filterset_fields = ['municipality']
+    cache_namespace = response_cache.ISSUE_CATEGORIES
+    cache_timeout = 600
+
+
+class MediaUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Upload tickets: POST declares a file and returns where to PUT it, and
+    finalize verifies the stored object. Finalized tickets are attached to a
+    report by listing their ids in `media_uploads` when creating it.
+
+    Resumable tickets take the file at `content` instead: HEAD returns the
+    Upload-Offset received so far, and each PATCH sends the bytes from that
+    offset as application/offset+octet-stream. The PATCH that completes the
+    file also finalizes the ticket.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    chunk_content_type = 'application/offset+octet-stream'
+
+    def get_queryset(self):
+        return MediaUpload.objects.filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return MediaUploadCreateSerializer
+        return MediaUploadSerializer
+
+    @action(detail=True, methods=['post'], url_path='finalize')
+    def finalize(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            finalize_upload(upload)
+        except UploadVerificationError as exc:
+            raise ValidationError({'detail': str(exc)})
+        return Response(self.get_serializer(upload).data)
+
+    def _offset_response(self, upload, response_status):
+        response = Response(status=response_status)
+        response['Upload-Offset'] = str(upload.received_bytes)
+        response['Upload-Length'] = str(upload.size_bytes)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    @action(detail=True, methods=['head', 'patch'], url_path='content')
+    def content(self, request, pk=None):
+        upload = self.get_object()
+        if not upload.resumable:
+            raise ValidationError({'detail': 'This upload is not resumable; PUT it to its upload URL.'})
+        if request.method == 'HEAD':
+            return self._offset_response(upload, status.HTTP_200_OK)
+
+        if request.content_type.split(';')[0].strip() != self.chunk_content_type:
+            return Response({'detail': f'Chunks must be sent as {self.chunk_content_type}.'}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'The Upload-Offset header is required.'})
+
+        # The lease lives in the shared cache, so a slow chunk never holds a database transaction.
+        with chunk_lease(upload.pk) as leased:
+            upload.refresh_from_db()
+            if not leased or upload.status != MediaUpload.Status.PENDING or offset != upload.received_bytes:
+                return self._offset_response(upload, status.HTTP_409_CONFLICT)
+            if upload.received_bytes < upload.size_bytes:
+                # The raw body is streamed, never parsed into memory.
+                if append_chunk(upload, request._request) is None:
+                    upload.refresh_from_db()
+                    return self._offset_response(upload, status.HTTP_409_CONFLICT)
+            if upload.received_bytes == upload.size_bytes:
+                try:
+                    complete_resumable_upload(upload)
+                except UploadVerificationError as exc:
+                    # The offset stays at the end: retrying the last PATCH re-runs the verification.
+                    raise ValidationError({'detail': str(exc)})
+        return self._offset_response(upload, status.HTTP_204_NO_CONTENT)
+
+
+class LocalUploadView(APIView):
+    """
+    Stand-in for a presigned object-storage PUT when no bucket is configured
+    (development and tests). The signed token in the URL is the authorization,
+    and only while its ticket is still pending. The body is streamed to disk,
+    never held in memory, and must be exactly the signed size.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    chunk_size = 64 * 1024
+
+    def put(self, request, token):
+        if storage.uses_object_storage():
+            raise NotFound()
+        try:
+            grant = storage.load_local_upload_token(token, max_age=settings.MEDIA_UPLOAD_URL_EXPIRY_SECONDS)
+        except signing.BadSignature:
+            return Response({"detail": "Upload URL is invalid or has expired."}, status=status.HTTP_403_FORBIDDEN)
+        if request.content_type.split(';')[0].strip() != grant['content_type']:
+            return Response({"detail": "Content-Type does not match the signed upload."}, status=status.HTTP_403_FORBIDDEN)
+        if not MediaUpload.objects.filter(key=grant['key'], status=MediaUpload.Status.PENDING, resumable=False).exists():
+            return Response({"detail": "This upload has already been finalized."}, status=status.HTTP_403_FORBIDDEN)
+
+        with tempfile.TemporaryFile() as buffer:
+            received = 0
+            stream = request._request
+            while chunk := stream.read(self.chunk_size):
+                received += len(chunk)
+                if received > grant['size_bytes']:
+                    raise ValidationError({"detail": f"Upload exceeds the signed {grant['size_bytes']} bytes."})
+                buffer.write(chunk)
+            if received != grant['size_bytes']:
+                raise ValidationError({"detail": f"Received {received} of the signed {grant['size_bytes']} bytes."})
+            buffer.seek(0)
+            # PUT replaces the object, as it would in a bucket.
+            default_storage.delete(grant['key'])
+            saved_name = default_storage.save(grant['key'], File(buffer))
+        if saved_name != grant['key']:
+            default_storage.delete(saved_name)
+            return Response({"detail": "Could not store the object under its key."}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_200_OK)
@@ -14,7 +14,7 @@ class UserAdmin(BaseUserAdmin):
         ('Personal Info', {'fields': ('full_name', 'phone_number')}),
         ('Role & Affiliation', {'fields': ('role', 'municipality')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
-        ('Gamification', {'fields': ('total_points',)}),
+        ('Gamification', {'fields': ('total_points', 'reports_filed_count', 'verifications_count', 'reports_actioned_count', 'reports_pending_count')}),
         ('Important dates', {'fields': ('last_login', 'date_joined')}),
     )
     
@@ -25,4 +25,4 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
     
-    readonly_fields = ('last_login', 'date_joined')
\ No newline at end of file
+    readonly_fields = ('last_login', 'date_joined', 'reports_filed_count', 'verifications_count', 'reports_actioned_count', 'reports_pending_count')
\ No newline at end of file
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from reports.services import repair_user_report_counters
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized report/verification counters on every user and repairs any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many users have drifted counters.')
+
+    def handle(self, *args, **options):
+        drifted_count, repaired = repair_user_report_counters(dry_run=options['dry_run'])
+        if options['dry_run'] or not drifted_count:
+            self.stdout.write(self.style.SUCCESS(f'{drifted_count} users have drifted report counters.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Repaired report counters for {repaired} users.'))
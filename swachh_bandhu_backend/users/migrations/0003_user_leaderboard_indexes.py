@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('subscriptions', '0001_initial'),
+        ('users', '0002_user_profile_picture'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'is_active', '-total_points'], name='users_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['municipality', 'role', 'is_active', '-total_points'], name='users_muni_leaderboard_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_report_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Report = apps.get_model('reports', 'Report')
+
+    def count(**filters):
+        counts = Report.objects.filter(user=OuterRef('pk'), **filters).order_by().values('user').annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    User.objects.update(
+        reports_filed_count=count(verifies_report__isnull=True),
+        verifications_count=count(verifies_report__isnull=False),
+        reports_actioned_count=count(status='ACTIONED'),
+        reports_pending_count=count(status__in=['PENDING', 'VERIFIED']),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_leaderboard_indexes'),
+        ('reports', '0004_alter_report_points_awarded_alter_report_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='reports_actioned_count',
+            field=models.IntegerField(default=0, help_text='Reports by this user that are currently actioned.'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='reports_filed_count',
+            field=models.IntegerField(default=0, help_text='Initial reports filed (excludes verifications).'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='reports_pending_count',
+            field=models.IntegerField(default=0, help_text='Reports by this user that are currently pending or awaiting action.'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='verifications_count',
+            field=models.IntegerField(default=0, help_text="Verifications of other users' reports."),
+        ),
+        migrations.RunPython(populate_report_counters, migrations.RunPython.noop),
+    ]
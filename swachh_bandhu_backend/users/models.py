@@ -75,6 +75,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     
     total_points = models.IntegerField(default=0, db_index=True)
+    reports_filed_count = models.IntegerField(default=0, help_text=_("Initial reports filed (excludes verifications)."))
+    verifications_count = models.IntegerField(default=0, help_text=_("Verifications of other users' reports."))
+    reports_actioned_count = models.IntegerField(default=0, help_text=_("Reports by this user that are currently actioned."))
+    reports_pending_count = models.IntegerField(default=0, help_text=_("Reports by this user that are currently pending or awaiting action."))
     
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -92,6 +96,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-date_joined']
+        indexes = [
+            # Backs the leaderboard's database fallback (rank counts and top-N scans).
+            models.Index(fields=['role', 'is_active', '-total_points'], name='users_leaderboard_idx'),
+            models.Index(fields=['municipality', 'role', 'is_active', '-total_points'], name='users_muni_leaderboard_idx'),
+        ]
 
     def __str__(self):
         return self.email